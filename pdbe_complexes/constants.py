@@ -11,3 +11,54 @@ complex_name_headers = [
 ]
 
 name_exclude_list = ["subunit", "component", "chain"]
+
+# Neo4j connection pool settings shared by every Neo4jDatabaseOperations
+neo4j_pool_size = 10
+neo4j_pool_max_age = 3600
+neo4j_health_check_interval = 60
+
+# chunking and retry settings for UNWIND batch writes
+neo4j_batch_size = 10000
+neo4j_min_batch_size = 100
+neo4j_max_retries = 5
+neo4j_retry_delay = 2
+
+# max number of nodes or relationships deleted per transaction
+neo4j_delete_batch_size = 10000
+
+# number of records pulled per round trip when streaming large read queries
+neo4j_fetch_size = 1000
+
+# max number of IDs per molecule name lookup
+neo4j_lookup_batch_size = 10000
+
+# (label, property, unique) lookups done by the MERGE/MATCH queries
+schema_requirements = [
+    ("PDBComplex", "COMPLEX_ID", True),
+    ("UniProt", "ACCESSION", False),
+    ("Entity", "ID", False),
+    ("Entity", "UNIQID", False),
+    ("Assembly", "UNIQID", False),
+    ("RfamFamily", "RFAM_ACC", False),
+    ("Complex", "COMPLEX_ID", False),
+    ("Entry", "ID", False),
+    ("UnmappedPolymer", "TYPE", False),
+]
+
+# seconds to wait for new indexes to come online
+schema_await_timeout = 600
+
+# seconds after which a cached read query result set expires
+query_cache_ttl = 7 * 24 * 3600
+
+# number of concurrent shards PDB_ASSEMBLY_DATA_QUERY is split into; 1 reads
+# the assembly data in a single query
+pdb_assembly_shards = 1
+
+# number of worker processes parsing and hashing the assembly compositions; 1
+# processes them in the main process
+mapping_workers = 1
+
+# max number of full relationship batches waiting to be written when the
+# relationships are streamed to the graph db
+stream_max_pending_batches = 4
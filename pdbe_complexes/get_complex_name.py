@@ -1,14 +1,20 @@
 from collections import Counter, OrderedDict
 
 from pdbe_complexes import queries as qy
-from pdbe_complexes.constants import name_exclude_list
+from pdbe_complexes.constants import (
+    name_exclude_list,
+    neo4j_batch_size,
+    neo4j_fetch_size,
+)
 from pdbe_complexes.log import logger
 from pdbe_complexes.utils import utility as ut
+from pdbe_complexes.utils.bulk_import import BulkImportWriter
 from pdbe_complexes.utils.get_annotated_name import GetAnnotatedName
 from pdbe_complexes.utils.get_data_from_complex_portal_ftp import GetComplexPortalData
 from pdbe_complexes.utils.get_data_from_graph_db import GetComplexData
 from pdbe_complexes.utils.get_derived_name import DeriveName
 from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+from pdbe_complexes.utils.write_plan import write_plan
 
 
 class ProcessComplexName:
@@ -19,12 +25,25 @@ class ProcessComplexName:
         password,
         csv_path,
         complex_portal_path,
+        batch_size=neo4j_batch_size,
+        fetch_size=neo4j_fetch_size,
+        incremental=False,
+        bulk_import_path=None,
+        backend=None,
+        grouped_pdb_complexes=False,
     ):
         self.bolt_host = bolt_uri
         self.username = username
         self.password = password
         self.neo4j_info = (bolt_uri, username, password)
-        self.ndo = Neo4jDatabaseOperations(self.neo4j_info)
+        self.ndo = Neo4jDatabaseOperations(
+            self.neo4j_info, batch_size=batch_size, backend=backend
+        )
+        self.backend = backend
+        self.grouped_pdb_complexes = grouped_pdb_complexes
+        self.fetch_size = fetch_size
+        self.incremental = incremental
+        self.bulk_import_path = bulk_import_path
         self.csv_path = csv_path
         self.complex_portal_path = complex_portal_path
         self.complex_data = {}
@@ -72,7 +91,14 @@ class ProcessComplexName:
             dict: Contains data relevant for complexes with the key
             being the PDB Complex ID
         """
-        cd = GetComplexData(self.bolt_host, self.username, self.password)
+        cd = GetComplexData(
+            self.bolt_host,
+            self.username,
+            self.password,
+            fetch_size=self.fetch_size,
+            backend=self.backend,
+            grouped=self.grouped_pdb_complexes,
+        )
         self.complex_data = cd.get_pdb_complex_data()
         return self.complex_data
 
@@ -693,6 +719,21 @@ class ProcessComplexName:
             self.complex_name_params_list,
             self.updated_complex_name_dict,
         ) = ut.process_complex_names(self.complex_name_dict)
+        if self.incremental:
+            self.complex_name_params_list = self._get_changed_names(
+                self.complex_name_params_list
+            )
+        if write_plan.enabled:
+            changed_names = self.complex_name_params_list
+            if not self.incremental:
+                changed_names = self._get_changed_names(changed_names)
+            write_plan.add("change", "PDBComplex name", len(changed_names))
+        if self.bulk_import_path:
+            names_path = BulkImportWriter(self.bulk_import_path).write_names(
+                self.complex_name_params_list
+            )
+            logger.info(f"Load {names_path} with LOAD_COMPLEX_NAMES_QUERY")
+            return
         self.ndo._create_nodes_relationship(
             qy.SET_COMPLEX_NAMES_QUERY,
             "PDBComplex",
@@ -700,3 +741,29 @@ class ProcessComplexName:
             "complex_name_params_list",
             self.complex_name_params_list,
         )
+
+    def _get_changed_names(self, complex_name_params_list):
+        """
+        Returns only the complex names that differ from the ones already
+        set on the PDBComplex nodes in the graph db
+
+        Args:
+            complex_name_params_list (list of dict): complex name params
+
+        Returns:
+            list of dict: complex name params that have changed
+        """
+        existing_names = {}
+        mappings = self.ndo.run_query(qy.PDB_COMPLEX_NAME_QUERY, stream=True)
+        for row in mappings:
+            existing_names[row.get("complex_id")] = row.get("complex_name") or ""
+        changed_names = [
+            row
+            for row in complex_name_params_list
+            if existing_names.get(row["pdb_complex_id"]) != (row["complex_name"] or "")
+        ]
+        logger.info(
+            f"{len(changed_names)} of {len(complex_name_params_list)} complex names "
+            "have changed"
+        )
+        return changed_names
@@ -2,9 +2,25 @@ import argparse
 
 from pdbe_complexes.constants import complex_mapping_headers as headers_one
 from pdbe_complexes.constants import complex_name_headers as headers_two
+from pdbe_complexes.constants import (
+    mapping_workers,
+    neo4j_batch_size,
+    neo4j_delete_batch_size,
+    neo4j_fetch_size,
+    neo4j_pool_size,
+    pdb_assembly_shards,
+    query_cache_ttl,
+)
 from pdbe_complexes.get_complex_name import ProcessComplexName
 from pdbe_complexes.process_complex import Neo4JProcessComplex
 from pdbe_complexes.utils import utility as ut
+from pdbe_complexes.utils.connection_manager import connection_manager
+from pdbe_complexes.utils.graph_schema import GraphSchema
+from pdbe_complexes.utils.memory_graph import InMemoryGraph
+from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+from pdbe_complexes.utils.query_cache import query_cache
+from pdbe_complexes.utils.query_profiler import PROFILE_MODE, query_profiler
+from pdbe_complexes.utils.write_plan import write_plan
 
 
 def main():
@@ -52,16 +68,238 @@ def main():
         help="Path to Complex Portal ftp site",
     )
 
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=neo4j_pool_size,
+        help="Max number of pooled Neo4j connections shared by all steps",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=neo4j_batch_size,
+        help="Max number of rows written to the graph db per transaction",
+    )
+
+    parser.add_argument(
+        "--delete-batch-size",
+        type=int,
+        default=neo4j_delete_batch_size,
+        help="Max number of nodes or relationships deleted per transaction",
+    )
+
+    parser.add_argument(
+        "--fetch-size",
+        type=int,
+        default=neo4j_fetch_size,
+        help="Number of records pulled per round trip by streamed read queries",
+    )
+
+    parser.add_argument(
+        "--profile-queries",
+        action="store_true",
+        help="Run the statements from queries.py under PROFILE and write a JSON "
+        "report of their plans to the output path",
+    )
+
+    parser.add_argument(
+        "--explain-only",
+        action="store_true",
+        help="With --profile-queries, only EXPLAIN every statement from queries.py "
+        "without running the process, so nothing is written",
+    )
+
+    parser.add_argument(
+        "--prepare-schema",
+        action="store_true",
+        help="Only create the indexes and constraints needed by the process",
+    )
+
+    parser.add_argument(
+        "--skip-schema-check",
+        action="store_true",
+        help="Do not check for missing indexes and constraints before writing",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write the differences to the PDBComplex nodes already in the "
+        "graph db instead of dropping and recreating them",
+    )
+
+    parser.add_argument(
+        "--verify-subcomplexes",
+        action="store_true",
+        help="Compare the sub-complexes found in Python with the ones found by "
+        "SUBCOMPLEX_QUERY in the graph db and log any difference",
+    )
+
+    parser.add_argument(
+        "--bulk-import-path",
+        help="Write the PDBComplex relationships as LOAD CSV files and the "
+        "cypher-shell script loading them to this dir instead of writing them to "
+        "the graph db. Complex names are written here by a later --names-only run",
+    )
+
+    parser.add_argument(
+        "--names-only",
+        action="store_true",
+        help="Only assign the complex names, e.g. once the bulk import files have "
+        "been loaded",
+    )
+
+    parser.add_argument(
+        "--cache-path",
+        help="Keep the result sets of the large read queries in this dir and "
+        "reuse them on reruns while the graph db is unchanged",
+    )
+
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=query_cache_ttl,
+        help="Seconds after which a cached result set expires",
+    )
+
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Read the cached queries from the graph db again and overwrite "
+        "their cached result sets",
+    )
+
+    parser.add_argument(
+        "--assembly-shards",
+        type=int,
+        default=pdb_assembly_shards,
+        help="Read the PDB assembly compositions in this many concurrent shards, "
+        "split on the last character of the entry ID (1 to 36)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the relationship writes of a failed run from its write "
+        "journal in the CSV path instead of rerunning the whole process",
+    )
+
+    parser.add_argument(
+        "--grouped-pdb-complexes",
+        action="store_true",
+        help="Read the PDB complexes with one record per complex instead of one "
+        "row per complex component when assigning the complex names",
+    )
+
+    parser.add_argument(
+        "--registry-path",
+        help="SQLite file keeping the PDB complex IDs between runs. It is filled "
+        "from complexes_master.csv when empty, else it replaces that file as the "
+        "reference for existing IDs",
+    )
+
+    parser.add_argument(
+        "--mapping-workers",
+        type=int,
+        default=mapping_workers,
+        help="Parse, hash and build the params of the assembly compositions in "
+        "this many worker processes before allocating the IDs in order",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the relationships of the PDB complexes while the assembly data "
+        "is being read, holding only a bounded number of batches in memory",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run the whole computation without writing to the graph db or the CSV "
+        "files, and report the planned writes and changes",
+    )
+
+    parser.add_argument(
+        "--synthetic-entries",
+        type=int,
+        help="Run the process against an in-memory graph of this many synthetic "
+        "PDB entries instead of the graph db, e.g. for profiling",
+    )
+
     args = parser.parse_args()
+    if args.dry_run and (args.bulk_import_path or args.resume):
+        parser.error("--dry-run cannot be used with --bulk-import-path or --resume")
+
+    connection_manager.configure(pool_size=args.pool_size)
+    if args.cache_path:
+        query_cache.configure(
+            args.cache_path, ttl=args.cache_ttl, refresh=args.refresh_cache
+        )
+    args.backend = None
+    if args.synthetic_entries:
+        args.backend = InMemoryGraph.synthetic(args.synthetic_entries)
+    try:
+        ndo = Neo4jDatabaseOperations(
+            (args.bolt_url, args.username, args.password), backend=args.backend
+        )
+        if args.profile_queries and args.explain_only:
+            query_profiler.explain_queries(ndo)
+        elif args.prepare_schema:
+            GraphSchema(ndo).prepare()
+        else:
+            if args.dry_run:
+                write_plan.enable()
+                if not args.skip_schema_check:
+                    missing = GraphSchema(ndo).find_missing()
+                    write_plan.add("create", "index", len(missing))
+            elif not args.skip_schema_check:
+                GraphSchema(ndo).prepare()
+            if args.profile_queries:
+                query_profiler.enable(PROFILE_MODE)
+            run_pipeline(args)
+            if write_plan.enabled:
+                write_plan.log_report()
+    finally:
+        if query_profiler.enabled:
+            query_profiler.write_report(args.csv_path)
+        connection_manager.close()
 
+
+def run_pipeline(args):
+    if not args.names_only:
+        run_complex_process(args)
+    if args.bulk_import_path and not args.names_only:
+        # the names are derived from the PDBComplex nodes in the graph db, so
+        # they can only be assigned once the import files have been loaded
+        return
+    run_name_process(args)
+
+
+def run_complex_process(args):
     complex = Neo4JProcessComplex(
         bolt_uri=args.bolt_url,
         username=args.username,
         password=args.password,
         csv_path=args.csv_path,
         uniprot_mapping_path=args.uniprot_mapping_path,
+        batch_size=args.batch_size,
+        fetch_size=args.fetch_size,
+        incremental=args.incremental,
+        delete_batch_size=args.delete_batch_size,
+        verify_subcomplexes=args.verify_subcomplexes,
+        bulk_import_path=args.bulk_import_path,
+        backend=args.backend,
+        assembly_shards=args.assembly_shards,
+        resume=args.resume,
+        registry_path=args.registry_path,
+        mapping_workers=args.mapping_workers,
+        stream=args.stream,
     )
     complex.run_process()
+    if args.dry_run:
+        return
     csv_params = (
         complex.reference_mapping,
         "md5_obj",
@@ -71,14 +309,24 @@ def main():
     )
     ut.export_csv(csv_params)
 
+
+def run_name_process(args):
     complex = ProcessComplexName(
         bolt_uri=args.bolt_url,
         username=args.username,
         password=args.password,
         csv_path=args.csv_path,
         complex_portal_path=args.complex_portal_path,
+        batch_size=args.batch_size,
+        fetch_size=args.fetch_size,
+        incremental=args.incremental,
+        bulk_import_path=args.bulk_import_path,
+        backend=args.backend,
+        grouped_pdb_complexes=args.grouped_pdb_complexes,
     )
     complex.run_process()
+    if args.dry_run:
+        return
     csv_params = (
         complex.updated_complex_name_dict,
         "pdb_complex_id",
@@ -88,7 +336,7 @@ def main():
     )
     ut.export_csv(csv_params)
 
-    ut.merge_csv_files(args.csv_path)
+    ut.merge_csv_files(args.csv_path, write_deltas=True)
     ut.clean_files(args.csv_path)
 
 
@@ -1,12 +1,55 @@
-import csv
 import hashlib
 import os
 from collections import OrderedDict
 
 from pdbe_complexes import queries as qy
+from pdbe_complexes.constants import (
+    mapping_workers,
+    neo4j_batch_size,
+    neo4j_delete_batch_size,
+    neo4j_fetch_size,
+    pdb_assembly_shards,
+    stream_max_pending_batches,
+)
 from pdbe_complexes.log import logger
 from pdbe_complexes.utils import utility as ut
+from pdbe_complexes.utils.assembly_shards import get_sharded_assembly_data
+from pdbe_complexes.utils.bulk_import import BulkImportWriter
+from pdbe_complexes.utils.complex_registry import ComplexRegistry
+from pdbe_complexes.utils.composition import clear_interned
+from pdbe_complexes.utils.incremental_update import (
+    IncrementalUpdate,
+    get_component_key,
+)
+from pdbe_complexes.utils.mapping_pool import prepare_mappings
 from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+from pdbe_complexes.utils.reference_loader import read_reference_columns
+from pdbe_complexes.utils.relationship_buffer import (
+    RELATIONSHIP_COLUMNS,
+    RelationshipBuffer,
+)
+from pdbe_complexes.utils.relationship_stream import RelationshipStream
+from pdbe_complexes.utils.subcomplex import (
+    find_subcomplexes,
+    get_compositions,
+    verify_subcomplexes,
+)
+from pdbe_complexes.utils.write_journal import WriteJournal
+from pdbe_complexes.utils.write_plan import write_plan
+
+# query and node names of each PDBComplex relationship params list
+RELATIONSHIP_QUERIES = OrderedDict(
+    [
+        ("accession_params_list", (qy.MERGE_ACCESSION_QUERY, "Uniprot", "PDBComplex")),
+        ("entity_params_list", (qy.MERGE_ENTITY_QUERY, "Entity", "PDBComplex")),
+        (
+            "unmapped_polymer_params_list",
+            (qy.MERGE_UNMAPPED_POLYMER_QUERY, "UnmappedPolymer", "PDBComplex"),
+        ),
+        ("rfam_params_list", (qy.MERGE_RFAM_QUERY, "Rfam", "PDBComplex")),
+        ("assembly_params_list", (qy.MERGE_ASSEMBLY_QUERY, "Assembly", "PDBComplex")),
+    ]
+)
 
 
 class Neo4JProcessComplex:
@@ -15,24 +58,63 @@ class Neo4JProcessComplex:
     and to create persistent, unique complex identifiers
     """
 
-    def __init__(self, bolt_uri, username, password, csv_path, uniprot_mapping_path):
+    def __init__(
+        self,
+        bolt_uri,
+        username,
+        password,
+        csv_path,
+        uniprot_mapping_path,
+        batch_size=neo4j_batch_size,
+        fetch_size=neo4j_fetch_size,
+        incremental=False,
+        delete_batch_size=neo4j_delete_batch_size,
+        verify_subcomplexes=False,
+        bulk_import_path=None,
+        backend=None,
+        assembly_shards=pdb_assembly_shards,
+        resume=False,
+        registry_path=None,
+        mapping_workers=mapping_workers,
+        stream=False,
+    ):
 
-        self.ndo = Neo4jDatabaseOperations((bolt_uri, username, password))
+        self.ndo = Neo4jDatabaseOperations(
+            (bolt_uri, username, password),
+            batch_size=batch_size,
+            fetch_size=fetch_size,
+            delete_batch_size=delete_batch_size,
+            backend=backend,
+        )
         self.csv_path = csv_path
         self.uniprot_mapping_path = uniprot_mapping_path
+        self.incremental = incremental
+        self.verify_subcomplexes = verify_subcomplexes
+        self.bulk_import_path = bulk_import_path
+        self.assembly_shards = assembly_shards
+        self.resume = resume
+        self.mapping_workers = mapping_workers
+        self.stream = stream
+        # set while streaming the relationships to the graph db
+        self.relationship_stream = None
+        self.compositions = None
         self.dict_complex_portal_id = {}
         self.dict_complex_portal_entries = {}
         self.dict_pdb_complex = {}
         self.common_complexes = []
-        self.reference_mapping = OrderedDict()
-        self.accession_params_list = []
-        self.entity_params_list = []
-        self.assembly_params_list = []
-        self.rfam_params_list = []
+        if registry_path and write_plan.enabled:
+            # a dry run allocates its IDs in a copy of the registry
+            self.reference_mapping = ComplexRegistry.snapshot(registry_path)
+        else:
+            # an in-memory registry is filled from complexes_master.csv on every run
+            self.reference_mapping = ComplexRegistry(registry_path or ":memory:")
+        # the relationship params are kept column-wise until they are written
+        for param_name, columns in RELATIONSHIP_COLUMNS.items():
+            setattr(self, param_name, RelationshipBuffer(columns))
         self.complex_params_list = []
-        self.unmapped_polymer_params_list = []
         self.complexes_unique_to_complex_portal = []
         self.existing_complexes_dict = {}
+        self.updater = None
         self.new_complexes_dict = {}
         self.has_REFERENCE_MAPPING = False
 
@@ -43,14 +125,37 @@ class Neo4JProcessComplex:
         Returns:
             none
         """
+        journal = WriteJournal(self.csv_path)
+        if self.resume:
+            if journal.exists():
+                self._set_journal_params(journal.load())
+                self.post_processing(journal)
+                return
+            logger.warning("No write journal to resume from, running the process")
 
         self.get_complex_portal_data()
-        self.drop_PDBComplex_nodes()
+        if not self.incremental and not self.bulk_import_path:
+            self.drop_PDBComplex_nodes()
         self.get_reference_mapping()
         if self.has_REFERENCE_MAPPING:
             self.correct_uniprot_mapping()
+        if self.stream and not self.bulk_import_path and not self.incremental:
+            self.stream_processing()
+            if write_plan.enabled:
+                self._add_planned_changes()
+            return
         self.process_assembly_data()
-        self.post_processing()
+        if self.bulk_import_path:
+            self.bulk_import_post_processing()
+        elif self.incremental:
+            self.incremental_post_processing()
+        elif write_plan.enabled:
+            self.post_processing()
+        else:
+            journal.start(self._get_journal_params())
+            self.post_processing(journal)
+        if write_plan.enabled:
+            self._add_planned_changes()
 
     def get_complex_portal_data(self):
         """
@@ -61,43 +166,53 @@ class Neo4JProcessComplex:
             none
         """
         logger.info("Start querying Complex Portal data")
-        mappings = self.ndo.run_query(qy.COMPLEX_PORTAL_DATA_QUERY)
+        mappings = self.ndo.run_query(qy.COMPLEX_PORTAL_DATA_QUERY, cached=True)
         for row in mappings:
-            accessions = row.get("uniq_accessions")
+            accessions = ",".join(ut.get_list(row.get("uniq_accessions")))
             complex_id = row.get("complex_id")
-            entries = row.get("entries_str")
+            entries = ut.get_list(row.get("entries"))
+            entries = ",".join(entries) or None
             self.dict_complex_portal_id[accessions] = complex_id
             self.dict_complex_portal_entries[complex_id] = entries
         logger.info("Done querying Complex Portal data")
 
     def drop_PDBComplex_nodes(self):
         """
-        Drop any existing PDB complex nodes in the graph db
+        Drop any existing PDB complex nodes in the graph db, in batches of
+        delete_batch_size nodes
         """
-        return self.ndo.run_query(qy.DROP_PDB_COMPLEX_NODES_QUERY)
+        return self.ndo.batch_writer.delete(
+            qy.DROP_PDB_COMPLEX_NODES_QUERY,
+            qy.COUNT_PDB_COMPLEX_NODES_QUERY,
+            "PDBComplex deletion",
+        )
 
     def get_reference_mapping(self, reference_filename="complexes_master.csv"):
         """
         Store mapping of complex-composition strings to pdb_complex_ids
-        into a reference dictionary for lookup if available
+        into the reference registry for lookup if available. A registry
+        that already holds mappings is not filled from the file again. The
+        file is read column-wise, or from its Feather sidecar when it is fresh
 
         Args:
             reference_filename (str, optional): Reference mapping file. Defaults to
                                                 "complexes_master.csv".
         """
         logger.info("Start reading reference information")
+        if len(self.reference_mapping):
+            logger.info(
+                f"Using the {len(self.reference_mapping)} mappings in the registry"
+            )
+            self.has_REFERENCE_MAPPING = True
+            return
         complete_filepath = os.path.join(self.csv_path, reference_filename)
         if os.path.exists(complete_filepath):
-            with open(complete_filepath) as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    self.reference_mapping[row["md5_obj"]] = {
-                        "pdb_complex_id": row["pdb_complex_id"],
-                        "complex_portal_id": row["complex_portal_id"],
-                        "accession": row["accession"],
-                        "entries": row["entries"],
-                    }
-                self.has_REFERENCE_MAPPING = True
+            self.reference_mapping.load_columns(
+                read_reference_columns(
+                    complete_filepath, update_sidecar=not write_plan.enabled
+                )
+            )
+            self.has_REFERENCE_MAPPING = True
 
     def update_reference_mapping(self, updated_complex_strings):
         for (
@@ -110,18 +225,18 @@ class Neo4JProcessComplex:
             new_complex_hash = hashlib.md5(
                 new_complex_string.encode("utf-8")
             ).hexdigest()
+            obsolete_complex = self.reference_mapping[obsolete_complex_hash]
+            # retire the obsolete mapping first, its ID is carried over
+            self.reference_mapping.retire(
+                obsolete_complex_hash, "obsolete UniProt accession"
+            )
             if new_complex_hash not in self.reference_mapping:
                 self.reference_mapping[new_complex_hash] = {
-                    "pdb_complex_id": self.reference_mapping[obsolete_complex_hash][
-                        "pdb_complex_id"
-                    ],
-                    "complex_portal_id": self.reference_mapping[obsolete_complex_hash][
-                        "complex_portal_id"
-                    ],
+                    "pdb_complex_id": obsolete_complex["pdb_complex_id"],
+                    "complex_portal_id": obsolete_complex["complex_portal_id"],
                     "accession": new_complex_string,
-                    "entries": self.reference_mapping[obsolete_complex_hash]["entries"],
+                    "entries": obsolete_complex["entries"],
                 }
-            del self.reference_mapping[obsolete_complex_hash]
 
     # def _process_remaining_complex_portal_entries(self, accessions):
     #     """
@@ -160,9 +275,21 @@ class Neo4JProcessComplex:
         Complex Portal data and processes them for use later.
         """
         logger.info("Start querying PDB Assembly data")
-        mappings = self.ndo.run_query(qy.PDB_ASSEMBLY_DATA_QUERY)
-        for row in mappings:
-            self._process_mapping(row)
+        if self.assembly_shards > 1:
+            mappings = get_sharded_assembly_data(self.ndo, self.assembly_shards)
+        else:
+            # the query cache reads the whole result set, streaming reads lazily
+            mappings = self.ndo.run_query(
+                qy.PDB_ASSEMBLY_DATA_QUERY, stream=True, cached=not self.stream
+            )
+        try:
+            # parse, hash and build the params, in parallel with more than one
+            # worker, then allocate the IDs of each chunk of rows together
+            for prepared_mappings in prepare_mappings(mappings, self.mapping_workers):
+                self._add_mappings(prepared_mappings)
+        finally:
+            # the parsed components are only needed while mapping the rows
+            clear_interned()
 
         # for accessions in self.dict_complex_portal_id.keys():
         #     self._process_remaining_complex_portal_entries(accessions)
@@ -173,16 +300,41 @@ class Neo4JProcessComplex:
 
         logger.info("Done querying PDB Assembly data")
 
-    def _process_mapping(self, row):
-        uniq_accessions = row.get("accessions")
-        assemblies = row.get("assemblies")
-        # remove all occurences of NA_ from the unique complex combination
-        tmp_uniq_accessions = uniq_accessions.replace("NA_", "")
-        accession_hash = hashlib.md5(tmp_uniq_accessions.encode("utf-8")).hexdigest()
-        complex_portal_id = self.dict_complex_portal_id.get(tmp_uniq_accessions)
-        pdb_complex_id = self._use_persistent_identifier(
-            accession_hash, tmp_uniq_accessions, complex_portal_id, assemblies
+    def _add_mappings(self, prepared_mappings):
+        """
+        Allocates the PDB complex IDs of a chunk of prepared mappings in one
+        registry transaction instead of one per row, then adds the mappings
+        in the order of the rows
+
+        Args:
+            prepared_mappings (list of PreparedMapping): chunk of mappings
+        """
+        complex_portal_ids = [
+            self.dict_complex_portal_id.get(prepared_mapping.accessions)
+            for prepared_mapping in prepared_mappings
+        ]
+        pdb_complex_ids = self.reference_mapping.allocate_many(
+            (
+                prepared_mapping.md5,
+                prepared_mapping.accessions,
+                complex_portal_id,
+                prepared_mapping.assemblies,
+            )
+            for prepared_mapping, complex_portal_id in zip(
+                prepared_mappings, complex_portal_ids
+            )
         )
+        for prepared_mapping, complex_portal_id in zip(
+            prepared_mappings, complex_portal_ids
+        ):
+            pdb_complex_id, allocated = pdb_complex_ids[prepared_mapping.md5]
+            self._record_identifier(
+                prepared_mapping.accessions, pdb_complex_id, allocated
+            )
+            self._add_mapping(prepared_mapping, complex_portal_id, pdb_complex_id)
+
+    def _add_mapping(self, prepared_mapping, complex_portal_id, pdb_complex_id):
+        tmp_uniq_accessions = prepared_mapping.accessions
         # common complex; delete from dictionary else will be processed again
         if complex_portal_id is not None:
             del self.dict_complex_portal_id[tmp_uniq_accessions]
@@ -190,123 +342,55 @@ class Neo4JProcessComplex:
         # keep data for each PDB complex in dict_pdb_complex to be used later
         self.dict_pdb_complex[pdb_complex_id] = (
             tmp_uniq_accessions,
-            assemblies,
+            prepared_mapping.assemblies,
         )
-        for uniq_accession in uniq_accessions.split(","):
-            self._process_uniq_accession(pdb_complex_id, uniq_accession)
-        for uniq_assembly in assemblies.split(","):
+        for param_name, values in prepared_mapping.components:
+            self._append_params(param_name, pdb_complex_id, *values)
+        # the streamed params are not kept, the subcomplexes need the components
+        if self.compositions is not None:
+            self.compositions[pdb_complex_id] = frozenset(
+                get_component_key(
+                    param_name,
+                    dict(
+                        zip(
+                            RELATIONSHIP_COLUMNS[param_name],
+                            (pdb_complex_id,) + values,
+                        )
+                    ),
+                )
+                for param_name, values in prepared_mapping.components
+            )
+        for uniq_assembly in prepared_mapping.uniq_assemblies:
             self._process_uniq_assembly(pdb_complex_id, uniq_assembly)
 
-    def _use_persistent_identifier(
-        self, hash_str, accession, complex_portal_id, entries
-    ):
-        """
-        This method generates a new PDB complex ID if the complex composition
-        is new and not present in reference_mapping. On the other hand, if it's
-        an existing complex composition then the existing ID is returned
-
-        Args:
-            hash_str (hash): md5 hash obj of complex composition
-            accession (string): complex composition string
-            complex_portal_id (string): Complex Portal identifier
-            entries (string): assemblies
-
-        Returns:
-            string: PDB Complex ID
-        """
-        pdb_complex_id = ""
-        basic_PDB_complex_str = "PDB-CPX-"
-        initial_num = 100001
-        if hash_str in self.reference_mapping:
-            pdb_complex_id = self.reference_mapping.get(hash_str).get("pdb_complex_id")
-            self.reference_mapping[hash_str]["entries"] = entries
+    def _record_identifier(self, accession, pdb_complex_id, allocated):
+        if allocated:
+            self.new_complexes_dict[accession] = pdb_complex_id
+        else:
             self.existing_complexes_dict[accession] = pdb_complex_id
-        # when the dict is empty
-        elif len(self.reference_mapping) == 0:
-            pdb_complex_id = basic_PDB_complex_str + str(initial_num)
-            self.reference_mapping[hash_str] = {
-                "pdb_complex_id": pdb_complex_id,
-                "complex_portal_id": complex_portal_id,
-                "accession": accession,
-                "entries": entries,
-            }
-        # when the dict has one or more elems
-        elif len(self.reference_mapping) >= 1:
-            last_dict_key = next(reversed(self.reference_mapping))
-            last_pdb_complex_id = self.reference_mapping[last_dict_key][
-                "pdb_complex_id"
-            ]
-            _, _, last_pdb_complex_id_num = last_pdb_complex_id.split("-")
-            current_num = int(last_pdb_complex_id_num) + 1
-            pdb_complex_id = basic_PDB_complex_str + str(current_num)
-            self.reference_mapping[hash_str] = {
-                "pdb_complex_id": pdb_complex_id,
-                "complex_portal_id": complex_portal_id,
-                "accession": accession,
-                "entries": entries,
-            }
-        return pdb_complex_id
+
+    def _add_planned_changes(self):
+        write_plan.add("allocate", "PDB complex ID", len(self.new_complexes_dict))
+        # the relationship queries MERGE the PDBComplex nodes
+        num_created = len(self.dict_pdb_complex)
+        if self.updater is not None:
+            num_created = len(self.updater.added)
+        write_plan.add("create", "PDBComplex node", num_created)
 
     def _process_uniq_assembly(self, pdb_complex_id, uniq_assembly):
         [entry, _] = uniq_assembly.split("_")
-        self.assembly_params_list.append(
-            {
-                "complex_id": str(pdb_complex_id),
-                "assembly_id": str(uniq_assembly),
-                "entry_id": str(entry),
-            }
+        self._append_params(
+            "assembly_params_list", pdb_complex_id, uniq_assembly, entry
         )
 
-    def _process_uniq_accession(self, pdb_complex_id, uniq_accession):
-        tokens = uniq_accession.split("_")
-        # handle cases of PDB entity
-        if len(tokens) == 4:
-            [_, entry_id, entity_id, stoichiometry] = tokens
-            self.entity_params_list.append(
-                {
-                    "complex_id": str(pdb_complex_id),
-                    "entry_id": str(entry_id),
-                    "entity_id": str(entity_id),
-                    "stoichiometry": str(stoichiometry),
-                }
-            )
-
-        # handle cases of UniProt
-        elif len(tokens) == 3:
-            [accession, stoichiometry, tax_id] = tokens
-            self.accession_params_list.append(
-                {
-                    "complex_id": str(pdb_complex_id),
-                    "accession": str(accession),
-                    "stoichiometry": str(stoichiometry),
-                }
-            )
-
-        # handle unmapped polymers and Rfam accessions
-        elif len(tokens) == 1:
-            token = tokens[0]
-
-            # check for unmapped polymers (:UNMAPPED string)
-            if ":UNMAPPED" in token:
-                polymer_type = token.replace(":UNMAPPED", "")
-                self.unmapped_polymer_params_list.append(
-                    {
-                        "complex_id": str(pdb_complex_id),
-                        "polymer_type": str(polymer_type),
-                    }
-                )
-
-            # handle Rfam
-            else:
-                self.rfam_params_list.append(
-                    {
-                        "complex_id": str(pdb_complex_id),
-                        "rfam_acc": str(token),
-                    }
-                )
+    def _append_params(self, param_name, *values):
+        if self.relationship_stream is not None:
+            self.relationship_stream.append(param_name, *values)
+        else:
+            getattr(self, param_name).append(*values)
 
     def _update_complex_params_list(self, common_complex):
-        (pdb_complex_id, complex_portal_id) = common_complex
+        pdb_complex_id, complex_portal_id = common_complex
         self.complex_params_list.append(
             {
                 "pdb_complex_id": str(pdb_complex_id),
@@ -334,7 +418,7 @@ class Neo4JProcessComplex:
         logger.info(f"The updated complex strings are: {updated_complex_strings}")
         self.update_reference_mapping(updated_complex_strings)
 
-    def post_processing(self):
+    def post_processing(self, journal=None):
         """
         1. Create relationships between complexes related nodes in the
         graph db - Uniprot, PDBComplex, Entity, Rfam, Unmapped
@@ -343,51 +427,243 @@ class Neo4JProcessComplex:
         2. Drop existing subcomplex relationships
 
         3. Create new subcomplex relationships
+
+        Args:
+            journal (WriteJournal, optional): records the committed batches and
+                                              skips the ones committed by the
+                                              run being resumed. Defaults to None.
+        """
+        self.ndo.batch_writer.journal = journal
+        try:
+            self._create_relationships(
+                self._get_params_lists(), self.complex_params_list
+            )
+
+            if journal is None or not journal.is_done("subcomplex_deletion"):
+                logger.info("Dropping existing subcomplex relationships if any")
+                self.ndo.batch_writer.delete(
+                    qy.DROP_SUBCOMPLEX_RELATION_QUERY,
+                    qy.COUNT_SUBCOMPLEX_RELATION_QUERY,
+                    "IS_SUB_COMPLEX_OF deletion",
+                )
+                if journal is not None:
+                    journal.mark_done("subcomplex_deletion")
+
+            self._create_subcomplex_relationships()
+        finally:
+            self.ndo.batch_writer.journal = None
+        if journal is not None:
+            journal.clear()
+
+    def stream_processing(self):
+        """
+        Processes the PDB assembly data while writing the relationships of
+        the processed complexes to the graph db. The assembly data is read
+        lazily and every full batch of relationship params is written by a
+        writer thread, so reads and writes overlap and only a bounded number
+        of batches is held in memory. Only the composition of each complex is
+        kept for the subcomplex relationships, which are written at the end
         """
+        logger.info("Start streaming PDB complex relationships")
+        relationship_stream = RelationshipStream(
+            self.ndo, RELATIONSHIP_QUERIES, stream_max_pending_batches
+        )
+        self.relationship_stream = relationship_stream
+        self.compositions = {}
+        try:
+            self.process_assembly_data()
+        except BaseException:
+            relationship_stream.abort()
+            raise
+        finally:
+            self.relationship_stream = None
+        relationship_stream.close()
+        logger.info("Done streaming PDB complex relationships")
+
+        self.ndo._create_nodes_relationship(
+            qy.COMMON_COMPLEX_QUERY,
+            "PDBComplex",
+            "Complex",
+            "complex_params_list",
+            self.complex_params_list,
+        )
+        logger.info("Dropping existing subcomplex relationships if any")
+        self.ndo.batch_writer.delete(
+            qy.DROP_SUBCOMPLEX_RELATION_QUERY,
+            qy.COUNT_SUBCOMPLEX_RELATION_QUERY,
+            "IS_SUB_COMPLEX_OF deletion",
+        )
+        self._create_subcomplex_relationships()
+
+    def _get_journal_params(self):
+        return {
+            "params_lists": {
+                param_name: params_list.to_columns()
+                for param_name, params_list in self._get_params_lists().items()
+            },
+            "complex_params_list": self.complex_params_list,
+            "reference_mapping": OrderedDict(self.reference_mapping.items()),
+        }
+
+    def _set_journal_params(self, params):
+        for param_name, columns in params["params_lists"].items():
+            setattr(self, param_name, RelationshipBuffer.from_columns(columns))
+        self.complex_params_list = params["complex_params_list"]
+        self.reference_mapping.load(
+            dict(row, md5_obj=hash_str)
+            for hash_str, row in params["reference_mapping"].items()
+        )
+
+    def bulk_import_post_processing(self):
+        """
+        Writes the relationships of the PDBComplex nodes with Uniprot, Entity,
+        Rfam, Unmapped Polymer, Assembly and Complex nodes and the subcomplex
+        relationships as LOAD CSV files instead of running Cypher, together
+        with the cypher-shell script loading them into the graph db
+
+        Returns:
+            str: path of the load script
+        """
+        logger.info(f"Start writing bulk import files to {self.bulk_import_path}")
+        params_lists = self._get_params_lists()
+        writer = BulkImportWriter(self.bulk_import_path)
+        writer.write_relationships(
+            params_lists,
+            self.complex_params_list,
+            find_subcomplexes(get_compositions(params_lists)),
+        )
+        script_path = writer.write_load_script()
+        logger.info(
+            "Done writing bulk import files, copy them to the import dir of the "
+            f"graph db and load them with cypher-shell --file {script_path}"
+        )
+        return script_path
+
+    def incremental_post_processing(self):
+        """
+        Writes only the differences between the computed complexes and the
+        PDBComplex nodes already in the graph db
+
+        1. Delete PDBComplex nodes that no longer exist
+
+        2. Delete relationships that no longer exist
+
+        3. Create the missing relationships
+
+        4. Recompute subcomplex relationships of complexes with new components
+        """
+        updater = IncrementalUpdate(self.ndo)
+        self.updater = updater
+        updater.get_existing_complexes()
+        (
+            new_params_lists,
+            stale_component_params_list,
+            stale_complex_params_list,
+        ) = updater.compare(self._get_params_lists(), self.complex_params_list)
+
+        logger.info("Start deleting stale PDBComplex nodes and relationships")
+        self.ndo.batch_writer.write(
+            qy.DELETE_PDB_COMPLEXES_QUERY,
+            "pdb_complex_ids",
+            [{"complex_id": complex_id} for complex_id in sorted(updater.removed)],
+            "PDBComplex deletion",
+        )
+        self.ndo.batch_writer.write(
+            qy.DELETE_COMPONENT_RELATION_QUERY,
+            "stale_component_params_list",
+            stale_component_params_list,
+            "IS_PART_OF_PDB_COMPLEX deletion",
+        )
+        self.ndo.batch_writer.write(
+            qy.DELETE_SAME_AS_RELATION_QUERY,
+            "stale_complex_params_list",
+            stale_complex_params_list,
+            "SAME_AS deletion",
+        )
+        logger.info("Done deleting stale PDBComplex nodes and relationships")
+
+        complex_params_list = new_params_lists.pop("complex_params_list")
+        self._create_relationships(new_params_lists, complex_params_list)
+
+        recomposed_complex_ids = updater.get_recomposed_complex_ids()
+        if recomposed_complex_ids:
+            logger.info(
+                f"Start updating subcomplex relationships of "
+                f"{len(recomposed_complex_ids)} complexes"
+            )
+            if write_plan.enabled:
+                write_plan.add(
+                    "recompute",
+                    "IS_SUB_COMPLEX_OF relationships of PDBComplex",
+                    len(recomposed_complex_ids),
+                )
+            else:
+                self.ndo.run_query(
+                    qy.DROP_SUBCOMPLEX_RELATION_FOR_COMPLEXES_QUERY,
+                    param={"pdb_complex_ids": recomposed_complex_ids},
+                )
+            self._create_subcomplex_relationships(recomposed_complex_ids)
+            logger.info("Done updating subcomplex relationships")
+
+    def _create_subcomplex_relationships(self, pdb_complex_ids=None):
+        """
+        Finds the sub-complexes from the compositions of the processed
+        complexes and writes the IS_SUB_COMPLEX_OF relationships in batches
+
+        Args:
+            pdb_complex_ids (list, optional): only write relationships involving
+                                              these complexes. Defaults to None.
+        """
+        logger.info("Start creating subcomplex relationships")
+        compositions = self.compositions
+        if compositions is None:
+            compositions = get_compositions(self._get_params_lists())
+        pairs = find_subcomplexes(compositions)
+        if pdb_complex_ids is not None:
+            selected = set(pdb_complex_ids)
+            pairs = [
+                (src_complex_id, dest_complex_id)
+                for src_complex_id, dest_complex_id in pairs
+                if src_complex_id in selected or dest_complex_id in selected
+            ]
+        if self.verify_subcomplexes:
+            verify_subcomplexes(self.ndo, pairs, pdb_complex_ids)
+
+        self.ndo._create_nodes_relationship(
+            qy.MERGE_SUBCOMPLEX_QUERY,
+            "PDBComplex",
+            "PDBComplex",
+            "subcomplex_params_list",
+            [
+                {"src_complex_id": src_complex_id, "dest_complex_id": dest_complex_id}
+                for src_complex_id, dest_complex_id in pairs
+            ],
+        )
+        logger.info("Done creating subcomplex relationships")
+
+    def _get_params_lists(self):
+        return {
+            "accession_params_list": self.accession_params_list,
+            "entity_params_list": self.entity_params_list,
+            "unmapped_polymer_params_list": self.unmapped_polymer_params_list,
+            "rfam_params_list": self.rfam_params_list,
+            "assembly_params_list": self.assembly_params_list,
+        }
+
+    def _create_relationships(self, params_lists, complex_params_list):
         query_parameters = [
-            (
-                qy.MERGE_ACCESSION_QUERY,
-                "Uniprot",
-                "PDBComplex",
-                "accession_params_list",
-                self.accession_params_list,
-            ),
-            (
-                qy.MERGE_ENTITY_QUERY,
-                "Entity",
-                "PDBComplex",
-                "entity_params_list",
-                self.entity_params_list,
-            ),
-            (
-                qy.MERGE_UNMAPPED_POLYMER_QUERY,
-                "UnmappedPolymer",
-                "PDBComplex",
-                "unmapped_polymer_params_list",
-                self.unmapped_polymer_params_list,
-            ),
-            (
-                qy.MERGE_RFAM_QUERY,
-                "Rfam",
-                "PDBComplex",
-                "rfam_params_list",
-                self.rfam_params_list,
-            ),
-            (
-                qy.MERGE_ASSEMBLY_QUERY,
-                "Assembly",
-                "PDBComplex",
-                "assembly_params_list",
-                self.assembly_params_list,
-            ),
+            (query, n1_name, n2_name, param_name, params_lists[param_name])
+            for param_name, (query, n1_name, n2_name) in RELATIONSHIP_QUERIES.items()
+        ]
+        query_parameters.append(
             (
                 qy.COMMON_COMPLEX_QUERY,
                 "PDBComplex",
                 "Complex",
                 "complex_params_list",
-                self.complex_params_list,
-            ),
-        ]
+                complex_params_list,
+            )
+        )
 
         logger.info("Start creating relationships betweeen nodes")
         for params in query_parameters:
@@ -395,10 +671,3 @@ class Neo4JProcessComplex:
                 params[0], params[1], params[2], params[3], params[4]
             )
         logger.info("Done creating relationships between nodes")
-
-        logger.info("Dropping existing subcomplex relationships if any")
-        self.ndo.run_query(qy.DROP_SUBCOMPLEX_RELATION_QUERY)
-
-        logger.info("Start creating subcomplex relationships")
-        self.ndo.run_query(qy.CREATE_SUBCOMPLEX_RELATION_QUERY)
-        logger.info("Done creating subcomplex relationships")
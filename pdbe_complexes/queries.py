@@ -13,6 +13,12 @@ MATCH (p:PDBComplex {COMPLEX_ID:row.pdb_complex_id})
 SET p.COMPLEX_NAME = row.complex_name
 """
 
+LOAD_COMPLEX_NAMES_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+MATCH (p:PDBComplex {COMPLEX_ID:row.pdb_complex_id})
+SET p.COMPLEX_NAME = row.complex_name
+"""
+
 MERGE_ENTITY_QUERY = """
 WITH $entity_params_list AS batch
 UNWIND batch AS row
@@ -68,15 +74,10 @@ WITH
     complex_id AS complex_id,
     COLLECT(DISTINCT uniq_accessions) AS uniq_accessions,
     entries
-WITH
-    complex_id AS complex_id,
-    REDUCE(s = HEAD(uniq_accessions),
-    n in TAIL(uniq_accessions) | s +',' +n) AS uniq_accessions,
-    entries
 RETURN
     complex_id,
     uniq_accessions,
-    REDUCE(s = HEAD(entries), n in TAIL(entries) | s +',' +n) AS entries_str
+    entries
 """
 
 PDB_ASSEMBLY_DATA_QUERY = """
@@ -109,35 +110,89 @@ CASE uniprot
     ELSE uniprot.ACCESSION +'_' +rel.NUMBER_OF_CHAINS +'_' +tax.TAX_ID
 END AS accession ORDER BY accession
 WITH assembly_id AS assembly_id, COLLECT (DISTINCT accession) AS accessions
-WITH assembly_id AS assembly_id, REDUCE(s = HEAD(accessions),
-n in TAIL(accessions) | s +',' +n) AS accessions
+ORDER BY assembly_id
 WITH accessions, COLLECT(DISTINCT assembly_id) AS assemblies
-WITH accessions AS accessions, REDUCE(s = HEAD(assemblies),
-n in TAIL(assemblies) | s +',' +n) AS assemblies
-RETURN accessions, assemblies
+RETURN accessions, assemblies ORDER BY accessions
+"""
+
+# per-assembly compositions of the preferred assemblies of the entries whose
+# ID ends in one of $shard_keys, grouped in Python by the sharded fetch
+PDB_ASSEMBLY_COMPOSITION_QUERY = """
+MATCH (assembly:Assembly {PREFERED: 'True'})
+WHERE right(split(assembly.UNIQID, '_')[0], 1) IN $shard_keys
+MATCH (assembly)<-[rel:IS_PART_OF_ASSEMBLY]-(entity:Entity {TYPE:'p'})
+OPTIONAL MATCH (entity)-[:HAS_UNIPROT {BEST_MAPPING:'1'}]->(uniprot:UniProt)
+-[:HAS_TAXONOMY]->(tax:Taxonomy)
+OPTIONAL MATCH (entity)-[:HAS_RFAM]->(rfam:RfamFamily)
+WITH assembly.UNIQID AS assembly_id,
+CASE uniprot
+    WHEN null
+        THEN
+            CASE rfam
+                WHEN null
+                    THEN
+                        CASE entity.POLYMER_TYPE
+                            WHEN 'R'
+                                THEN 'RNA' +':UNMAPPED'
+                            WHEN 'D'
+                                THEN 'DNA' +':UNMAPPED'
+                            WHEN 'D/R'
+                                THEN 'DNA/RNA' +':UNMAPPED'
+                            WHEN 'P'
+                                THEN 'NA_' +entity.UNIQID +'_' +rel.NUMBER_OF_CHAINS
+                        END
+                ELSE
+                    rfam.RFAM_ACC
+            END
+    ELSE uniprot.ACCESSION +'_' +rel.NUMBER_OF_CHAINS +'_' +tax.TAX_ID
+END AS accession ORDER BY accession
+RETURN assembly_id, COLLECT (DISTINCT accession) AS accessions
 """
 
 DROP_PDB_COMPLEX_NODES_QUERY = """
-MATCH (p:PDBComplex) DETACH DELETE p
+MATCH (p:PDBComplex)
+WITH p LIMIT $batch_size
+DETACH DELETE p
+RETURN count(*) AS deleted
+"""
+
+COUNT_PDB_COMPLEX_NODES_QUERY = """
+MATCH (p:PDBComplex) RETURN count(p) AS total
 """
 
 DROP_SUBCOMPLEX_RELATION_QUERY = """
-MATCH (:PDBComplex)-[r:IS_SUB_COMPLEX_OF]->(:PDBComplex) DELETE r
+MATCH (:PDBComplex)-[r:IS_SUB_COMPLEX_OF]->(:PDBComplex)
+WITH r LIMIT $batch_size
+DELETE r
+RETURN count(*) AS deleted
+"""
+
+COUNT_SUBCOMPLEX_RELATION_QUERY = """
+MATCH (:PDBComplex)-[r:IS_SUB_COMPLEX_OF]->(:PDBComplex) RETURN count(r) AS total
 """
 
-CREATE_SUBCOMPLEX_RELATION_QUERY = """
+SUBCOMPLEX_QUERY = """
 MATCH
-(src_complex:PDBComplex)<-[rel1:IS_PART_OF_PDB_COMPLEX]-()-
+(src_complex:PDBComplex)<-[rel1:IS_PART_OF_PDB_COMPLEX]-(component)-
 [rel2:IS_PART_OF_PDB_COMPLEX]->(dest_complex:PDBComplex)
-WHERE rel1.STOICHIOMETRY=rel2.STOICHIOMETRY
-    WITH DISTINCT src_complex, dest_complex, rel1
-    WITH src_complex, startNode(rel1) AS relRelations, dest_complex
-    WITH src_complex, COUNT(relRelations) AS relRelationsAmount, dest_complex
-    MATCH (src_complex)<-[allRelations:IS_PART_OF_PDB_COMPLEX]-()
+WHERE NOT component:Assembly
+    AND COALESCE(rel1.STOICHIOMETRY, '')=COALESCE(rel2.STOICHIOMETRY, '')
+    WITH src_complex, COUNT(DISTINCT component) AS relRelationsAmount, dest_complex
+    MATCH (src_complex)<-[allRelations:IS_PART_OF_PDB_COMPLEX]-(other)
+    WHERE NOT other:Assembly
         WITH src_complex, relRelationsAmount, count(allRelations) AS allRelationsAmount,
             dest_complex
                 WHERE relRelationsAmount = allRelationsAmount
-CREATE (dest_complex)<-[:IS_SUB_COMPLEX_OF]-(src_complex)
+RETURN src_complex.COMPLEX_ID AS src_complex_id,
+dest_complex.COMPLEX_ID AS dest_complex_id
+"""
+
+MERGE_SUBCOMPLEX_QUERY = """
+WITH $subcomplex_params_list AS batch
+UNWIND batch AS row
+MATCH (src_complex:PDBComplex {COMPLEX_ID:row.src_complex_id})
+MATCH (dest_complex:PDBComplex {COMPLEX_ID:row.dest_complex_id})
+MERGE (dest_complex)<-[:IS_SUB_COMPLEX_OF]-(src_complex)
 """
 
 PDB_COMPLEX_QUERY = """
@@ -169,23 +224,218 @@ rfam_accession, polymer_type, taxonomy, entry_assembly, entity, antibody,
 entity_length
 """
 
+# one record per complex with its assemblies and a map per other component,
+# holding the same properties as the PDB_COMPLEX_QUERY rows
+PDB_COMPLEX_GROUPED_QUERY = """
+MATCH (pdb_complex:PDBComplex)<-[rel:IS_PART_OF_PDB_COMPLEX]-(component)
+OPTIONAL MATCH (component)-[:HAS_TAXONOMY]->(tax:Taxonomy)
+OPTIONAL MATCH (component)-[:HAS_ANTIBODY_MAPPING]->(ab:Antibody)
+WITH pdb_complex.COMPLEX_ID AS complex_id,
+COLLECT(CASE WHEN component:Assembly THEN component.UNIQID END) AS assemblies,
+COLLECT(CASE WHEN NOT component:Assembly THEN {
+    component_db: labels(component),
+    component_type: component.TYPE,
+    stoichiometry: rel.STOICHIOMETRY,
+    accession: component.ACCESSION,
+    rfam_accession: component.RFAM_ACC,
+    polymer_type: component.POLYMER_TYPE,
+    entity_length: component.NUMBER_POLY_SEQ,
+    taxonomy: tax.TAX_ID,
+    antibody: CASE ab.ID WHEN '1' THEN True ELSE False END,
+    entity: component.UNIQID
+} END) AS components
+RETURN complex_id, assemblies, components
+"""
+
 ENTITY_QUERY = """
-MATCH (e:Entity)
-WITH e.UNIQID AS entity_uniqid,
-    e.DESCRIPTION AS description
-RETURN entity_uniqid, description
+UNWIND $entity_uniqids AS entity_uniqid
+MATCH (e:Entity {UNIQID:entity_uniqid})
+RETURN e.UNIQID AS entity_uniqid, e.DESCRIPTION AS description
 """
 
 UNIPROT_QUERY = """
-MATCH (u:UniProt)
-WITH u.ACCESSION AS accession,
-    u.DESCR AS description
-RETURN accession, description
+UNWIND $accessions AS accession
+MATCH (u:UniProt {ACCESSION:accession})
+RETURN u.ACCESSION AS accession, u.DESCR AS description
 """
 
 RFAM_QUERY = """
-MATCH (u:RfamFamily)
-WITH u.RFAM_ACC AS accession,
-    u.DESCRIPTION AS description
-RETURN accession, description
+UNWIND $accessions AS accession
+MATCH (u:RfamFamily {RFAM_ACC:accession})
+RETURN u.RFAM_ACC AS accession, u.DESCRIPTION AS description
+"""
+
+# schema statements are not named *_QUERY as they are not run under PROFILE
+SHOW_INDEXES_STATEMENT = """
+SHOW INDEXES
+"""
+
+CREATE_INDEX_STATEMENT = """
+CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{property})
+"""
+
+CREATE_UNIQUE_CONSTRAINT_STATEMENT = """
+CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{property} IS UNIQUE
+"""
+
+AWAIT_INDEXES_STATEMENT = """
+CALL db.awaitIndexes($timeout)
+"""
+
+PDB_COMPLEX_RELATIONSHIPS_QUERY = """
+MATCH (c:PDBComplex)
+OPTIONAL MATCH (c)<-[rel:IS_PART_OF_PDB_COMPLEX]-(component)
+WITH c, COLLECT(
+    CASE
+        WHEN component:UniProt THEN ['UniProt', component.ACCESSION]
+        WHEN component:Entity THEN ['Entity', component.UNIQID]
+        WHEN component:RfamFamily THEN ['RfamFamily', component.RFAM_ACC]
+        WHEN component:UnmappedPolymer THEN ['UnmappedPolymer', component.TYPE]
+        WHEN component:Assembly THEN ['Assembly', component.UNIQID]
+    END + [rel.STOICHIOMETRY]
+) AS components
+OPTIONAL MATCH (c)-[:SAME_AS]->(complex:Complex)
+RETURN
+    c.COMPLEX_ID AS complex_id,
+    components,
+    COLLECT(complex.COMPLEX_ID) AS complex_portal_ids
+"""
+
+PDB_COMPLEX_NAME_QUERY = """
+MATCH (c:PDBComplex)
+RETURN c.COMPLEX_ID AS complex_id, c.COMPLEX_NAME AS complex_name
+"""
+
+DELETE_PDB_COMPLEXES_QUERY = """
+WITH $pdb_complex_ids AS batch
+UNWIND batch AS row
+MATCH (c:PDBComplex {COMPLEX_ID:row.complex_id})
+DETACH DELETE c
+"""
+
+DELETE_COMPONENT_RELATION_QUERY = """
+WITH $stale_component_params_list AS batch
+UNWIND batch AS row
+MATCH (c:PDBComplex {COMPLEX_ID:row.complex_id})<-[rel:IS_PART_OF_PDB_COMPLEX]-(component)
+WHERE row.label IN labels(component)
+    AND COALESCE(rel.STOICHIOMETRY, '') = row.stoichiometry
+    AND CASE row.label
+        WHEN 'UniProt' THEN component.ACCESSION
+        WHEN 'Entity' THEN component.UNIQID
+        WHEN 'RfamFamily' THEN component.RFAM_ACC
+        WHEN 'UnmappedPolymer' THEN component.TYPE
+        WHEN 'Assembly' THEN component.UNIQID
+    END = row.key
+DELETE rel
+"""
+
+DELETE_SAME_AS_RELATION_QUERY = """
+WITH $stale_complex_params_list AS batch
+UNWIND batch AS row
+MATCH (:PDBComplex {COMPLEX_ID:row.pdb_complex_id})-[rel:SAME_AS]->
+    (:Complex {COMPLEX_ID:row.complex_portal_id})
+DELETE rel
+"""
+
+DROP_SUBCOMPLEX_RELATION_FOR_COMPLEXES_QUERY = """
+MATCH (c:PDBComplex)-[r:IS_SUB_COMPLEX_OF]-(:PDBComplex)
+WHERE c.COMPLEX_ID IN $pdb_complex_ids
+DELETE r
+"""
+
+NODE_COUNT_STATEMENT = """
+MATCH (n) RETURN count(n)
+"""
+
+RELATIONSHIP_COUNT_STATEMENT = """
+MATCH ()-[r]->() RETURN count(r)
+"""
+
+LAST_COMMITTED_TX_STATEMENT = """
+CALL dbms.queryJmx("org.neo4j:name=Transactions,*") YIELD name, attributes
+WITH name, attributes.LastCommittedTxId.value AS last_committed_tx_id
+ORDER BY name
+RETURN collect(name + "=" + toString(last_committed_tx_id)) AS last_committed_tx_ids
+"""
+
+# the bulk import files are loaded into the graph db in implicit
+# transactions, e.g. with cypher-shell, in batches of rows
+DELETE_ALL_PDB_COMPLEXES_QUERY = """
+MATCH (c:PDBComplex)
+CALL {
+    WITH c
+    DETACH DELETE c
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_ACCESSION_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH (u:UniProt {ACCESSION:row.accession})
+    MERGE (c:PDBComplex {COMPLEX_ID:row.complex_id})
+    MERGE (c)<-[:IS_PART_OF_PDB_COMPLEX {STOICHIOMETRY:row.stoichiometry}]-(u)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_ENTITY_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH (e:Entry {ID:row.entry_id})-[:HAS_ENTITY]->(en:Entity {ID:row.entity_id})
+    MERGE (c:PDBComplex {COMPLEX_ID:row.complex_id})
+    MERGE (c)<-[:IS_PART_OF_PDB_COMPLEX {STOICHIOMETRY:row.stoichiometry}]-(en)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_ASSEMBLY_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH (e:Entry {ID:row.entry_id})-[:HAS_ENTITY]->(:Entity)-
+        [:IS_PART_OF_ASSEMBLY]->(assembly:Assembly {UNIQID:row.assembly_id})
+    MERGE (c:PDBComplex {COMPLEX_ID:row.complex_id})
+    MERGE (c)<-[:IS_PART_OF_PDB_COMPLEX]-(assembly)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_RFAM_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH (rfam:RfamFamily {RFAM_ACC:row.rfam_acc})
+    MERGE (c:PDBComplex {COMPLEX_ID:row.complex_id})
+    MERGE (c)<-[:IS_PART_OF_PDB_COMPLEX]-(rfam)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_UNMAPPED_POLYMER_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MERGE (up:UnmappedPolymer {TYPE:row.polymer_type})
+    MERGE (c:PDBComplex {COMPLEX_ID:row.complex_id})
+    MERGE (c)<-[:IS_PART_OF_PDB_COMPLEX]-(up)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_COMMON_COMPLEX_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH
+        (p:PDBComplex {COMPLEX_ID:row.pdb_complex_id}),
+        (c:Complex {COMPLEX_ID:row.complex_portal_id})
+    CREATE (p)-[:SAME_AS]->(c)
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+LOAD_SUBCOMPLEX_QUERY = """
+LOAD CSV WITH HEADERS FROM $file_url AS row
+CALL {
+    WITH row
+    MATCH (src_complex:PDBComplex {COMPLEX_ID:row.src_complex_id})
+    MATCH (dest_complex:PDBComplex {COMPLEX_ID:row.dest_complex_id})
+    MERGE (dest_complex)<-[:IS_SUB_COMPLEX_OF]-(src_complex)
+} IN TRANSACTIONS OF 10000 ROWS
 """
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+
+# last character of a PDB entry ID
+SHARD_KEYS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def get_shard_keys(num_shards):
+    """
+    Splits the entry ID characters into num_shards shards. The last character
+    of an entry ID is spread evenly over the archive and never changes, so an
+    assembly is always read by the same shard
+
+    Args:
+        num_shards (int): number of shards, between 1 and 36
+
+    Returns:
+        list of list: entry ID characters of each shard
+    """
+    if not 1 <= num_shards <= len(SHARD_KEYS):
+        raise ValueError(
+            f"The number of assembly shards must be between 1 and {len(SHARD_KEYS)}"
+        )
+    return [list(SHARD_KEYS[i::num_shards]) for i in range(num_shards)]
+
+
+def get_sharded_assembly_data(ndo, num_shards):
+    """
+    Reads the compositions of the preferred assemblies in num_shards
+    concurrent PDB_ASSEMBLY_COMPOSITION_QUERY shards and groups the
+    assemblies by composition, as PDB_ASSEMBLY_DATA_QUERY does on the server
+
+    Args:
+        ndo (Neo4jDatabaseOperations): graph db operations object
+        num_shards (int): number of shards
+
+    Returns:
+        list of dict: accessions and assemblies of each unique composition,
+        in the order of PDB_ASSEMBLY_DATA_QUERY: by accessions, with the
+        assemblies of each composition sorted
+    """
+    start = time.perf_counter()
+    shard_keys = get_shard_keys(num_shards)
+    with ThreadPoolExecutor(max_workers=num_shards) as executor:
+        shards = executor.map(lambda keys: _get_shard(ndo, keys), shard_keys)
+        assemblies_per_accessions = {}
+        for shard in shards:
+            for assembly_id, accessions in shard:
+                assemblies_per_accessions.setdefault(tuple(accessions), []).append(
+                    assembly_id
+                )
+
+    logger.info(
+        f"Read {len(assemblies_per_accessions)} assembly compositions in "
+        f"{num_shards} shards ({time.perf_counter() - start:.1f}s)"
+    )
+    return [
+        {"accessions": list(accessions), "assemblies": sorted(assemblies)}
+        for accessions, assemblies in sorted(assemblies_per_accessions.items())
+    ]
+
+
+def _get_shard(ndo, keys):
+    mappings = ndo.run_query(
+        qy.PDB_ASSEMBLY_COMPOSITION_QUERY,
+        param={"shard_keys": keys},
+        stream=True,
+        cached=True,
+    )
+    return [(row.get("assembly_id"), row.get("accessions")) for row in mappings]
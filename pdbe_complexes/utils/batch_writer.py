@@ -0,0 +1,211 @@
+import time
+
+from py2neo.errors import (
+    ConnectionBroken,
+    ConnectionLimit,
+    ConnectionUnavailable,
+    Neo4jError,
+    ServiceUnavailable,
+)
+
+from pdbe_complexes.constants import (
+    neo4j_batch_size,
+    neo4j_delete_batch_size,
+    neo4j_max_retries,
+    neo4j_min_batch_size,
+    neo4j_retry_delay,
+)
+from pdbe_complexes.log import logger
+from pdbe_complexes.utils.query_cache import query_cache
+from pdbe_complexes.utils.write_plan import write_plan
+
+RETRYABLE_ERRORS = (
+    ConnectionBroken,
+    ConnectionLimit,
+    ConnectionUnavailable,
+    ServiceUnavailable,
+    Neo4jError,
+)
+
+
+class BatchWriter:
+    """
+    This class writes the rows of an UNWIND batch query to the graph db in
+    size-bounded chunks, each one committed in its own transaction
+    """
+
+    def __init__(
+        self,
+        ndo,
+        batch_size=neo4j_batch_size,
+        min_batch_size=neo4j_min_batch_size,
+        max_retries=neo4j_max_retries,
+        retry_delay=neo4j_retry_delay,
+        delete_batch_size=neo4j_delete_batch_size,
+    ):
+        self.ndo = ndo
+        self.batch_size = batch_size
+        self.delete_batch_size = delete_batch_size
+        self.min_batch_size = min(min_batch_size, batch_size)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # WriteJournal recording the committed chunks, if any
+        self.journal = None
+        # number of times a write statement has been sent, committed or not
+        self.num_attempts = 0
+
+    def write(self, query, param_name, rows, description=""):
+        """
+        Splits the rows into chunks and runs the query once per chunk.
+        Transient errors are retried per chunk and the chunk size is halved
+        whenever the server runs out of transaction memory. With a journal,
+        every committed chunk is recorded and the rows already committed by
+        an earlier run are skipped. In a dry run the write is only recorded
+
+        Args:
+            query (str): Neo4j query reading the rows from $param_name
+            param_name (str): parameter name
+            rows (list of dict): query parameter rows
+            description (str, optional): label used when logging progress
+
+        Returns:
+            dict: number of rows and chunks written, elapsed seconds and rows/s
+        """
+        if write_plan.enabled:
+            return write_plan.record_write(
+                param_name, rows, self.batch_size, description
+            )
+        total = len(rows)
+        chunk_size = self.batch_size
+        offset = self.journal.get_offset(param_name) if self.journal else 0
+        resumed_from = offset
+        if resumed_from:
+            logger.info(f"{description}: {offset}/{total} rows already committed")
+        num_chunks = 0
+        fingerprint = query_cache.get_write_fingerprint(self.ndo, query)
+        num_attempts = self.num_attempts
+        start = time.perf_counter()
+        while offset < total:
+            chunk = rows[offset : offset + chunk_size]
+            try:
+                self._run_with_retries(query, {param_name: chunk})
+            except Neo4jError as error:
+                if not self._is_memory_error(error):
+                    raise
+                if chunk_size <= self.min_batch_size:
+                    raise
+                chunk_size = max(self.min_batch_size, chunk_size // 2)
+                logger.warning(
+                    f"{description}: out of transaction memory, "
+                    f"reducing chunk size to {chunk_size}"
+                )
+                continue
+            offset += len(chunk)
+            num_chunks += 1
+            if self.journal:
+                self.journal.commit(param_name, offset)
+            logger.debug(f"{description}: committed {offset}/{total} rows")
+
+        query_cache.record_write(
+            self.ndo, query, fingerprint, self.num_attempts - num_attempts
+        )
+        written = offset - resumed_from
+        elapsed = time.perf_counter() - start
+        rate = written / elapsed if elapsed > 0 else 0
+        logger.info(
+            f"{description}: wrote {written} rows in {num_chunks} chunks, "
+            f"{elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
+        return {
+            "rows": written,
+            "chunks": num_chunks,
+            "seconds": elapsed,
+            "rows_per_second": rate,
+        }
+
+    def delete(self, query, count_query=None, description=""):
+        """
+        Runs a deletion query reading its LIMIT from $batch_size and returning
+        the number of deleted items as "deleted" until nothing is left. Every
+        batch is committed in its own transaction, so an interrupted deletion
+        resumes where it stopped when it is run again
+
+        Args:
+            query (str): Neo4j deletion query
+            count_query (str, optional): Neo4j query returning the number of
+                                         items left to delete as "total"
+            description (str, optional): label used when logging progress
+
+        Returns:
+            dict: number of items and batches deleted, elapsed seconds
+        """
+        total = self.ndo.run_query(count_query).evaluate() if count_query else None
+        if total is not None:
+            logger.info(f"{description}: {total} items to delete")
+        if write_plan.enabled:
+            return write_plan.record_delete(
+                query, total, self.delete_batch_size, description
+            )
+        batch_size = self.delete_batch_size
+        min_batch_size = min(self.min_batch_size, batch_size)
+        num_deleted = 0
+        num_batches = 0
+        fingerprint = query_cache.get_write_fingerprint(self.ndo, query)
+        num_attempts = self.num_attempts
+        start = time.perf_counter()
+        while True:
+            try:
+                result = self._run_with_retries(query, {"batch_size": batch_size})
+            except Neo4jError as error:
+                if not self._is_memory_error(error):
+                    raise
+                if batch_size <= min_batch_size:
+                    raise
+                batch_size = max(min_batch_size, batch_size // 2)
+                logger.warning(
+                    f"{description}: out of transaction memory, "
+                    f"reducing deletion batch size to {batch_size}"
+                )
+                continue
+            deleted = result.evaluate() or 0
+            if not deleted:
+                break
+            num_deleted += deleted
+            num_batches += 1
+            progress = f"{num_deleted}/{total}" if total is not None else num_deleted
+            logger.info(f"{description}: deleted {progress}")
+
+        query_cache.record_write(
+            self.ndo, query, fingerprint, self.num_attempts - num_attempts
+        )
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"{description}: deleted {num_deleted} items in {num_batches} batches, "
+            f"{elapsed:.1f}s"
+        )
+        return {"deleted": num_deleted, "batches": num_batches, "seconds": elapsed}
+
+    def _run_with_retries(self, query, param):
+        attempt = 1
+        while True:
+            self.num_attempts += 1
+            try:
+                return self.ndo.run_query(query, param=param)
+            except RETRYABLE_ERRORS as error:
+                if not self._should_retry(error) or attempt >= self.max_retries:
+                    raise
+                logger.warning(
+                    f"Transient error on attempt {attempt}/{self.max_retries}, "
+                    f"retrying batch: {error}"
+                )
+                time.sleep(self.retry_delay * attempt)
+                attempt += 1
+
+    def _should_retry(self, error):
+        if isinstance(error, Neo4jError):
+            return error.should_retry() and not self._is_memory_error(error)
+        return True
+
+    @staticmethod
+    def _is_memory_error(error):
+        return "OutOfMemory" in error.title or "MemoryLimit" in error.title
@@ -0,0 +1,134 @@
+import csv
+import os
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+from pdbe_complexes.utils.relationship_buffer import RELATIONSHIP_COLUMNS
+
+# relationship params list name -> (file name, name of its LOAD CSV query)
+RELATIONSHIP_FILES = {
+    "accession_params_list": ("uniprot_pdb_complex_rels.csv", "LOAD_ACCESSION_QUERY"),
+    "entity_params_list": ("entity_pdb_complex_rels.csv", "LOAD_ENTITY_QUERY"),
+    "unmapped_polymer_params_list": (
+        "unmapped_polymer_pdb_complex_rels.csv",
+        "LOAD_UNMAPPED_POLYMER_QUERY",
+    ),
+    "rfam_params_list": ("rfam_pdb_complex_rels.csv", "LOAD_RFAM_QUERY"),
+    "assembly_params_list": ("assembly_pdb_complex_rels.csv", "LOAD_ASSEMBLY_QUERY"),
+}
+
+SAME_AS_FILE = "pdb_complex_complex_rels.csv"
+SUBCOMPLEX_FILE = "pdb_complex_subcomplex_rels.csv"
+NAMES_FILE = "pdb_complex_names.csv"
+LOAD_SCRIPT = "load_pdb_complexes.cypher"
+
+
+class BulkImportWriter:
+    """
+    This class writes the PDBComplex relationships as CSV files to be loaded
+    into the graph db with LOAD CSV, for graph db builds loaded offline.
+
+    Every file has the columns of the params rows of the matching MERGE
+    query and is loaded by a LOAD_*_QUERY from queries.py. Like the MERGE
+    queries, these match the UniProt, Entity, Assembly, RfamFamily and
+    Complex nodes already in the graph db and merge the PDBComplex and
+    UnmappedPolymer nodes, so no node files are needed
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        # (LOAD CSV query name, path) of every file, in load order
+        self.load_files = []
+
+    def write_relationships(self, params_lists, complex_params_list, subcomplex_pairs):
+        """
+        Writes one relationship file per pair of nodes
+
+        Args:
+            params_lists (dict): relationship params lists by name
+            complex_params_list (list of dict): PDBComplex-Complex params
+            subcomplex_pairs (list of tuples): (sub-complex ID, complex ID)
+        """
+        for param_name, rows in params_lists.items():
+            filename, query_name = RELATIONSHIP_FILES[param_name]
+            self._write_file(
+                filename, query_name, RELATIONSHIP_COLUMNS[param_name], rows
+            )
+
+        # the PDBComplex nodes are merged by the files above
+        self._write_file(
+            SAME_AS_FILE,
+            "LOAD_COMMON_COMPLEX_QUERY",
+            ["pdb_complex_id", "complex_portal_id"],
+            complex_params_list,
+        )
+        self._write_file(
+            SUBCOMPLEX_FILE,
+            "LOAD_SUBCOMPLEX_QUERY",
+            ["src_complex_id", "dest_complex_id"],
+            [
+                {"src_complex_id": src_complex_id, "dest_complex_id": dest_complex_id}
+                for src_complex_id, dest_complex_id in subcomplex_pairs
+            ],
+        )
+
+    def write_names(self, complex_name_params_list):
+        """
+        Writes the complex names as a CSV file to be loaded with
+        LOAD_COMPLEX_NAMES_QUERY once the PDBComplex nodes are loaded
+
+        Args:
+            complex_name_params_list (list of dict): complex name params
+
+        Returns:
+            str: path of the names file
+        """
+        complete_path = os.path.join(self.output_path, NAMES_FILE)
+        with open(complete_path, "w", newline="") as names_file:
+            writer = csv.DictWriter(
+                names_file, fieldnames=["pdb_complex_id", "complex_name"]
+            )
+            writer.writeheader()
+            writer.writerows(complex_name_params_list)
+        logger.info(
+            f"Wrote {len(complex_name_params_list)} complex names to {complete_path}"
+        )
+        return complete_path
+
+    def write_load_script(self, file_url_prefix="file:///"):
+        """
+        Writes a cypher-shell script that replaces the PDBComplex nodes in
+        the graph db with the ones in the files written so far. The
+        statements batch their rows with CALL IN TRANSACTIONS, which needs
+        the implicit transactions of :auto
+
+        Args:
+            file_url_prefix (str, optional): URL of the dir the files are
+                                             loaded from. Defaults to the
+                                             import dir of the graph db.
+
+        Returns:
+            str: path of the script
+        """
+        statements = [f":auto {qy.DELETE_ALL_PDB_COMPLEXES_QUERY.strip()};"]
+        for query_name, path in self.load_files:
+            file_url = f"{file_url_prefix}{os.path.basename(path)}"
+            statements.append(f":param file_url => '{file_url}'")
+            statements.append(f":auto {getattr(qy, query_name).strip()};")
+        complete_path = os.path.join(self.output_path, LOAD_SCRIPT)
+        with open(complete_path, "w") as script_file:
+            script_file.write("\n".join(statements) + "\n")
+        logger.info(f"Wrote the LOAD CSV statements to {complete_path}")
+        return complete_path
+
+    def _write_file(self, filename, query_name, columns, rows):
+        complete_path = os.path.join(self.output_path, filename)
+        num_rows = 0
+        with open(complete_path, "w", newline="") as load_file:
+            writer = csv.DictWriter(load_file, fieldnames=columns)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                num_rows += 1
+        logger.info(f"Wrote {num_rows} rows to {complete_path}")
+        self.load_files.append((query_name, complete_path))
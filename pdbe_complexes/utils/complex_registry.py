@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import datetime
+
+from pdbe_complexes.log import logger
+
+PDB_COMPLEX_ID_PREFIX = "PDB-CPX-"
+# the first allocated ID is PDB-CPX-100001
+PDB_COMPLEX_ID_START = 100000
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS complexes (
+    md5_obj TEXT PRIMARY KEY,
+    pdb_complex_id TEXT NOT NULL UNIQUE,
+    complex_portal_id TEXT,
+    accession TEXT,
+    entries TEXT
+);
+CREATE TABLE IF NOT EXISTS counter (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS retired (
+    pdb_complex_id TEXT NOT NULL,
+    md5_obj TEXT NOT NULL,
+    accession TEXT,
+    reason TEXT,
+    retired_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retired_pdb_complex_id ON retired (pdb_complex_id);
+"""
+
+COLUMNS = ("pdb_complex_id", "complex_portal_id", "accession", "entries")
+
+
+class ComplexRegistry(MutableMapping):
+    """
+    This class keeps the mapping of complex composition hashes to PDB complex
+    IDs in SQLite. Lookups go through the primary key index instead of a
+    dict loaded from complexes_master.csv, new IDs are taken from a counter
+    in the same transaction as their row, so several processes can allocate
+    IDs from one registry file, and the IDs that are no longer mapped are
+    kept as a history so that they are never reused.
+
+    The registry behaves like the OrderedDict it replaces: it is keyed on the
+    md5 hash, its values are dicts of pdb_complex_id, complex_portal_id,
+    accession and entries, and it iterates in insertion order
+    """
+
+    def __init__(self, registry_path=":memory:"):
+        self.registry_path = registry_path
+        self.lock = threading.RLock()
+        # autocommit mode, the transactions are opened explicitly
+        self.connection = sqlite3.connect(
+            registry_path, isolation_level=None, check_same_thread=False, timeout=60
+        )
+        if registry_path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(REGISTRY_SCHEMA)
+        self.connection.execute(
+            "INSERT OR IGNORE INTO counter VALUES ('pdb_complex_id', ?)",
+            (PDB_COMPLEX_ID_START,),
+        )
+
+    @classmethod
+    def snapshot(cls, registry_path):
+        """
+        Returns an in-memory copy of a registry file, so that IDs can be
+        allocated without changing the file, e.g. in a dry run
+
+        Args:
+            registry_path (str): SQLite registry file
+
+        Returns:
+            ComplexRegistry: in-memory registry
+        """
+        registry = cls()
+        if os.path.exists(registry_path):
+            source = sqlite3.connect(registry_path)
+            try:
+                source.backup(registry.connection)
+            finally:
+                source.close()
+        return registry
+
+    def __getitem__(self, hash_str):
+        row = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM complexes WHERE md5_obj = ?",
+            (hash_str,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(hash_str)
+        return dict(zip(COLUMNS, row))
+
+    def __setitem__(self, hash_str, value):
+        with self._transaction() as cursor:
+            self._put(cursor, hash_str, value)
+
+    def __delitem__(self, hash_str):
+        self.retire(hash_str)
+
+    def __iter__(self):
+        rows = self.connection.execute(
+            "SELECT md5_obj FROM complexes ORDER BY rowid"
+        ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        return self.connection.execute("SELECT count(*) FROM complexes").fetchone()[0]
+
+    def __contains__(self, hash_str):
+        row = self.connection.execute(
+            "SELECT 1 FROM complexes WHERE md5_obj = ?", (hash_str,)
+        ).fetchone()
+        return row is not None
+
+    def items(self):
+        rows = self.connection.execute(
+            f"SELECT md5_obj, {', '.join(COLUMNS)} FROM complexes ORDER BY rowid"
+        ).fetchall()
+        return [(row[0], dict(zip(COLUMNS, row[1:]))) for row in rows]
+
+    def load(self, rows):
+        """
+        Adds the rows of complexes_master.csv in one transaction
+
+        Args:
+            rows (iterable of dict): md5_obj, pdb_complex_id, complex_portal_id,
+                                     accession and entries
+        """
+        with self._transaction() as cursor:
+            for row in rows:
+                self._put(cursor, row["md5_obj"], row)
+
+    def load_columns(self, columns):
+        """
+        Adds the mappings given column-wise in one transaction, e.g. as read
+        from complexes_master.csv by a columnar reader. Existing mappings of
+        the same hashes are replaced
+
+        Args:
+            columns (dict): list of values of md5_obj, pdb_complex_id,
+                            complex_portal_id, accession and entries
+        """
+        numbers = [
+            number
+            for number in map(self._get_number, columns["pdb_complex_id"])
+            if number is not None
+        ]
+        with self._transaction() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO complexes VALUES (?, ?, ?, ?, ?)",
+                zip(columns["md5_obj"], *(columns[column] for column in COLUMNS)),
+            )
+            # never allocate an ID that has been added from elsewhere
+            if numbers:
+                cursor.execute(
+                    "UPDATE counter SET value = max(value, ?) "
+                    "WHERE name = 'pdb_complex_id'",
+                    (max(numbers),),
+                )
+
+    def allocate(self, hash_str, accession, complex_portal_id, entries):
+        """
+        Returns the PDB complex ID of a complex composition, allocating the
+        next ID from the counter if the composition is new. The lookup and
+        the allocation happen in one write transaction, so concurrent
+        allocations of the same composition get the same ID
+
+        Args:
+            hash_str (str): md5 hash of the complex composition
+            accession (str): complex composition string
+            complex_portal_id (str): Complex Portal identifier
+            entries (str): assemblies
+
+        Returns:
+            tuple: PDB complex ID, whether it has been allocated now
+        """
+        with self._transaction() as cursor:
+            return self._allocate(
+                cursor, hash_str, accession, complex_portal_id, entries
+            )
+
+    def allocate_many(self, compositions):
+        """
+        Allocates the IDs of several complex compositions in one write
+        transaction, in the given order, so that the IDs are the same as
+        those of one allocate call per composition
+
+        Args:
+            compositions (iterable of tuple): hash, composition string,
+                                              Complex Portal ID and entries
+
+        Returns:
+            dict: PDB complex ID of each hash, and whether it has been
+            allocated now
+        """
+        with self._transaction() as cursor:
+            return {
+                hash_str: self._allocate(
+                    cursor, hash_str, accession, complex_portal_id, entries
+                )
+                for hash_str, accession, complex_portal_id, entries in compositions
+            }
+
+    def retire(self, hash_str, reason="removed"):
+        """
+        Removes the mapping of a complex composition and records its ID in
+        the history of retired IDs
+
+        Args:
+            hash_str (str): md5 hash of the complex composition
+            reason (str, optional): why the mapping has been removed
+        """
+        with self._transaction() as cursor:
+            row = cursor.execute(
+                "SELECT pdb_complex_id, accession FROM complexes WHERE md5_obj = ?",
+                (hash_str,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(hash_str)
+            cursor.execute("DELETE FROM complexes WHERE md5_obj = ?", (hash_str,))
+            cursor.execute(
+                "INSERT INTO retired VALUES (?, ?, ?, ?, ?)",
+                (row[0], hash_str, row[1], reason, datetime.now().isoformat()),
+            )
+
+    def get_retired(self, pdb_complex_id=None):
+        """
+        Returns the history of retired mappings
+
+        Args:
+            pdb_complex_id (str, optional): only the history of this ID
+
+        Returns:
+            list of dict: pdb_complex_id, md5_obj, accession, reason, retired_at
+        """
+        query = "SELECT * FROM retired"
+        params = ()
+        if pdb_complex_id is not None:
+            query += " WHERE pdb_complex_id = ?"
+            params = (pdb_complex_id,)
+        cursor = self.connection.execute(query + " ORDER BY rowid", params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        self.connection.close()
+
+    def _allocate(self, cursor, hash_str, accession, complex_portal_id, entries):
+        row = cursor.execute(
+            "SELECT pdb_complex_id FROM complexes WHERE md5_obj = ?", (hash_str,)
+        ).fetchone()
+        if row is not None:
+            cursor.execute(
+                "UPDATE complexes SET entries = ? WHERE md5_obj = ?",
+                (entries, hash_str),
+            )
+            return row[0], False
+        cursor.execute(
+            "UPDATE counter SET value = value + 1 WHERE name = 'pdb_complex_id'"
+        )
+        (number,) = cursor.execute(
+            "SELECT value FROM counter WHERE name = 'pdb_complex_id'"
+        ).fetchone()
+        pdb_complex_id = f"{PDB_COMPLEX_ID_PREFIX}{number}"
+        cursor.execute(
+            "INSERT INTO complexes VALUES (?, ?, ?, ?, ?)",
+            (hash_str, pdb_complex_id, complex_portal_id, accession, entries),
+        )
+        return pdb_complex_id, True
+
+    def _put(self, cursor, hash_str, value):
+        values = tuple(value.get(column) for column in COLUMNS)
+        # update in place so that the mapping keeps its position
+        cursor.execute(
+            "UPDATE complexes SET pdb_complex_id = ?, complex_portal_id = ?, "
+            "accession = ?, entries = ? WHERE md5_obj = ?",
+            values + (hash_str,),
+        )
+        if cursor.rowcount == 0:
+            cursor.execute(
+                "INSERT INTO complexes VALUES (?, ?, ?, ?, ?)", (hash_str,) + values
+            )
+        # never allocate an ID that has been added from elsewhere
+        number = self._get_number(value.get("pdb_complex_id"))
+        if number is not None:
+            cursor.execute(
+                "UPDATE counter SET value = max(value, ?) WHERE name = 'pdb_complex_id'",
+                (number,),
+            )
+
+    @staticmethod
+    def _get_number(pdb_complex_id):
+        if not pdb_complex_id or not pdb_complex_id.startswith(PDB_COMPLEX_ID_PREFIX):
+            return None
+        try:
+            return int(pdb_complex_id[len(PDB_COMPLEX_ID_PREFIX) :])
+        except ValueError:
+            logger.warning(f"Unexpected PDB complex ID {pdb_complex_id}")
+            return None
+
+    @contextmanager
+    def _transaction(self):
+        # take the SQLite write lock up front so that concurrent writers wait
+        # for each other instead of failing on commit
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
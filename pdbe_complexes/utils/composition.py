@@ -0,0 +1,164 @@
+import hashlib
+import sys
+import weakref
+from collections import namedtuple
+
+from pdbe_complexes.utils.relationship_buffer import RELATIONSHIP_COLUMNS
+
+# label and relationship params list name of each component kind
+COMPONENT_KINDS = {
+    "entity": ("Entity", "entity_params_list"),
+    "uniprot": ("UniProt", "accession_params_list"),
+    "unmapped": ("UnmappedPolymer", "unmapped_polymer_params_list"),
+    "rfam": ("RfamFamily", "rfam_params_list"),
+}
+
+
+class Component(
+    namedtuple("Component", ["token", "kind", "key", "stoichiometry", "tax_id"])
+):
+    """
+    One component of a complex composition, e.g. P69905_2_9606. Components
+    are interned: parsing the same token twice returns the same object, and
+    its strings are shared by every composition and params row using it
+    """
+
+    __slots__ = ()
+    _interned = {}
+
+    @classmethod
+    def parse(cls, token):
+        """
+        Returns the component of a composition string token
+
+        Args:
+            token (str): NA_<entry>_<entity>_<stoichiometry> for an unmapped PDB
+                         entity, <accession>_<stoichiometry>_<taxid> for UniProt,
+                         <type>:UNMAPPED for an unmapped polymer, else an Rfam
+                         accession
+
+        Returns:
+            Component: interned component, of kind None for any other token
+        """
+        component = cls._interned.get(token)
+        if component is not None:
+            return component
+
+        token = sys.intern(token)
+        parts = [sys.intern(part) for part in token.split("_")]
+        if len(parts) == 4:
+            _, entry_id, entity_id, stoichiometry = parts
+            component = cls(token, "entity", (entry_id, entity_id), stoichiometry, "")
+        elif len(parts) == 3:
+            accession, stoichiometry, tax_id = parts
+            component = cls(token, "uniprot", accession, stoichiometry, tax_id)
+        elif len(parts) != 1:
+            # not a known component token, it has no relationship to write
+            component = cls(token, None, token, "", "")
+        elif ":UNMAPPED" in token:
+            polymer_type = sys.intern(token.replace(":UNMAPPED", ""))
+            component = cls(token, "unmapped", polymer_type, "", "")
+        else:
+            component = cls(token, "rfam", token, "", "")
+        cls._interned[token] = component
+        return component
+
+    @property
+    def label(self):
+        return COMPONENT_KINDS[self.kind][0]
+
+    @property
+    def param_name(self):
+        return COMPONENT_KINDS[self.kind][1]
+
+    @property
+    def is_known(self):
+        return self.kind is not None
+
+    @property
+    def values(self):
+        """
+        Values of the component in the relationship params columns, after
+        complex_id
+        """
+        if self.kind == "entity":
+            return self.key + (self.stoichiometry,)
+        if self.kind == "uniprot":
+            return (self.key, self.stoichiometry)
+        return (self.key,)
+
+    def get_params(self, complex_id):
+        """
+        Returns the relationship params row of the component in a complex
+
+        Args:
+            complex_id (str): PDB complex ID
+
+        Returns:
+            dict: row as in the *_params_list of the component kind
+        """
+        return dict(
+            zip(RELATIONSHIP_COLUMNS[self.param_name], (complex_id,) + self.values)
+        )
+
+
+class Composition:
+    """
+    The ordered components of a unique complex composition, parsed once from
+    the list of composition tokens. The canonical composition string, which
+    leaves out the NA_ prefix of unmapped PDB entities, and its md5 are
+    computed once. Compositions are interned on their tokens for as long as
+    they are in use
+    """
+
+    __slots__ = ("components", "string", "_md5", "__weakref__")
+    _interned = weakref.WeakValueDictionary()
+
+    def __init__(self, components):
+        self.components = components
+        self.string = sys.intern(
+            ",".join(component.token for component in components).replace("NA_", "")
+        )
+        self._md5 = None
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """
+        Returns the composition of the given tokens
+
+        Args:
+            tokens (list of str): ordered composition tokens
+
+        Returns:
+            Composition: interned composition
+        """
+        tokens = tuple(tokens)
+        composition = cls._interned.get(tokens)
+        if composition is None:
+            composition = cls(tuple(Component.parse(token) for token in tokens))
+            cls._interned[tokens] = composition
+        return composition
+
+    @property
+    def md5(self):
+        if self._md5 is None:
+            self._md5 = hashlib.md5(self.string.encode("utf-8")).hexdigest()
+        return self._md5
+
+    def __len__(self):
+        return len(self.components)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def __repr__(self):
+        return f"Composition({self.string!r})"
+
+
+def clear_interned():
+    """
+    Forgets the interned components and compositions, e.g. when the process
+    stage finishes
+    """
+    Component._interned.clear()
+    Composition._interned.clear()
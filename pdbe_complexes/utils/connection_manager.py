@@ -0,0 +1,137 @@
+import threading
+import time
+
+from py2neo import Graph
+
+from pdbe_complexes.constants import (
+    neo4j_health_check_interval,
+    neo4j_pool_max_age,
+    neo4j_pool_size,
+)
+from pdbe_complexes.log import logger
+
+
+class Neo4jConnectionManager:
+    """
+    This class keeps one pooled py2neo Graph per set of connection parameters
+    so that every Neo4jDatabaseOperations object in the process reuses the
+    same Bolt connections instead of connecting and authenticating per query
+    """
+
+    def __init__(
+        self,
+        pool_size=neo4j_pool_size,
+        max_age=neo4j_pool_max_age,
+        health_check_interval=neo4j_health_check_interval,
+    ):
+        self.pool_size = pool_size
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+        self._graphs = {}
+        self._last_checked = {}
+        self._lock = threading.RLock()
+
+    def configure(self, pool_size=None, max_age=None, health_check_interval=None):
+        """
+        Updates the pool settings. Open pools are closed so that the new
+        settings apply to the next connection
+
+        Args:
+            pool_size (int, optional): max number of connections per pool
+            max_age (int, optional): max age of a pooled connection in seconds
+            health_check_interval (int, optional): seconds between health checks
+        """
+        with self._lock:
+            if pool_size is not None:
+                self.pool_size = pool_size
+            if max_age is not None:
+                self.max_age = max_age
+            if health_check_interval is not None:
+                self.health_check_interval = health_check_interval
+            self.close()
+
+    def get_graph(self, connection_params):
+        """
+        Returns the shared Graph for the given connection parameters, creating
+        it on first use and replacing it if it fails a health check
+
+        Args:
+            connection_params (tuple): bolt uri, username and password
+
+        Returns:
+            obj: py2neo Graph
+        """
+        key = tuple(connection_params)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None and self._is_check_due(key):
+                if not self.health_check(connection_params):
+                    logger.warning(
+                        f"Connection pool for {key[0]} failed health check, reconnecting"
+                    )
+                    self._close_graph(key)
+                    graph = None
+            if graph is None:
+                graph = self._connect(key)
+            return graph
+
+    def health_check(self, connection_params):
+        """
+        Checks whether the pooled connection can still run a query
+
+        Args:
+            connection_params (tuple): bolt uri, username and password
+
+        Returns:
+            bool: True if the server answered
+        """
+        key = tuple(connection_params)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                return False
+            self._last_checked[key] = time.monotonic()
+            try:
+                return graph.evaluate("RETURN 1") == 1
+            except Exception as error:
+                logger.warning(f"Health check on {key[0]} failed: {error}")
+                return False
+
+    def close(self):
+        """
+        Closes every pooled connection
+        """
+        with self._lock:
+            for key in list(self._graphs):
+                self._close_graph(key)
+
+    def _connect(self, key):
+        logger.info(f"Opening connection pool to {key[0]} (size {self.pool_size})")
+        graph = Graph(
+            key[0],
+            user=key[1],
+            password=key[2],
+            max_size=self.pool_size,
+            max_age=self.max_age,
+        )
+        self._graphs[key] = graph
+        self._last_checked[key] = time.monotonic()
+        return graph
+
+    def _close_graph(self, key):
+        graph = self._graphs.pop(key, None)
+        self._last_checked.pop(key, None)
+        if graph is not None:
+            try:
+                graph.service.connector.close()
+            except Exception as error:
+                logger.warning(f"Error while closing connection to {key[0]}: {error}")
+            logger.info(f"Closed connection pool to {key[0]}")
+
+    def _is_check_due(self, key):
+        last_checked = self._last_checked.get(key, 0)
+        return time.monotonic() - last_checked >= self.health_check_interval
+
+
+# process-wide manager shared by all Neo4jDatabaseOperations objects
+connection_manager = Neo4jConnectionManager()
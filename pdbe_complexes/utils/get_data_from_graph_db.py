@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from pdbe_complexes import queries as qy
+from pdbe_complexes.constants import neo4j_fetch_size, neo4j_lookup_batch_size
 from pdbe_complexes.log import logger
 from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
 
@@ -12,24 +15,46 @@ PEPTIDE_NAMES = {
 
 
 class GetComplexData:
-    def __init__(self, bolt_uri, username, password):
-        self.ndo = Neo4jDatabaseOperations((bolt_uri, username, password))
+    def __init__(
+        self,
+        bolt_uri,
+        username,
+        password,
+        fetch_size=neo4j_fetch_size,
+        backend=None,
+        lookup_batch_size=neo4j_lookup_batch_size,
+        grouped=False,
+    ):
+        self.ndo = Neo4jDatabaseOperations(
+            (bolt_uri, username, password), fetch_size=fetch_size, backend=backend
+        )
         self.graph = None
+        self.lookup_batch_size = lookup_batch_size
+        self.grouped = grouped
         self.molecule_names = {}
         self.pdb_complexes = {}
+        self.pending_molecule_names = []
 
-    def _populate_molecule_names_from_entity(self):
+    def _populate_molecule_names_from_entity(self, entity_uniqids):
         """
         Stores the molecules description obtained from
         entity node into a dictionary
+
+        Args:
+            entity_uniqids (iterable): UNIQIDs of the referenced entities
         """
-        mappings = self.ndo.run_query(qy.ENTITY_QUERY)
-        for row in mappings:
-            entity_uniqid = row.get("entity_uniqid")
-            description = row.get("description")
-            self.molecule_names[entity_uniqid] = description
+        self.molecule_names.update(self._get_molecule_names_from_entity(entity_uniqids))
+
+    def _get_molecule_names_from_entity(self, entity_uniqids):
+        molecule_names = {}
+        for mappings in self._lookup(qy.ENTITY_QUERY, "entity_uniqids", entity_uniqids):
+            for row in mappings:
+                entity_uniqid = row.get("entity_uniqid")
+                description = row.get("description")
+                molecule_names[entity_uniqid] = description
+        return molecule_names
 
-    def _populate_molecule_names_from_uniprot_or_rfam(self, db_type):
+    def _populate_molecule_names_from_uniprot_or_rfam(self, db_type, accessions):
         """
         Stores the molecules description obtained from
         uniprot/rfam node into a dictionary
@@ -37,17 +62,43 @@ class GetComplexData:
 
         Args:
             db_type (str): either uniprot or rfam
+            accessions (iterable): referenced UniProt or Rfam accessions
         """
+        self.molecule_names.update(
+            self._get_molecule_names_from_uniprot_or_rfam(db_type, accessions)
+        )
+
+    def _get_molecule_names_from_uniprot_or_rfam(self, db_type, accessions):
         if db_type == "uniprot":
             query = qy.UNIPROT_QUERY
         else:
             query = qy.RFAM_QUERY
 
-        mappings = self.ndo.run_query(query)
-        for row in mappings:
-            accession = row.get("accession")
-            name = row.get("description")
-            self.molecule_names[accession] = name
+        molecule_names = {}
+        for mappings in self._lookup(query, "accessions", accessions):
+            for row in mappings:
+                accession = row.get("accession")
+                name = row.get("description")
+                molecule_names[accession] = name
+        return molecule_names
+
+    def _lookup(self, query, param_name, ids):
+        """
+        Runs a name lookup query for the given IDs, lookup_batch_size IDs
+        per query
+
+        Args:
+            query (str): Neo4j query reading the IDs from $param_name
+            param_name (str): parameter name
+            ids (iterable): IDs to look up
+
+        Yields:
+            obj: neo4j query result of each batch
+        """
+        ids = sorted(i for i in ids if i is not None)
+        for offset in range(0, len(ids), self.lookup_batch_size):
+            batch = ids[offset : offset + self.lookup_batch_size]
+            yield self.ndo.run_query(query, param={param_name: batch}, cached=True)
 
     def get_pdb_complex_data(self):
         """
@@ -59,36 +110,54 @@ class GetComplexData:
             value is a nested dictionary containing information
             related to complexes
         """
-        self._populate_molecule_names_from_uniprot_or_rfam("uniprot")
-        self._populate_molecule_names_from_uniprot_or_rfam("rfam")
-        self._populate_molecule_names_from_entity()
+        self._process_pdb_complexes()
+
+        # only the entities and accessions of the PDB complexes are looked up,
+        # one query per type running concurrently
+        ids = {"uniprot": set(), "rfam": set(), "entity": set()}
+        for _, db_type, molecule_id in self.pending_molecule_names:
+            ids[db_type].add(molecule_id)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(
+                    self._get_molecule_names_from_uniprot_or_rfam,
+                    db_type,
+                    ids[db_type],
+                )
+                for db_type in ("uniprot", "rfam")
+            ]
+            futures.append(
+                executor.submit(self._get_molecule_names_from_entity, ids["entity"])
+            )
+            for future in futures:
+                self.molecule_names.update(future.result())
+
+        for component, _, molecule_id in self.pending_molecule_names:
+            component["molecule_name"] = self.molecule_names.get(molecule_id)
+        self.pending_molecule_names = []
+        return self.pdb_complexes
 
+    def _process_pdb_complexes(self):
         logger.info("Start getting PDB Complex Data")
-        mappings = self.ndo.run_query(qy.PDB_COMPLEX_QUERY)
+        if self.grouped:
+            self._process_grouped_pdb_complexes()
+        else:
+            self._process_pdb_complex_rows()
+        logger.info("Done getting PDB Complex Data")
+
+    def _process_pdb_complex_rows(self):
+        mappings = self.ndo.run_query(qy.PDB_COMPLEX_QUERY, stream=True, cached=True)
         for row in mappings:
 
             pdb_complex_id = row.get("complex_id")
             component_db = row.get("component_db", [])
-            component_type = row.get("component_type")
-            stoichiometry = row.get("stoichiometry", 0)
-            accession = row.get("accession", "")
-            rfam_accession = row.get("rfam_accession", "")
-            polymer_type = row.get("polymer_type")
-            tax_id = row.get("taxonomy", "")
             entry_assembly = row.get("entry_assembly", "")
-            entity = row.get("entity")
-            antibody = row.get("antibody", False)
-            entity_length = row.get("entity_length", 0)
 
             self.pdb_complexes.setdefault(pdb_complex_id, {})[
                 "pdb_complex_id"
             ] = pdb_complex_id
 
             for db in component_db:
-                stoichiometry = stoichiometry if stoichiometry else 0
-                tax_id = tax_id if tax_id else ""
-                component = {"stoichiometry": stoichiometry, "tax_id": tax_id}
-
                 if db == "Assembly":
                     if entry_assembly:
                         entry_info = entry_assembly.split("_")
@@ -102,69 +171,128 @@ class GetComplexData:
                         ).append(entry_assembly)
                     continue
 
-                elif db == "UniProt":
-                    accession_without_isoform = accession.split("-")[0]
-                    component.update(
-                        {
-                            "accession": accession_without_isoform,
-                            "accession_with_isoform": accession,
-                            "database": "UNP",
-                            "polymer_type": "PROTEIN",
-                            "molecule_name": self.molecule_names.get(accession),
-                        }
-                    )
-
-                elif db == "RfamFamily":
-                    component.update(
-                        {
-                            "accession": rfam_accession,
-                            "database": "Rfam",
-                            "polymer_type": "RNA",
-                            "molecule_name": self.molecule_names.get(rfam_accession),
-                        }
-                    )
-
-                elif db == "UnmappedPolymer":
-                    component.update(
-                        {
-                            "polymer_type": component_type,
-                            "molecule_name": component_type,
-                        }
-                    )
-
-                elif db == "Entity":
-                    polymer_type_dict = {"P": "PROTEIN"}
-                    antibody_map = {"True": True, "False": False}
-                    entity_length = int(entity_length) if entity_length else 0
-                    if entity_length > 19:
-                        molecule_name = self.molecule_names.get(entity)
-                    elif entity_length > 9:
-                        molecule_name = PEPTIDE_NAMES.get("medium_peptide").get(
-                            tax_id, "peptide"
-                        )
-                    else:
-                        molecule_name = PEPTIDE_NAMES.get("short_peptide").get(
-                            tax_id, "short peptide"
-                        )
-                    component.update(
-                        {
-                            "polymer_type": polymer_type_dict.get(
-                                polymer_type, polymer_type
-                            ),
-                            "molecule_name": molecule_name,
-                            "is_antibody": antibody_map.get(antibody, antibody),
-                            "pdb_entity": entity,
-                            "entity_length": entity_length,
-                        }
-                    )
-
-                else:
-                    logger.info("unhandled db type")
+                component = self._get_component(db, row)
+                if component is None:
                     continue
 
                 self.pdb_complexes.setdefault(pdb_complex_id, {}).setdefault(
                     "components", []
                 ).append(component)
 
-        logger.info("Done getting PDB Complex Data")
-        return self.pdb_complexes
+    def _process_grouped_pdb_complexes(self):
+        """
+        Builds the complexes from PDB_COMPLEX_GROUPED_QUERY, which returns one
+        record per complex with its assemblies and component maps, so every
+        complex dict is built in one step
+        """
+        mappings = self.ndo.run_query(
+            qy.PDB_COMPLEX_GROUPED_QUERY, stream=True, cached=True
+        )
+        for row in mappings:
+            pdb_complex_id = row.get("complex_id")
+            assemblies = row.get("assemblies") or []
+            components = [
+                component
+                for component in (
+                    self._get_component(db, component_row)
+                    for component_row in row.get("components") or []
+                    for db in component_row.get("component_db", [])
+                )
+                if component is not None
+            ]
+
+            pdb_complex = {"pdb_complex_id": pdb_complex_id}
+            if assemblies:
+                pdb_complex["pdb_entries"] = [
+                    entry_assembly.split("_")[0] for entry_assembly in assemblies
+                ]
+                pdb_complex["pdb_entries_with_assemblies"] = list(assemblies)
+            if components:
+                pdb_complex["components"] = components
+            self.pdb_complexes[pdb_complex_id] = pdb_complex
+
+    def _get_component(self, db, row):
+        """
+        Returns the component dict of a complex component of type db
+
+        Args:
+            db (str): label of the component node
+            row (dict): component properties
+
+        Returns:
+            dict: component, or None for an unhandled db type
+        """
+        component_type = row.get("component_type")
+        stoichiometry = row.get("stoichiometry", 0)
+        accession = row.get("accession", "")
+        rfam_accession = row.get("rfam_accession", "")
+        polymer_type = row.get("polymer_type")
+        tax_id = row.get("taxonomy", "")
+        entity = row.get("entity")
+        antibody = row.get("antibody", False)
+        entity_length = row.get("entity_length", 0)
+
+        stoichiometry = stoichiometry if stoichiometry else 0
+        tax_id = tax_id if tax_id else ""
+        component = {"stoichiometry": stoichiometry, "tax_id": tax_id}
+
+        if db == "UniProt":
+            accession_without_isoform = accession.split("-")[0]
+            component.update(
+                {
+                    "accession": accession_without_isoform,
+                    "accession_with_isoform": accession,
+                    "database": "UNP",
+                    "polymer_type": "PROTEIN",
+                }
+            )
+            self.pending_molecule_names.append((component, "uniprot", accession))
+
+        elif db == "RfamFamily":
+            component.update(
+                {
+                    "accession": rfam_accession,
+                    "database": "Rfam",
+                    "polymer_type": "RNA",
+                }
+            )
+            self.pending_molecule_names.append((component, "rfam", rfam_accession))
+
+        elif db == "UnmappedPolymer":
+            component.update(
+                {
+                    "polymer_type": component_type,
+                    "molecule_name": component_type,
+                }
+            )
+
+        elif db == "Entity":
+            polymer_type_dict = {"P": "PROTEIN"}
+            antibody_map = {"True": True, "False": False}
+            entity_length = int(entity_length) if entity_length else 0
+            if entity_length > 19:
+                molecule_name = None
+                self.pending_molecule_names.append((component, "entity", entity))
+            elif entity_length > 9:
+                molecule_name = PEPTIDE_NAMES.get("medium_peptide").get(
+                    tax_id, "peptide"
+                )
+            else:
+                molecule_name = PEPTIDE_NAMES.get("short_peptide").get(
+                    tax_id, "short peptide"
+                )
+            component.update(
+                {
+                    "polymer_type": polymer_type_dict.get(polymer_type, polymer_type),
+                    "molecule_name": molecule_name,
+                    "is_antibody": antibody_map.get(antibody, antibody),
+                    "pdb_entity": entity,
+                    "entity_length": entity_length,
+                }
+            )
+
+        else:
+            logger.info("unhandled db type")
+            return None
+
+        return component
@@ -0,0 +1,110 @@
+from py2neo.errors import ClientError
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.constants import schema_await_timeout, schema_requirements
+from pdbe_complexes.log import logger
+
+# index types that can serve exact property lookups
+LOOKUP_INDEX_TYPES = ("BTREE", "RANGE")
+
+
+class GraphSchema:
+    """
+    This class makes sure that the node properties used for lookups by the
+    MERGE/MATCH queries are backed by an index or a uniqueness constraint
+    """
+
+    def __init__(
+        self, ndo, requirements=schema_requirements, timeout=schema_await_timeout
+    ):
+        self.ndo = ndo
+        self.requirements = requirements
+        self.timeout = timeout
+
+    def prepare(self):
+        """
+        Creates the missing indexes and constraints and waits until they
+        are online
+
+        Returns:
+            dict: lookups that were already indexed, that have been indexed
+            now and that would otherwise have been label scans
+        """
+        logger.info("Start checking graph db indexes and constraints")
+        missing = self.find_missing()
+        report = {
+            "present": [
+                f"{label}.{prop}"
+                for label, prop, unique in self.requirements
+                if (label, prop, unique) not in missing
+            ],
+            "created": [],
+            "scans": [f"{label}.{prop}" for label, prop, _ in missing],
+        }
+        for label, prop, unique in missing:
+            logger.warning(
+                f"No index on :{label}({prop}), lookups would be label scans"
+            )
+            self._create(label, prop, unique)
+            report["created"].append(f"{label}.{prop}")
+
+        if missing:
+            logger.info(f"Waiting up to {self.timeout}s for indexes to come online")
+            self.ndo.run_query(
+                qy.AWAIT_INDEXES_STATEMENT, param={"timeout": self.timeout}
+            )
+        logger.info("Done checking graph db indexes and constraints")
+        return report
+
+    def find_missing(self):
+        """
+        Returns the required lookups that have no usable index
+
+        Returns:
+            list of tuples: (label, property, unique)
+        """
+        indexed = self._get_indexed_properties()
+        return [
+            (label, prop, unique)
+            for label, prop, unique in self.requirements
+            if (label, prop) not in indexed
+        ]
+
+    def _get_indexed_properties(self):
+        indexed = set()
+        for row in self.ndo.run_query(qy.SHOW_INDEXES_STATEMENT):
+            if row.get("entityType", "NODE") != "NODE":
+                continue
+            if row.get("type") not in LOOKUP_INDEX_TYPES:
+                continue
+            if row.get("state") == "FAILED":
+                continue
+            labels = row.get("labelsOrTypes") or []
+            properties = row.get("properties") or []
+            # only single-property indexes serve the lookups used here
+            if len(labels) == 1 and len(properties) == 1:
+                indexed.add((labels[0], properties[0]))
+        return indexed
+
+    def _create(self, label, prop, unique):
+        if unique:
+            name = f"constraint_{label.lower()}_{prop.lower()}"
+            try:
+                self.ndo.run_query(
+                    qy.CREATE_UNIQUE_CONSTRAINT_STATEMENT.format(
+                        name=name, label=label, property=prop
+                    )
+                )
+                logger.info(f"Created uniqueness constraint {name}")
+                return
+            except ClientError as error:
+                # e.g. duplicate values already in the graph db
+                logger.warning(
+                    f"Could not create uniqueness constraint on :{label}({prop}), "
+                    f"creating an index instead: {error}"
+                )
+        name = f"index_{label.lower()}_{prop.lower()}"
+        self.ndo.run_query(
+            qy.CREATE_INDEX_STATEMENT.format(name=name, label=label, property=prop)
+        )
+        logger.info(f"Created index {name}")
@@ -0,0 +1,166 @@
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+
+# how each relationship params list identifies the component it links to
+# a PDBComplex node: params list name -> (component label, key column,
+# stoichiometry column)
+COMPONENT_RELATIONSHIPS = {
+    "accession_params_list": ("UniProt", "accession", "stoichiometry"),
+    "entity_params_list": ("Entity", None, "stoichiometry"),
+    "unmapped_polymer_params_list": ("UnmappedPolymer", "polymer_type", None),
+    "rfam_params_list": ("RfamFamily", "rfam_acc", None),
+    "assembly_params_list": ("Assembly", "assembly_id", None),
+}
+
+
+def get_component_key(param_name, row):
+    """
+    Returns the key identifying a PDBComplex relationship in the same form as
+    PDB_COMPLEX_RELATIONSHIPS_QUERY returns it
+
+    Args:
+        param_name (str): name of the relationship params list
+        row (dict): relationship params row
+
+    Returns:
+        tuple: component label, component key and stoichiometry
+    """
+    label, key_column, stoichiometry_column = COMPONENT_RELATIONSHIPS[param_name]
+    if key_column is None:
+        # Entity.UNIQID is the entry ID and the entity ID joined by "_"
+        key = f"{row['entry_id']}_{row['entity_id']}"
+    else:
+        key = row[key_column]
+    stoichiometry = row[stoichiometry_column] if stoichiometry_column else ""
+    return (label, key, stoichiometry)
+
+
+class IncrementalUpdate:
+    """
+    This class compares the PDBComplex nodes and relationships already in
+    the graph db with the newly computed ones, so that only the differences
+    have to be written
+    """
+
+    def __init__(self, ndo):
+        self.ndo = ndo
+        self.existing_components = {}
+        self.existing_complex_portal_ids = {}
+        self.added = set()
+        self.removed = set()
+        self.changed = set()
+        self.remapped = set()
+
+    def get_existing_complexes(self):
+        """
+        Reads the relationships of every PDBComplex node in the graph db
+        """
+        logger.info("Start reading existing PDBComplex relationships")
+        mappings = self.ndo.run_query(qy.PDB_COMPLEX_RELATIONSHIPS_QUERY, stream=True)
+        for row in mappings:
+            complex_id = row.get("complex_id")
+            self.existing_components[complex_id] = {
+                (label, key, stoichiometry or "")
+                for label, key, stoichiometry in row.get("components", [])
+            }
+            self.existing_complex_portal_ids[complex_id] = set(
+                row.get("complex_portal_ids", [])
+            )
+        logger.info(
+            f"Done reading {len(self.existing_components)} existing PDBComplex nodes"
+        )
+
+    def compare(self, params_lists, complex_params_list):
+        """
+        Compares the computed relationships with the existing ones and returns
+        the rows that still have to be written and the ones to be deleted
+
+        Args:
+            params_lists (dict): relationship params lists by name
+            complex_params_list (list of dict): PDBComplex-Complex params
+
+        Returns:
+            tuple: (dict of params lists with only the new rows,
+                    list of stale component relationship rows,
+                    list of stale SAME_AS relationship rows)
+        """
+        new_components = {}
+        new_params_lists = {}
+        for param_name, rows in params_lists.items():
+            new_params_lists[param_name] = []
+            for row in rows:
+                key = get_component_key(param_name, row)
+                new_components.setdefault(row["complex_id"], set()).add(key)
+                existing = self.existing_components.get(row["complex_id"], set())
+                if key not in existing:
+                    new_params_lists[param_name].append(row)
+
+        new_complex_portal_ids = {}
+        new_complex_params_list = []
+        for row in complex_params_list:
+            pdb_complex_id = row["pdb_complex_id"]
+            new_complex_portal_ids.setdefault(pdb_complex_id, set()).add(
+                row["complex_portal_id"]
+            )
+            existing = self.existing_complex_portal_ids.get(pdb_complex_id, set())
+            if row["complex_portal_id"] not in existing:
+                new_complex_params_list.append(row)
+        new_params_lists["complex_params_list"] = new_complex_params_list
+
+        self.added = set(new_components) - set(self.existing_components)
+        self.removed = set(self.existing_components) - set(new_components)
+
+        stale_component_params_list = []
+        stale_complex_params_list = []
+        for complex_id in sorted(set(new_components) & set(self.existing_components)):
+            stale = self.existing_components[complex_id] - new_components[complex_id]
+            added = new_components[complex_id] - self.existing_components[complex_id]
+            for label, key, stoichiometry in stale:
+                stale_component_params_list.append(
+                    {
+                        "complex_id": complex_id,
+                        "label": label,
+                        "key": key,
+                        "stoichiometry": stoichiometry,
+                    }
+                )
+            for complex_portal_id in self.existing_complex_portal_ids[
+                complex_id
+            ] - new_complex_portal_ids.get(complex_id, set()):
+                stale_complex_params_list.append(
+                    {
+                        "pdb_complex_id": complex_id,
+                        "complex_portal_id": complex_portal_id,
+                    }
+                )
+            if (
+                stale
+                or added
+                or new_complex_portal_ids.get(complex_id, set())
+                != self.existing_complex_portal_ids[complex_id]
+            ):
+                self.changed.add(complex_id)
+            # sub-complex relationships only depend on the components
+            if any(label != "Assembly" for label, _, _ in stale | added):
+                self.remapped.add(complex_id)
+
+        logger.info(
+            f"PDBComplex nodes: {len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.changed)} changed, "
+            f"{len(new_components) - len(self.added) - len(self.changed)} unchanged"
+        )
+        return (
+            new_params_lists,
+            stale_component_params_list,
+            stale_complex_params_list,
+        )
+
+    def get_recomposed_complex_ids(self):
+        """
+        Returns the IDs of the complexes whose components differ from the
+        graph db, which need their sub-complex relationships recomputed
+
+        Returns:
+            list: PDB complex IDs
+        """
+        return sorted(self.added | self.remapped)
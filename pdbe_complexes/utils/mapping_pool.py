@@ -0,0 +1,91 @@
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from pdbe_complexes.utils import utility as ut
+from pdbe_complexes.utils.composition import Composition
+
+# number of assembly data rows sent to a worker at a time
+CHUNK_SIZE = 1000
+
+# a unique complex composition with everything but its PDB complex ID
+PreparedMapping = namedtuple(
+    "PreparedMapping",
+    ["accessions", "md5", "assemblies", "uniq_assemblies", "components"],
+)
+
+
+def prepare_mapping(row):
+    """
+    Parses and hashes the complex composition of an assembly data row and
+    builds the relationship params values of its components, which is all
+    the processing of a row that does not depend on the other rows
+
+    Args:
+        row (dict): accessions and assemblies of a unique composition
+
+    Returns:
+        PreparedMapping: composition string and md5, assemblies, and the
+        params list name and values of each component
+    """
+    uniq_assemblies = ut.get_list(row.get("assemblies"))
+    composition = Composition.from_tokens(ut.get_list(row.get("accessions")))
+    return PreparedMapping(
+        composition.string,
+        composition.md5,
+        ",".join(uniq_assemblies),
+        tuple(uniq_assemblies),
+        tuple(
+            (component.param_name, component.values)
+            for component in composition
+            if component.is_known
+        ),
+    )
+
+
+def prepare_mappings(rows, workers=1):
+    """
+    Prepares the assembly data rows in chunks of CHUNK_SIZE rows, so that
+    the PDB complex IDs of a chunk can be allocated together. With more than
+    one worker the chunks are prepared across a pool of worker processes,
+    and at most two chunks per worker are pending at a time, so a lazily
+    read stream of rows is never read ahead further than that. The chunks
+    are yielded in the order of the rows either way, so the PDB complex IDs
+    allocated from them are the same as in a serial run
+
+    Args:
+        rows (iterable of dict): assembly data rows
+        workers (int, optional): number of worker processes. Defaults to 1.
+
+    Yields:
+        list of PreparedMapping: prepared mappings of each chunk of rows
+    """
+    if workers <= 1:
+        for chunk in _get_chunks(rows):
+            yield _prepare_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _get_chunks(rows):
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_prepare_chunk, chunk))
+        while pending:
+            yield pending.popleft().result()
+
+
+def _get_chunks(rows):
+    chunk = []
+    for row in rows:
+        # records from the driver are not picklable, only their values are sent
+        chunk.append(
+            {"accessions": row.get("accessions"), "assemblies": row.get("assemblies")}
+        )
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _prepare_chunk(chunk):
+    return [prepare_mapping(row) for row in chunk]
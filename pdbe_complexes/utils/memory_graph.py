@@ -0,0 +1,685 @@
+import csv
+import random
+import re
+import threading
+from urllib.parse import urlparse
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+
+UNMAPPED_POLYMER_TYPES = {"R": "RNA", "D": "DNA", "D/R": "DNA/RNA"}
+
+# Cypher clauses of the statements that write to the graph db
+WRITE_CLAUSES = re.compile(r"\b(MERGE|SET|DELETE|CREATE)\b")
+
+
+class MemoryResult(list):
+    """
+    Query result rows, with the Cursor methods used by the process
+    """
+
+    def evaluate(self):
+        if not self or not self[0]:
+            return None
+        return next(iter(self[0].values()))
+
+
+class InMemoryGraph:
+    """
+    This class stands in for the graph db behind Neo4jDatabaseOperations. It
+    holds the Entry, Entity, Assembly, UniProt, RfamFamily and Complex data
+    read by the process in memory and answers every named statement in
+    queries.py with the same rows as Neo4j, so that the whole process can be
+    run and profiled without a graph db
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # UNIQID -> properties, plus ENTRY_ID, TAX_ID, UNIPROT, RFAM and
+        # ANTIBODY standing for the entity relationships
+        self.entities = {}
+        # UNIQID -> properties, plus ENTITIES: entity UNIQID -> number of chains
+        self.assemblies = {}
+        # ACCESSION -> properties, plus TAX_ID
+        self.uniprots = {}
+        # RFAM_ACC -> properties
+        self.rfam_families = {}
+        # COMPLEX_ID -> properties, plus COMPONENTS: (accession, stoichiometry,
+        # tax ID) tuples and ENTRIES: entry IDs
+        self.complexes = {}
+        # COMPLEX_ID -> properties, plus COMPONENTS: set of (label, key,
+        # stoichiometry) tuples
+        self.pdb_complexes = {}
+        self.unmapped_polymers = set()
+        self.same_as = set()
+        self.subcomplexes = set()
+        self.indexes = []
+        # incremented by every write statement, as Neo4j does per transaction
+        self.last_committed_tx_id = 0
+        self.handlers = {
+            getattr(qy, name).strip(): getattr(self, f"_{name.lower()}")
+            for name in dir(qy)
+            if name.endswith(("_QUERY", "_STATEMENT"))
+            and not name.startswith("CREATE_")
+        }
+
+    def add_entity(
+        self,
+        entry_id,
+        entity_id,
+        description,
+        polymer_type="P",
+        length=100,
+        tax_id=None,
+        uniprot=None,
+        rfam=None,
+        antibody=False,
+    ):
+        uniqid = f"{entry_id}_{entity_id}"
+        self.entities[uniqid] = {
+            "ID": str(entity_id),
+            "UNIQID": uniqid,
+            "ENTRY_ID": entry_id,
+            "TYPE": "p",
+            "POLYMER_TYPE": polymer_type,
+            "DESCRIPTION": description,
+            "NUMBER_POLY_SEQ": str(length),
+            "TAX_ID": tax_id,
+            "UNIPROT": uniprot,
+            "RFAM": rfam,
+            "ANTIBODY": antibody,
+        }
+        return uniqid
+
+    def add_assembly(self, entry_id, assembly_id, entities, prefered=True):
+        uniqid = f"{entry_id}_{assembly_id}"
+        self.assemblies[uniqid] = {
+            "UNIQID": uniqid,
+            "ENTRY_ID": entry_id,
+            "PREFERED": str(prefered),
+            "ENTITIES": {
+                entity_uniqid: str(num_chains)
+                for entity_uniqid, num_chains in entities.items()
+            },
+        }
+        return uniqid
+
+    def add_uniprot(self, accession, description, tax_id):
+        self.uniprots[accession] = {
+            "ACCESSION": accession,
+            "DESCR": description,
+            "TAX_ID": tax_id,
+        }
+
+    def add_rfam_family(self, rfam_acc, description):
+        self.rfam_families[rfam_acc] = {
+            "RFAM_ACC": rfam_acc,
+            "DESCRIPTION": description,
+        }
+
+    def add_complex(self, complex_id, components, entries=()):
+        self.complexes[complex_id] = {
+            "COMPLEX_ID": complex_id,
+            "COMPONENTS": [
+                (accession, str(stoichiometry), self.uniprots[accession]["TAX_ID"])
+                for accession, stoichiometry in components
+            ],
+            "ENTRIES": list(entries),
+        }
+
+    @classmethod
+    def synthetic(cls, num_entries, seed=0):
+        """
+        Builds a graph with num_entries synthetic PDB entries. Proteins are
+        drawn from a pool in which a few accessions are far more common than
+        the others, as in the PDB archive, so that many entries share their
+        composition. Some entries have Rfam families, unmapped polymers or
+        proteins without a UniProt mapping, and some compositions are in the
+        Complex Portal
+
+        Args:
+            num_entries (int): number of PDB entries
+            seed (int, optional): random seed. Defaults to 0.
+
+        Returns:
+            InMemoryGraph: graph with the synthetic data
+        """
+        rng = random.Random(seed)
+        graph = cls()
+        tax_ids = ["9606", "10090", "562", "559292", "83333"]
+        num_accessions = max(10, num_entries // 2)
+        accessions = [f"S{i:05d}" for i in range(num_accessions)]
+        weights = [1 / (rank + 1) for rank in range(num_accessions)]
+        for i, accession in enumerate(accessions):
+            graph.add_uniprot(accession, f"Protein {i}", tax_ids[i % len(tax_ids)])
+        rfam_accs = [f"RF{i:05d}" for i in range(1, 51)]
+        for rfam_acc in rfam_accs:
+            graph.add_rfam_family(rfam_acc, f"RNA family {rfam_acc}")
+
+        compositions = []
+        for i in range(num_entries):
+            entry_id = f"{i:x}".rjust(4, "0")
+            num_proteins = rng.choice([1, 1, 1, 2, 2, 3, 4, 6])
+            chosen = sorted(set(rng.choices(accessions, weights, k=num_proteins)))
+            entity_chains = {}
+            for entity_id, accession in enumerate(chosen, start=1):
+                uniqid = graph.add_entity(
+                    entry_id,
+                    entity_id,
+                    f"Protein {accession}",
+                    tax_id=graph.uniprots[accession]["TAX_ID"],
+                    uniprot=accession,
+                    antibody=rng.random() < 0.02,
+                )
+                entity_chains[uniqid] = rng.choice([1, 1, 2, 2, 3, 4, 6])
+            entity_id = len(chosen)
+            extra = rng.random()
+            if extra < 0.05:
+                entity_id += 1
+                uniqid = graph.add_entity(
+                    entry_id,
+                    entity_id,
+                    "16S ribosomal RNA",
+                    polymer_type="R",
+                    length=1500,
+                    rfam=rng.choice(rfam_accs),
+                )
+                entity_chains[uniqid] = 1
+            elif extra < 0.1:
+                entity_id += 1
+                uniqid = graph.add_entity(
+                    entry_id,
+                    entity_id,
+                    "DNA",
+                    polymer_type=rng.choice(["D", "R", "D/R"]),
+                    length=20,
+                )
+                entity_chains[uniqid] = 2
+            elif extra < 0.15:
+                entity_id += 1
+                uniqid = graph.add_entity(
+                    entry_id,
+                    entity_id,
+                    "peptide",
+                    length=rng.choice([8, 15, 40]),
+                    tax_id=rng.choice([None, "32630"]),
+                )
+                entity_chains[uniqid] = 1
+            graph.add_assembly(entry_id, 1, entity_chains)
+            if rng.random() < 0.1:
+                graph.add_assembly(entry_id, 2, entity_chains, prefered=False)
+            compositions.append(
+                (
+                    entry_id,
+                    [
+                        (graph.entities[uniqid]["UNIPROT"], num_chains)
+                        for uniqid, num_chains in entity_chains.items()
+                        if graph.entities[uniqid]["UNIPROT"]
+                    ],
+                )
+            )
+
+        num_complexes = 0
+        for entry_id, components in compositions:
+            if components and rng.random() < 0.05:
+                num_complexes += 1
+                graph.add_complex(f"CPX-{num_complexes}", components, [entry_id])
+        logger.info(
+            f"Built a synthetic graph of {num_entries} entries, "
+            f"{len(graph.entities)} entities, {len(graph.uniprots)} UniProt "
+            f"accessions and {len(graph.complexes)} Complex Portal complexes"
+        )
+        return graph
+
+    def run(self, query, param=None):
+        """
+        Runs one of the statements in queries.py
+
+        Args:
+            query (str): statement from queries.py
+            param (dict, optional): statement parameters. Defaults to None.
+
+        Returns:
+            MemoryResult: result rows
+        """
+        param = param or {}
+        with self.lock:
+            statement = query.strip()
+            handler = self.handlers.get(statement)
+            if handler is not None:
+                result = MemoryResult(handler(**param))
+            elif statement.startswith(("CREATE INDEX", "CREATE CONSTRAINT")):
+                result = MemoryResult(self._create_index(statement))
+            else:
+                raise ValueError(
+                    f"Statement not supported by InMemoryGraph: {statement}"
+                )
+            if WRITE_CLAUSES.search(statement):
+                self.last_committed_tx_id += 1
+            return result
+
+    # reads
+
+    def _complex_portal_data_query(self):
+        rows = []
+        for complex_id, complex in self.complexes.items():
+            uniq_accessions = sorted(
+                {
+                    f"{accession}_{stoichiometry}_{tax_id}"
+                    for accession, stoichiometry, tax_id in complex["COMPONENTS"]
+                }
+            )
+            rows.append(
+                {
+                    "complex_id": complex_id,
+                    "uniq_accessions": uniq_accessions,
+                    "entries": list(complex["ENTRIES"]),
+                }
+            )
+        return rows
+
+    def _pdb_assembly_data_query(self):
+        assemblies_per_accessions = {}
+        for assembly_id, assembly in self.assemblies.items():
+            if assembly["PREFERED"] != "True":
+                continue
+            accessions = self._get_assembly_accessions(assembly)
+            if accessions:
+                assemblies_per_accessions.setdefault(
+                    tuple(sorted(accessions)), []
+                ).append(assembly_id)
+        return [
+            {"accessions": list(accessions), "assemblies": sorted(assemblies)}
+            for accessions, assemblies in sorted(assemblies_per_accessions.items())
+        ]
+
+    def _pdb_assembly_composition_query(self, shard_keys):
+        rows = []
+        for assembly_id, assembly in self.assemblies.items():
+            entry_id = assembly_id.split("_")[0]
+            if assembly["PREFERED"] != "True" or entry_id[-1:] not in shard_keys:
+                continue
+            accessions = self._get_assembly_accessions(assembly)
+            if accessions:
+                rows.append(
+                    {"assembly_id": assembly_id, "accessions": sorted(accessions)}
+                )
+        return rows
+
+    def _get_assembly_accessions(self, assembly):
+        accessions = set()
+        for entity_uniqid, num_chains in assembly["ENTITIES"].items():
+            accession = self._get_assembly_accession(entity_uniqid, num_chains)
+            if accession is not None:
+                accessions.add(accession)
+        return accessions
+
+    def _get_assembly_accession(self, entity_uniqid, num_chains):
+        entity = self.entities[entity_uniqid]
+        if entity["UNIPROT"]:
+            tax_id = self.uniprots[entity["UNIPROT"]]["TAX_ID"]
+            return f"{entity['UNIPROT']}_{num_chains}_{tax_id}"
+        if entity["RFAM"]:
+            return entity["RFAM"]
+        if entity["POLYMER_TYPE"] in UNMAPPED_POLYMER_TYPES:
+            return f"{UNMAPPED_POLYMER_TYPES[entity['POLYMER_TYPE']]}:UNMAPPED"
+        if entity["POLYMER_TYPE"] == "P":
+            return f"NA_{entity_uniqid}_{num_chains}"
+        return None
+
+    def _pdb_complex_query(self):
+        rows = []
+        for complex_id, pdb_complex in self.pdb_complexes.items():
+            for label, key, stoichiometry in sorted(pdb_complex["COMPONENTS"], key=str):
+                row = {
+                    "complex_id": complex_id,
+                    "component_db": [label],
+                    "component_type": None,
+                    "stoichiometry": stoichiometry,
+                    "accession": None,
+                    "rfam_accession": None,
+                    "polymer_type": None,
+                    "taxonomy": None,
+                    "entry_assembly": None,
+                    "entity": None,
+                    "antibody": False,
+                    "entity_length": None,
+                }
+                if label == "UniProt":
+                    row["accession"] = key
+                    row["taxonomy"] = self.uniprots[key]["TAX_ID"]
+                elif label == "Entity":
+                    entity = self.entities[key]
+                    row["component_type"] = entity["TYPE"]
+                    row["polymer_type"] = entity["POLYMER_TYPE"]
+                    row["taxonomy"] = entity["TAX_ID"]
+                    row["entity"] = key
+                    row["antibody"] = entity["ANTIBODY"]
+                    row["entity_length"] = entity["NUMBER_POLY_SEQ"]
+                elif label == "RfamFamily":
+                    row["rfam_accession"] = key
+                elif label == "UnmappedPolymer":
+                    row["component_type"] = key
+                elif label == "Assembly":
+                    row["entry_assembly"] = key
+                    row["entity"] = key
+                rows.append(row)
+        return rows
+
+    def _pdb_complex_grouped_query(self):
+        rows = {}
+        for row in self._pdb_complex_query():
+            grouped = rows.setdefault(
+                row["complex_id"],
+                {"complex_id": row["complex_id"], "assemblies": [], "components": []},
+            )
+            if row["component_db"] == ["Assembly"]:
+                grouped["assemblies"].append(row["entry_assembly"])
+            else:
+                component = dict(row)
+                del component["complex_id"], component["entry_assembly"]
+                grouped["components"].append(component)
+        return list(rows.values())
+
+    def _entity_query(self, entity_uniqids):
+        return [
+            {
+                "entity_uniqid": uniqid,
+                "description": self.entities[uniqid]["DESCRIPTION"],
+            }
+            for uniqid in entity_uniqids
+            if uniqid in self.entities
+        ]
+
+    def _uniprot_query(self, accessions):
+        return [
+            {"accession": accession, "description": self.uniprots[accession]["DESCR"]}
+            for accession in accessions
+            if accession in self.uniprots
+        ]
+
+    def _rfam_query(self, accessions):
+        return [
+            {
+                "accession": rfam_acc,
+                "description": self.rfam_families[rfam_acc]["DESCRIPTION"],
+            }
+            for rfam_acc in accessions
+            if rfam_acc in self.rfam_families
+        ]
+
+    def _pdb_complex_relationships_query(self):
+        return [
+            {
+                "complex_id": complex_id,
+                "components": [
+                    list(component) for component in pdb_complex["COMPONENTS"]
+                ],
+                "complex_portal_ids": [
+                    complex_portal_id
+                    for pdb_complex_id, complex_portal_id in self.same_as
+                    if pdb_complex_id == complex_id
+                ],
+            }
+            for complex_id, pdb_complex in self.pdb_complexes.items()
+        ]
+
+    def _pdb_complex_name_query(self):
+        return [
+            {"complex_id": complex_id, "complex_name": pdb_complex.get("COMPLEX_NAME")}
+            for complex_id, pdb_complex in self.pdb_complexes.items()
+        ]
+
+    def _subcomplex_query(self):
+        # counts the components each pair of complexes shares, as the Cypher
+        # statement does, rather than testing for containment
+        complexes_per_component = {}
+        for complex_id, components in self._get_compositions().items():
+            for component in components:
+                complexes_per_component.setdefault(component, []).append(complex_id)
+        rows = []
+        for src_complex_id, components in self._get_compositions().items():
+            shared = {}
+            for component in components:
+                for dest_complex_id in complexes_per_component[component]:
+                    if dest_complex_id != src_complex_id:
+                        shared[dest_complex_id] = shared.get(dest_complex_id, 0) + 1
+            rows.extend(
+                {"src_complex_id": src_complex_id, "dest_complex_id": dest_complex_id}
+                for dest_complex_id, num_shared in shared.items()
+                if num_shared == len(components)
+            )
+        return rows
+
+    def _get_compositions(self):
+        return {
+            complex_id: {
+                (label, key, stoichiometry or "")
+                for label, key, stoichiometry in pdb_complex["COMPONENTS"]
+                if label != "Assembly"
+            }
+            for complex_id, pdb_complex in self.pdb_complexes.items()
+        }
+
+    def _count_pdb_complex_nodes_query(self):
+        return [{"total": len(self.pdb_complexes)}]
+
+    def _count_subcomplex_relation_query(self):
+        return [{"total": len(self.subcomplexes)}]
+
+    def _node_count_statement(self):
+        count = (
+            len(self.entities)
+            + len(self.assemblies)
+            + len(self.uniprots)
+            + len(self.rfam_families)
+            + len(self.complexes)
+            + len(self.pdb_complexes)
+            + len(self.unmapped_polymers)
+        )
+        return [{"count(n)": count}]
+
+    def _relationship_count_statement(self):
+        count = (
+            sum(len(assembly["ENTITIES"]) for assembly in self.assemblies.values())
+            + sum(len(c["COMPONENTS"]) for c in self.pdb_complexes.values())
+            + sum(len(c["COMPONENTS"]) for c in self.complexes.values())
+            + len(self.same_as)
+            + len(self.subcomplexes)
+        )
+        return [{"count(r)": count}]
+
+    def _last_committed_tx_statement(self):
+        return [
+            {
+                "last_committed_tx_ids": [
+                    f"org.neo4j:instance=kernel#0,name=Transactions="
+                    f"{self.last_committed_tx_id}"
+                ]
+            }
+        ]
+
+    def _show_indexes_statement(self):
+        return list(self.indexes)
+
+    # writes
+
+    def _merge_pdb_complex(self, complex_id):
+        return self.pdb_complexes.setdefault(
+            complex_id, {"COMPLEX_ID": complex_id, "COMPONENTS": set()}
+        )
+
+    def _merge_component(self, row, label, key, stoichiometry=None):
+        self._merge_pdb_complex(row["complex_id"])["COMPONENTS"].add(
+            (label, key, stoichiometry)
+        )
+
+    def _merge_accession_query(self, accession_params_list):
+        for row in accession_params_list:
+            if row["accession"] in self.uniprots:
+                self._merge_component(
+                    row, "UniProt", row["accession"], row["stoichiometry"]
+                )
+        return []
+
+    def _merge_entity_query(self, entity_params_list):
+        for row in entity_params_list:
+            uniqid = f"{row['entry_id']}_{row['entity_id']}"
+            entity = self.entities.get(uniqid)
+            if entity and entity["ENTRY_ID"] == row["entry_id"]:
+                self._merge_component(row, "Entity", uniqid, row["stoichiometry"])
+        return []
+
+    def _merge_assembly_query(self, assembly_params_list):
+        for row in assembly_params_list:
+            assembly = self.assemblies.get(row["assembly_id"])
+            if assembly and assembly["ENTRY_ID"] == row["entry_id"]:
+                self._merge_component(row, "Assembly", row["assembly_id"])
+        return []
+
+    def _merge_rfam_query(self, rfam_params_list):
+        for row in rfam_params_list:
+            if row["rfam_acc"] in self.rfam_families:
+                self._merge_component(row, "RfamFamily", row["rfam_acc"])
+        return []
+
+    def _merge_unmapped_polymer_query(self, unmapped_polymer_params_list):
+        for row in unmapped_polymer_params_list:
+            self.unmapped_polymers.add(row["polymer_type"])
+            self._merge_component(row, "UnmappedPolymer", row["polymer_type"])
+        return []
+
+    def _common_complex_query(self, complex_params_list):
+        for row in complex_params_list:
+            if (
+                row["pdb_complex_id"] in self.pdb_complexes
+                and row["complex_portal_id"] in self.complexes
+            ):
+                self.same_as.add((row["pdb_complex_id"], row["complex_portal_id"]))
+        return []
+
+    def _merge_subcomplex_query(self, subcomplex_params_list):
+        for row in subcomplex_params_list:
+            if (
+                row["src_complex_id"] in self.pdb_complexes
+                and row["dest_complex_id"] in self.pdb_complexes
+            ):
+                self.subcomplexes.add((row["src_complex_id"], row["dest_complex_id"]))
+        return []
+
+    def _set_complex_names_query(self, complex_name_params_list):
+        for row in complex_name_params_list:
+            pdb_complex = self.pdb_complexes.get(row["pdb_complex_id"])
+            if pdb_complex is not None:
+                pdb_complex["COMPLEX_NAME"] = row["complex_name"]
+        return []
+
+    def _load_complex_names_query(self, file_url):
+        return self._set_complex_names_query(self._read_csv(file_url))
+
+    # LOAD CSV
+
+    def _read_csv(self, file_url):
+        with open(urlparse(file_url).path, newline="") as load_file:
+            return list(csv.DictReader(load_file))
+
+    def _load_accession_query(self, file_url):
+        return self._merge_accession_query(self._read_csv(file_url))
+
+    def _load_entity_query(self, file_url):
+        return self._merge_entity_query(self._read_csv(file_url))
+
+    def _load_assembly_query(self, file_url):
+        return self._merge_assembly_query(self._read_csv(file_url))
+
+    def _load_rfam_query(self, file_url):
+        return self._merge_rfam_query(self._read_csv(file_url))
+
+    def _load_unmapped_polymer_query(self, file_url):
+        return self._merge_unmapped_polymer_query(self._read_csv(file_url))
+
+    def _load_common_complex_query(self, file_url):
+        return self._common_complex_query(self._read_csv(file_url))
+
+    def _load_subcomplex_query(self, file_url):
+        return self._merge_subcomplex_query(self._read_csv(file_url))
+
+    # deletions
+
+    def _detach_delete_pdb_complex(self, complex_id):
+        del self.pdb_complexes[complex_id]
+        self.same_as = {pair for pair in self.same_as if pair[0] != complex_id}
+        self.subcomplexes = {
+            pair for pair in self.subcomplexes if complex_id not in pair
+        }
+
+    def _delete_all_pdb_complexes_query(self):
+        self.pdb_complexes = {}
+        self.same_as = set()
+        self.subcomplexes = set()
+        return []
+
+    def _drop_pdb_complex_nodes_query(self, batch_size):
+        complex_ids = list(self.pdb_complexes)[:batch_size]
+        for complex_id in complex_ids:
+            self._detach_delete_pdb_complex(complex_id)
+        return [{"deleted": len(complex_ids)}]
+
+    def _drop_subcomplex_relation_query(self, batch_size):
+        pairs = list(self.subcomplexes)[:batch_size]
+        self.subcomplexes.difference_update(pairs)
+        return [{"deleted": len(pairs)}]
+
+    def _delete_pdb_complexes_query(self, pdb_complex_ids):
+        for row in pdb_complex_ids:
+            if row["complex_id"] in self.pdb_complexes:
+                self._detach_delete_pdb_complex(row["complex_id"])
+        return []
+
+    def _delete_component_relation_query(self, stale_component_params_list):
+        for row in stale_component_params_list:
+            pdb_complex = self.pdb_complexes.get(row["complex_id"])
+            if pdb_complex is None:
+                continue
+            pdb_complex["COMPONENTS"] = {
+                (label, key, stoichiometry)
+                for label, key, stoichiometry in pdb_complex["COMPONENTS"]
+                if (label, key, stoichiometry or "")
+                != (row["label"], row["key"], row["stoichiometry"])
+            }
+        return []
+
+    def _delete_same_as_relation_query(self, stale_complex_params_list):
+        self.same_as.difference_update(
+            (row["pdb_complex_id"], row["complex_portal_id"])
+            for row in stale_complex_params_list
+        )
+        return []
+
+    def _drop_subcomplex_relation_for_complexes_query(self, pdb_complex_ids):
+        pdb_complex_ids = set(pdb_complex_ids)
+        self.subcomplexes = {
+            (src_complex_id, dest_complex_id)
+            for src_complex_id, dest_complex_id in self.subcomplexes
+            if src_complex_id not in pdb_complex_ids
+            and dest_complex_id not in pdb_complex_ids
+        }
+        return []
+
+    # schema
+
+    def _create_index(self, statement):
+        match = re.search(r"\(n:(\w+)\) (?:ON \(n\.|REQUIRE n\.)(\w+)", statement)
+        self.indexes.append(
+            {
+                "labelsOrTypes": [match.group(1)],
+                "properties": [match.group(2)],
+                "state": "ONLINE",
+                "type": "RANGE",
+                "entityType": "NODE",
+            }
+        )
+        return []
+
+    def _await_indexes_statement(self, timeout):
+        return []
@@ -1,51 +1,152 @@
-from py2neo import Graph
+import time
 
+from py2neo.client import Connection
+from py2neo.cypher import Cursor
+
+from pdbe_complexes.constants import (
+    neo4j_batch_size,
+    neo4j_delete_batch_size,
+    neo4j_fetch_size,
+)
 from pdbe_complexes.log import logger
+from pdbe_complexes.utils.batch_writer import BatchWriter
+from pdbe_complexes.utils.connection_manager import connection_manager
+from pdbe_complexes.utils.query_cache import query_cache
+from pdbe_complexes.utils.query_profiler import query_profiler
 
 
 class Neo4jDatabaseOperations:
-    def __init__(self, connection_params) -> None:
+    def __init__(
+        self,
+        connection_params,
+        manager=None,
+        batch_size=neo4j_batch_size,
+        fetch_size=neo4j_fetch_size,
+        delete_batch_size=neo4j_delete_batch_size,
+        backend=None,
+    ) -> None:
         self.neo4j_info = connection_params
+        # any object answering run(query, param) with the rows of the
+        # statements in queries.py, e.g. an InMemoryGraph, replaces Neo4j
+        self.backend = backend
+        self.connection_manager = manager if manager else connection_manager
+        self.fetch_size = fetch_size
+        self.profiler = query_profiler
+        self.query_cache = query_cache
+        self.batch_writer = BatchWriter(
+            self, batch_size=batch_size, delete_batch_size=delete_batch_size
+        )
+        self.write_stats = {}
+
+    @property
+    def graph(self):
+        """
+        The pooled py2neo Graph shared by every object in the process that
+        uses the same connection parameters
+        """
+        return self.connection_manager.get_graph(self.neo4j_info)
 
     def _create_nodes_relationship(
         self, query_name, n1_name, n2_name, param_name, param_val
     ):
         """
-        Runs Neo4j query to create a relationship between a given pair of nodes
+        Runs Neo4j query to create a relationship between a given pair of nodes.
+        The rows in param_val are written in chunks, one transaction per chunk
 
         Args:
             query_name (string): Neo4j query
             n1_name (string): first node name
             n2_name (string): second node name
             param_name (string): parameter name
-            param_val (string): parameter value
+            param_val (list of dict): parameter value
         """
         logger.info(
             f"Creating relationship between {n1_name} and {n2_name} nodes - START"
         )
-        self.run_query(
-            query_name,
-            param={param_name: param_val},
+        self.write_stats[param_name] = self.batch_writer.write(
+            query_name, param_name, param_val, f"{n1_name}-{n2_name}"
         )
         logger.info(
             f"Creating relationship between {n1_name} and {n2_name} nodes - DONE"
         )
 
-    def run_query(self, query, param=None):
+    def run_query(self, query, param=None, stream=False, cached=False):
         """General function to run neo4j query
 
         Args:
             query (str): neo4j query
             param (list of dict, optional): neo4j query params. Defaults to None.
+            stream (bool, optional): pull the records lazily, fetch_size records
+                                     per round trip. Defaults to False.
+            cached (bool, optional): read the result set from the on-disk query
+                                     cache when it is enabled. Defaults to False.
 
         Returns:
             obj: neo4j query result
         """
-        graph = Graph(
-            self.neo4j_info[0], user=self.neo4j_info[1], password=self.neo4j_info[2]
-        )
+        if cached and self.query_cache.enabled:
+            return self.query_cache.run(self, query, param, stream)
+        if self.backend is not None:
+            result = self.backend.run(query, param)
+            return iter(result) if stream else result
+        if stream:
+            return self._stream_query(query, param)
+
+        graph = self.graph
+        start = time.perf_counter()
 
         if param:
-            return graph.run(query, parameters=param)
+            result = graph.run(self.profiler.prefix(query), parameters=param)
         else:
-            return graph.run(query)
+            result = graph.run(self.profiler.prefix(query))
+
+        if self.profiler.enabled:
+            self.profiler.record(query, result.summary(), time.perf_counter() - start)
+        return result
+
+    def _stream_query(self, query, param=None):
+        """
+        Runs a read query in an explicit read-only transaction and yields its
+        records, pulling the next fetch_size records from the server only
+        once the previous ones have been consumed
+
+        Args:
+            query (str): neo4j query
+            param (dict, optional): neo4j query params. Defaults to None.
+
+        Yields:
+            obj: neo4j record
+        """
+        graph = self.graph
+        connector = graph.service.connector
+        hydrant = Connection.default_hydrant(connector.profile, graph)
+        tx = graph.begin(readonly=True)
+        num_pulls = 0
+        num_records = 0
+        start = time.perf_counter()
+        try:
+            result = connector.run(tx.ref, self.profiler.prefix(query), param or {})
+            cursor = Cursor(result, hydrant)
+            has_more = True
+            while has_more:
+                try:
+                    connector.pull(result, n=self.fetch_size)
+                except IndexError:
+                    # the server does not support flow control; pull everything
+                    connector.pull(result)
+                num_pulls += 1
+                while cursor.forward():
+                    num_records += 1
+                    yield cursor.current
+                has_more = result.has_more_records()
+            graph.commit(tx)
+            if self.profiler.enabled:
+                self.profiler.record(
+                    query, result.summary(), time.perf_counter() - start
+                )
+        finally:
+            graph.rollback(tx)
+            logger.info(
+                f"Streamed {num_records} records in {num_pulls} round trips "
+                f"of up to {self.fetch_size} ({time.perf_counter() - start:.1f}s)"
+            )
@@ -0,0 +1,274 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+import pyarrow as pa
+from py2neo.errors import Neo4jError
+from pyarrow import feather
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.constants import query_cache_ttl
+from pdbe_complexes.log import logger
+
+# labels, relationship types and properties of the PDB complexes
+PDB_COMPLEX_SCOPE = (
+    "PDBComplex",
+    "UnmappedPolymer",
+    "IS_PART_OF_PDB_COMPLEX",
+    "SAME_AS",
+    "IS_SUB_COMPLEX_OF",
+)
+
+# write statements of the process -> the labels, relationship types and
+# properties they change. A cached query naming none of them keeps its result
+# set across the write
+WRITE_SCOPES = {
+    query.strip(): scope
+    for queries, scope in (
+        (
+            (
+                qy.MERGE_ACCESSION_QUERY,
+                qy.MERGE_ENTITY_QUERY,
+                qy.MERGE_ASSEMBLY_QUERY,
+                qy.MERGE_RFAM_QUERY,
+                qy.MERGE_UNMAPPED_POLYMER_QUERY,
+                qy.COMMON_COMPLEX_QUERY,
+                qy.MERGE_SUBCOMPLEX_QUERY,
+                qy.DROP_PDB_COMPLEX_NODES_QUERY,
+                qy.DROP_SUBCOMPLEX_RELATION_QUERY,
+                qy.DELETE_PDB_COMPLEXES_QUERY,
+                qy.DELETE_COMPONENT_RELATION_QUERY,
+                qy.DELETE_SAME_AS_RELATION_QUERY,
+            ),
+            PDB_COMPLEX_SCOPE,
+        ),
+        ((qy.SET_COMPLEX_NAMES_QUERY,), ("COMPLEX_NAME",)),
+    )
+    for query in queries
+}
+
+
+class QueryCache:
+    """
+    This class keeps the result sets of large read queries on disk as Arrow
+    (Feather) files, so that reruns do not have to read them from the graph
+    db again. A result set is keyed on the query and its parameters, and is
+    only used while the last committed transaction ID of the graph db, which
+    changes on every write, is the one it was read at.
+
+    The writes of the process itself move the result sets they cannot change
+    to the new transaction ID, e.g. setting the complex names keeps the PDB
+    complex data, so that a rerun still finds them
+    """
+
+    def __init__(self):
+        self.cache_path = None
+        self.ttl = query_cache_ttl
+        self.refresh = False
+        self.has_tx_ids = True
+        self.refreshed = set()
+
+    @property
+    def enabled(self):
+        return self.cache_path is not None
+
+    def configure(self, cache_path, ttl=query_cache_ttl, refresh=False):
+        """
+        Enables the cache and evicts the expired result sets
+
+        Args:
+            cache_path (str): dir where the result sets are kept
+            ttl (int, optional): seconds after which a result set expires
+            refresh (bool, optional): read every query from the graph db again
+                                      and overwrite the cached result sets
+        """
+        os.makedirs(cache_path, exist_ok=True)
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.refresh = refresh
+        self.has_tx_ids = True
+        self.refreshed = set()
+        self.evict()
+
+    def disable(self):
+        self.cache_path = None
+
+    def get_fingerprint(self, ndo):
+        """
+        Returns the last committed transaction ID of the graph db, read from
+        its JMX beans, so that any write, including one that only changes
+        properties, misses the cached result sets. The fingerprint is read
+        again for every query, as other processes may write in between.
+        When the JMX procedure is not available, the number of nodes and
+        relationships is used instead, which misses property changes
+
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+
+        Returns:
+            str: graph db fingerprint
+        """
+        if self.has_tx_ids:
+            try:
+                tx_ids = ndo.run_query(qy.LAST_COMMITTED_TX_STATEMENT).evaluate()
+            except Neo4jError as error:
+                tx_ids = None
+                logger.warning(f"Could not read the last committed tx ID: {error}")
+            if tx_ids:
+                # the bean names hold commas
+                return ";".join(tx_ids)
+            self.has_tx_ids = False
+            logger.warning(
+                "Keying the query cache on the node and relationship counts, "
+                "use --refresh-cache after changing properties only"
+            )
+        nodes = ndo.run_query(qy.NODE_COUNT_STATEMENT).evaluate()
+        relationships = ndo.run_query(qy.RELATIONSHIP_COUNT_STATEMENT).evaluate()
+        return f"{nodes}:{relationships}"
+
+    def get_key(self, query, param=None):
+        key = json.dumps([query.strip(), param or {}], sort_keys=True)
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    def run(self, ndo, query, param=None, stream=False):
+        """
+        Returns the cached result set of the query, or runs the query and
+        caches its result set
+
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+            query (str): neo4j query
+            param (dict, optional): neo4j query params. Defaults to None.
+            stream (bool, optional): stream the query when it is not cached
+
+        Returns:
+            list of dict: query result rows
+        """
+        key = self.get_key(query, param)
+        path = os.path.join(self.cache_path, f"{key}.feather")
+        fingerprint = self.get_fingerprint(ndo)
+        if (
+            self._is_fresh(path)
+            and self._read_entry(key).get("fingerprint") == fingerprint
+            and not (self.refresh and key not in self.refreshed)
+        ):
+            start = time.perf_counter()
+            rows = feather.read_table(path, memory_map=True).to_pylist()
+            logger.info(
+                f"Read {len(rows)} cached rows from {path} "
+                f"({time.perf_counter() - start:.1f}s)"
+            )
+            return rows
+
+        rows = [dict(record.items()) for record in ndo.run_query(query, param, stream)]
+        try:
+            # write to a temporary file first so a crash never leaves a
+            # truncated result set behind
+            feather.write_feather(pa.Table.from_pylist(rows), f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            self._write_entry(key, {"query": query.strip(), "fingerprint": fingerprint})
+            self.refreshed.add(key)
+            logger.info(f"Cached {len(rows)} rows in {path}")
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as error:
+            logger.warning(f"Could not cache the query result: {error}")
+        return rows
+
+    def get_write_fingerprint(self, ndo, query):
+        """
+        Returns the fingerprint of the graph db before the process runs a
+        write statement, if some cached result sets can be kept across it
+
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+            query (str): neo4j write statement
+
+        Returns:
+            str: graph db fingerprint, None if every result set is dropped
+        """
+        if not self.enabled or not self.has_tx_ids:
+            return None
+        if query.strip() not in WRITE_SCOPES:
+            return None
+        return self.get_fingerprint(ndo)
+
+    def record_write(self, ndo, query, fingerprint, num_transactions):
+        """
+        Moves the result sets read at fingerprint that the write statement
+        cannot change to the transaction ID after the write. This is only
+        done if the transaction ID has moved by at most the number of
+        transactions the write has run, i.e. no other process has written
+        in between
+
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+            query (str): neo4j write statement
+            fingerprint (str): fingerprint from get_write_fingerprint
+            num_transactions (int): transactions run by the write
+        """
+        if fingerprint is None:
+            return
+        new_fingerprint = self.get_fingerprint(ndo)
+        num_committed = self._count_transactions(fingerprint, new_fingerprint)
+        if not num_committed or num_committed > num_transactions:
+            return
+        scope = WRITE_SCOPES[query.strip()]
+        num_kept = 0
+        for entry_path in glob.glob(os.path.join(self.cache_path, "*.json")):
+            key = os.path.splitext(os.path.basename(entry_path))[0]
+            entry = self._read_entry(key)
+            if entry.get("fingerprint") != fingerprint or any(
+                re.search(rf"\b{name}\b", entry["query"]) for name in scope
+            ):
+                continue
+            self._write_entry(key, dict(entry, fingerprint=new_fingerprint))
+            num_kept += 1
+        logger.debug(f"Kept {num_kept} cached result sets across the write")
+
+    def evict(self):
+        """
+        Deletes the expired result sets
+        """
+        for path in glob.glob(os.path.join(self.cache_path, "*.feather")):
+            if not self._is_fresh(path):
+                logger.info(f"Evicting expired cached query result {path}")
+                os.remove(path)
+                entry_path = f"{os.path.splitext(path)[0]}.json"
+                if os.path.exists(entry_path):
+                    os.remove(entry_path)
+
+    def _is_fresh(self, path):
+        return os.path.exists(path) and time.time() - os.path.getmtime(path) < self.ttl
+
+    def _read_entry(self, key):
+        try:
+            with open(os.path.join(self.cache_path, f"{key}.json")) as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_entry(self, key, entry):
+        # the query and the fingerprint the result set is valid at
+        entry_path = os.path.join(self.cache_path, f"{key}.json")
+        with open(f"{entry_path}.tmp", "w") as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(f"{entry_path}.tmp", entry_path)
+
+    @staticmethod
+    def _count_transactions(fingerprint, new_fingerprint):
+        # transaction IDs are "<bean name>=<ID>" items, counts have no "="
+        try:
+            tx_ids, new_tx_ids = (
+                dict(item.rsplit("=", 1) for item in value.split(";"))
+                for value in (fingerprint, new_fingerprint)
+            )
+            if tx_ids.keys() != new_tx_ids.keys():
+                return None
+            return sum(int(new_tx_ids[name]) - int(tx_ids[name]) for name in tx_ids)
+        except ValueError:
+            return None
+
+
+query_cache = QueryCache()
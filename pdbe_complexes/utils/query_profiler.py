@@ -0,0 +1,184 @@
+import json
+import os
+import re
+from datetime import datetime
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+
+PROFILE_MODE = "PROFILE"
+EXPLAIN_MODE = "EXPLAIN"
+
+# parameters that are not UNWIND lists and need a value of the right type
+SCALAR_PARAMS = {"batch_size": 1, "file_url": "file:///pdb_complex_names.csv"}
+
+
+class QueryProfiler:
+    """
+    This class collects the execution plans of the statements in queries.py
+    when they are run under PROFILE or EXPLAIN and writes them to a JSON report
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.started = None
+        self.query_names = {
+            query.strip(): name
+            for name, query in vars(qy).items()
+            if name.endswith("_QUERY") and isinstance(query, str)
+        }
+        self.report = {}
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    def enable(self, mode=PROFILE_MODE):
+        """
+        Starts profiling the statements from queries.py
+
+        Args:
+            mode (str, optional): PROFILE runs and measures each statement,
+                                  EXPLAIN only plans it. Defaults to PROFILE.
+        """
+        self.mode = mode
+        self.started = datetime.now()
+        self.report = {}
+
+    def disable(self):
+        self.mode = None
+
+    def get_query_name(self, query):
+        return self.query_names.get(query.strip())
+
+    def prefix(self, query):
+        """
+        Returns the statement prefixed with PROFILE/EXPLAIN if it is one of
+        the statements in queries.py, else the unchanged statement
+
+        Args:
+            query (str): neo4j query
+
+        Returns:
+            str: neo4j query
+        """
+        if not self.enabled or self.get_query_name(query) is None:
+            return query
+        return f"{self.mode} {query}"
+
+    def record(self, query, summary, elapsed):
+        """
+        Adds the plan of one execution of a statement to the report
+
+        Args:
+            query (str): the neo4j query without the PROFILE/EXPLAIN prefix
+            summary (dict): result summary returned by the server
+            elapsed (float): seconds spent running the query
+        """
+        name = self.get_query_name(query)
+        if not self.enabled or name is None:
+            return
+        plan = summary.get("profile") or summary.get("plan")
+        operator_tree = self._build_operator_tree(plan) if plan else {}
+        totals = self._sum_operator_tree(operator_tree)
+        entry = self.report.setdefault(
+            name,
+            {
+                "executions": 0,
+                "elapsed_seconds": 0.0,
+                "server_time_ms": 0,
+                "db_hits": 0,
+                "rows": 0,
+                "page_cache_hits": 0,
+                "page_cache_misses": 0,
+                "operator_tree": {},
+            },
+        )
+        entry["executions"] += 1
+        entry["elapsed_seconds"] += elapsed
+        entry["server_time_ms"] += summary.get("t_first", 0) + summary.get("t_last", 0)
+        entry["db_hits"] += totals["db_hits"]
+        entry["rows"] += operator_tree.get("rows", 0)
+        entry["page_cache_hits"] += totals["page_cache_hits"]
+        entry["page_cache_misses"] += totals["page_cache_misses"]
+        # keep the plan of the most expensive execution
+        if totals["db_hits"] >= entry.get("_max_db_hits", -1):
+            entry["_max_db_hits"] = totals["db_hits"]
+            entry["operator_tree"] = operator_tree
+
+    def explain_queries(self, ndo):
+        """
+        Runs every statement in queries.py under EXPLAIN. The statements are
+        planned but not executed, so nothing is written to the graph db
+
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+        """
+        self.enable(EXPLAIN_MODE)
+        for query, name in self.query_names.items():
+            # EXPLAIN needs the parameters but never reads their values
+            param = {p: SCALAR_PARAMS.get(p, []) for p in re.findall(r"\$(\w+)", query)}
+            logger.info(f"Explaining {name}")
+            ndo.run_query(query, param=param)
+
+    def write_report(self, csv_path):
+        """
+        Writes the collected plans to query_profile_<timestamp>.json
+
+        Args:
+            csv_path (str): output path
+
+        Returns:
+            str: path of the report
+        """
+        started = self.started or datetime.now()
+        filename = f"query_profile_{started.strftime('%Y%m%d_%H%M%S')}.json"
+        complete_path = os.path.join(csv_path, filename)
+        queries = {
+            name: {k: v for k, v in entry.items() if not k.startswith("_")}
+            for name, entry in self.report.items()
+        }
+        with open(complete_path, "w") as report_file:
+            json.dump(
+                {
+                    "mode": self.mode,
+                    "started": started.isoformat(),
+                    "queries": queries,
+                },
+                report_file,
+                indent=2,
+            )
+        logger.info(f"Filename {filename} has been written to {csv_path}")
+        return complete_path
+
+    def _build_operator_tree(self, plan):
+        args = plan.get("args", {})
+        return {
+            "operator": plan.get("operatorType"),
+            "details": args.get("Details", ""),
+            "identifiers": plan.get("identifiers", []),
+            "estimated_rows": args.get("EstimatedRows", 0),
+            "rows": plan.get("rows", 0),
+            "db_hits": plan.get("dbHits", 0),
+            "page_cache_hits": plan.get("pageCacheHits", 0),
+            "page_cache_misses": plan.get("pageCacheMisses", 0),
+            "time": plan.get("time", 0),
+            "children": [
+                self._build_operator_tree(child) for child in plan.get("children", [])
+            ],
+        }
+
+    def _sum_operator_tree(self, operator_tree):
+        totals = {
+            "db_hits": operator_tree.get("db_hits", 0),
+            "page_cache_hits": operator_tree.get("page_cache_hits", 0),
+            "page_cache_misses": operator_tree.get("page_cache_misses", 0),
+        }
+        for child in operator_tree.get("children", []):
+            for key, value in self._sum_operator_tree(child).items():
+                totals[key] += value
+        return totals
+
+
+# process-wide profiler shared by all Neo4jDatabaseOperations objects
+query_profiler = QueryProfiler()
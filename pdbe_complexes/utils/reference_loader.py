@@ -0,0 +1,103 @@
+import os
+import time
+
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from pyarrow import feather
+
+from pdbe_complexes.log import logger
+
+# columns of complexes_master.csv kept in the reference mapping
+REFERENCE_COLUMNS = [
+    "md5_obj",
+    "pdb_complex_id",
+    "complex_portal_id",
+    "accession",
+    "entries",
+]
+
+
+def read_reference_columns(csv_filepath, update_sidecar=True):
+    """
+    Reads the reference mapping columns of complexes_master.csv as strings
+    with the pyarrow CSV reader. The columns are kept in a Feather sidecar
+    next to the CSV file, which is read instead as long as the size and
+    modification time of the CSV file it was written from match exactly
+
+    Args:
+        csv_filepath (str): path to complexes_master.csv
+        update_sidecar (bool, optional): write the sidecar when it is missing
+                                         or stale. Defaults to True.
+
+    Returns:
+        dict: list of values of each reference column
+    """
+    start = time.perf_counter()
+    sidecar_path = get_sidecar_path(csv_filepath)
+    table = _read_sidecar(sidecar_path, csv_filepath)
+    if table is not None:
+        source = sidecar_path
+    else:
+        table = pa_csv.read_csv(
+            csv_filepath,
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=REFERENCE_COLUMNS,
+                include_missing_columns=True,
+                column_types={column: pa.string() for column in REFERENCE_COLUMNS},
+            ),
+        )
+        source = csv_filepath
+        if update_sidecar:
+            write_sidecar(table, csv_filepath)
+
+    columns = {column: table.column(column).to_pylist() for column in REFERENCE_COLUMNS}
+    logger.info(
+        f"Read {table.num_rows} reference mappings from {source} "
+        f"({time.perf_counter() - start:.1f}s)"
+    )
+    return columns
+
+
+def get_sidecar_path(csv_filepath):
+    return f"{os.path.splitext(csv_filepath)[0]}.feather"
+
+
+def _get_csv_stamp(csv_filepath):
+    # an mtime can be carried over to a different file (cp -p, rsync -a, a
+    # restore from backup), so the size is compared as well
+    stat = os.stat(csv_filepath)
+    return {b"csv_size": str(stat.st_size), b"csv_mtime_ns": str(stat.st_mtime_ns)}
+
+
+def _read_sidecar(sidecar_path, csv_filepath):
+    if not os.path.exists(sidecar_path):
+        return None
+    table = feather.read_table(sidecar_path, columns=REFERENCE_COLUMNS, memory_map=True)
+    metadata = table.schema.metadata or {}
+    stamp = _get_csv_stamp(csv_filepath)
+    if any(metadata.get(key, b"").decode() != value for key, value in stamp.items()):
+        return None
+    return table
+
+
+def write_sidecar(table, csv_filepath):
+    """
+    Writes the reference mapping columns of complexes_master.csv to its
+    Feather sidecar, along with the size and modification time of the CSV
+    file in the schema metadata
+
+    Args:
+        table (pyarrow.Table): reference columns as strings
+        csv_filepath (str): path to complexes_master.csv
+    """
+    sidecar_path = get_sidecar_path(csv_filepath)
+    try:
+        # write to a temporary file first so a crash never leaves a truncated
+        # sidecar behind
+        table = table.select(REFERENCE_COLUMNS)
+        table = table.replace_schema_metadata(_get_csv_stamp(csv_filepath))
+        feather.write_feather(table, f"{sidecar_path}.tmp")
+        os.replace(f"{sidecar_path}.tmp", sidecar_path)
+        logger.info(f"Reference mapping sidecar has been written to {sidecar_path}")
+    except OSError as error:
+        logger.warning(f"Could not write the reference mapping sidecar: {error}")
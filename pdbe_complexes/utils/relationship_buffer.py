@@ -0,0 +1,95 @@
+import sys
+from collections.abc import Sequence
+
+# columns of the relationship params of each PDBComplex relationship query
+RELATIONSHIP_COLUMNS = {
+    "accession_params_list": ("complex_id", "accession", "stoichiometry"),
+    "entity_params_list": ("complex_id", "entry_id", "entity_id", "stoichiometry"),
+    "unmapped_polymer_params_list": ("complex_id", "polymer_type"),
+    "rfam_params_list": ("complex_id", "rfam_acc"),
+    "assembly_params_list": ("complex_id", "assembly_id", "entry_id"),
+}
+
+
+class RelationshipBuffer(Sequence):
+    """
+    This class keeps the rows of a relationship params list column-wise, as
+    one list of interned strings per column, instead of one dict per row.
+    It reads like the list of dicts it replaces: indexing returns a row dict
+    and slicing returns a list of row dicts, so the driver parameters are
+    only built for the batch being sent
+    """
+
+    __slots__ = ("columns", "_values")
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self._values = tuple([] for _ in self.columns)
+
+    @classmethod
+    def from_columns(cls, data):
+        """
+        Returns the buffer of the columns written by to_columns
+
+        Args:
+            data (dict): column names and values
+
+        Returns:
+            RelationshipBuffer: buffer of the rows
+        """
+        buffer = cls(data["columns"])
+        for values, column_values in zip(buffer._values, data["values"]):
+            values.extend(sys.intern(value) for value in column_values)
+        return buffer
+
+    def to_columns(self):
+        """
+        Returns the columns of the buffer in a JSON serialisable form
+
+        Returns:
+            dict: column names and values
+        """
+        return {
+            "columns": list(self.columns),
+            "values": [list(values) for values in self._values],
+        }
+
+    def append(self, *values):
+        """
+        Adds one row
+
+        Args:
+            *values (str): value of each column, in column order
+        """
+        if len(values) != len(self.columns):
+            raise ValueError(
+                f"Expected {len(self.columns)} values for {self.columns}, "
+                f"got {len(values)}"
+            )
+        for column_values, value in zip(self._values, values):
+            column_values.append(sys.intern(value))
+
+    def __len__(self):
+        return len(self._values[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [
+                dict(zip(self.columns, row))
+                for row in zip(*(values[index] for values in self._values))
+            ]
+        return dict(zip(self.columns, (values[index] for values in self._values)))
+
+    def __iter__(self):
+        for row in zip(*self._values):
+            yield dict(zip(self.columns, row))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            row == other_row for row, other_row in zip(self, other)
+        )
+
+    def __repr__(self):
+        return f"RelationshipBuffer({self.columns!r}, {len(self)} rows)"
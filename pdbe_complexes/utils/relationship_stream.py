@@ -0,0 +1,133 @@
+import queue
+import threading
+
+from pdbe_complexes.log import logger
+from pdbe_complexes.utils.relationship_buffer import (
+    RELATIONSHIP_COLUMNS,
+    RelationshipBuffer,
+)
+
+# put on the queue to stop the writer thread
+STOP = object()
+
+
+class RelationshipStream:
+    """
+    This class writes relationship params rows to the graph db while they are
+    still being produced. The rows are collected in one RelationshipBuffer per
+    params list, and every buffer that reaches the batch size is handed to a
+    writer thread through a bounded queue. At most max_pending batches wait
+    to be written, so the producer blocks when the graph db falls behind and
+    the memory used by the rows does not grow with the number of rows
+    """
+
+    def __init__(self, ndo, queries, max_pending):
+        """
+        Args:
+            ndo (Neo4jDatabaseOperations): graph db operations object
+            queries (dict): query and node names of each params list
+            max_pending (int): max number of full batches waiting to be written
+        """
+        self.ndo = ndo
+        self.queries = queries
+        self.flush_size = ndo.batch_writer.batch_size
+        self.buffers = {
+            param_name: RelationshipBuffer(RELATIONSHIP_COLUMNS[param_name])
+            for param_name in queries
+        }
+        self.stats = {
+            param_name: {"rows": 0, "chunks": 0, "seconds": 0.0}
+            for param_name in queries
+        }
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._write_batches, name="relationship-stream", daemon=True
+        )
+        self.thread.start()
+
+    def append(self, param_name, *values):
+        """
+        Adds one row, writing the buffer of param_name once it is full
+
+        Args:
+            param_name (str): name of the relationship params list
+            *values (str): value of each column, in column order
+        """
+        buffer = self.buffers[param_name]
+        buffer.append(*values)
+        if len(buffer) >= self.flush_size:
+            self._flush(param_name)
+
+    def close(self):
+        """
+        Writes the remaining rows and waits for the writer thread to finish
+
+        Returns:
+            dict: number of rows and chunks written and seconds spent writing
+            for each params list
+        """
+        for param_name in self.buffers:
+            self._flush(param_name)
+        self._stop()
+        for param_name, stats in self.stats.items():
+            seconds = stats["seconds"]
+            self.ndo.write_stats[param_name] = dict(
+                stats,
+                rows_per_second=stats["rows"] / seconds if seconds > 0 else 0,
+            )
+        logger.info(
+            "Streamed relationships: "
+            + ", ".join(
+                f"{param_name} {stats['rows']} rows"
+                for param_name, stats in self.stats.items()
+            )
+        )
+        return self.stats
+
+    def abort(self):
+        """
+        Stops the writer thread after the batches already queued, leaving
+        the rows that are still buffered unwritten
+        """
+        self._stop(raise_error=False)
+
+    def _flush(self, param_name):
+        buffer = self.buffers[param_name]
+        if not len(buffer):
+            return
+        self.buffers[param_name] = RelationshipBuffer(buffer.columns)
+        self._raise_error()
+        self.queue.put((param_name, buffer))
+
+    def _stop(self, raise_error=True):
+        self.queue.put(STOP)
+        self.thread.join()
+        if raise_error:
+            self._raise_error()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def _write_batches(self):
+        while True:
+            item = self.queue.get()
+            if item is STOP:
+                return
+            # after an error the queue is only drained, so the producer never
+            # blocks on it; the error is raised on its next flush
+            if self.error is not None:
+                continue
+            param_name, buffer = item
+            query, n1_name, n2_name = self.queries[param_name]
+            try:
+                stats = self.ndo.batch_writer.write(
+                    query, param_name, buffer, f"{n1_name}-{n2_name}"
+                )
+            except Exception as error:
+                logger.error(f"Streaming {param_name} failed: {error}")
+                self.error = error
+                continue
+            for key in ("rows", "chunks", "seconds"):
+                self.stats[param_name][key] += stats[key]
@@ -0,0 +1,109 @@
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+from pdbe_complexes.utils.incremental_update import get_component_key
+
+
+def get_compositions(params_lists):
+    """
+    Builds the composition of every PDB complex from the relationship params
+    lists. Assemblies are not components, so they are left out
+
+    Args:
+        params_lists (dict): relationship params lists by name
+
+    Returns:
+        dict: PDB complex ID -> frozenset of (label, key, stoichiometry)
+    """
+    compositions = {}
+    for param_name, rows in params_lists.items():
+        if param_name == "assembly_params_list":
+            continue
+        for row in rows:
+            compositions.setdefault(row["complex_id"], set()).add(
+                get_component_key(param_name, row)
+            )
+    return {
+        complex_id: frozenset(components)
+        for complex_id, components in compositions.items()
+    }
+
+
+def find_subcomplexes(compositions):
+    """
+    Finds every pair of PDB complexes where all the components of the first
+    one are part of the second one with the same stoichiometry. An inverted
+    index from component to complexes limits the candidates to the complexes
+    sharing the rarest component of the sub-complex
+
+    Args:
+        compositions (dict): PDB complex ID -> set of (label, key, stoichiometry)
+
+    Returns:
+        list of tuples: sorted (sub-complex ID, complex ID) pairs
+    """
+    index = {}
+    for complex_id, components in compositions.items():
+        for component in components:
+            index.setdefault(component, set()).add(complex_id)
+
+    pairs = []
+    for src_complex_id, components in compositions.items():
+        if not components:
+            continue
+        postings = sorted((index[component] for component in components), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if len(candidates) <= 1:
+                break
+        candidates.discard(src_complex_id)
+        pairs.extend(
+            (src_complex_id, dest_complex_id) for dest_complex_id in candidates
+        )
+    return sorted(pairs)
+
+
+def verify_subcomplexes(ndo, pairs, pdb_complex_ids=None):
+    """
+    Compares the sub-complex pairs with the ones found by SUBCOMPLEX_QUERY
+    in the graph db
+
+    Args:
+        ndo (Neo4jDatabaseOperations): graph db operations object
+        pairs (list of tuples): (sub-complex ID, complex ID) pairs
+        pdb_complex_ids (list, optional): only compare pairs involving these
+                                          complexes. Defaults to None.
+
+    Returns:
+        bool: True if both agree
+    """
+    logger.info("Start comparing sub-complexes with SUBCOMPLEX_QUERY")
+    expected = set()
+    for row in ndo.run_query(qy.SUBCOMPLEX_QUERY, stream=True):
+        expected.add((row.get("src_complex_id"), row.get("dest_complex_id")))
+    found = set(pairs)
+    if pdb_complex_ids is not None:
+        pdb_complex_ids = set(pdb_complex_ids)
+        expected = {
+            pair
+            for pair in expected
+            if pair[0] in pdb_complex_ids or pair[1] in pdb_complex_ids
+        }
+
+    missing = sorted(expected - found)
+    unexpected = sorted(found - expected)
+    for src_complex_id, dest_complex_id in missing:
+        logger.warning(
+            f"Sub-complex {src_complex_id} of {dest_complex_id} found by "
+            f"SUBCOMPLEX_QUERY only"
+        )
+    for src_complex_id, dest_complex_id in unexpected:
+        logger.warning(
+            f"Sub-complex {src_complex_id} of {dest_complex_id} not found by "
+            f"SUBCOMPLEX_QUERY"
+        )
+    logger.info(
+        f"Done comparing sub-complexes: {len(found)} found, {len(missing)} "
+        f"missing, {len(unexpected)} unexpected"
+    )
+    return not missing and not unexpected
@@ -2,9 +2,11 @@ import csv
 import os
 
 import pandas as pd
+import pyarrow as pa
 import requests
 
 from pdbe_complexes.log import logger
+from pdbe_complexes.utils.reference_loader import REFERENCE_COLUMNS, write_sidecar
 
 
 def export_csv(params):
@@ -276,22 +278,50 @@ def format_uniprot_taxid(obsolete_accession_taxid, new_accession_taxid):
     return f"_{obsolete_accession_taxid}", f"_{new_accession_taxid}"
 
 
+def get_list(values):
+    """
+    Returns the values of a list column of a query result, which is null
+    when there are no values
+
+    Args:
+        values (list): list of values or None
+
+    Returns:
+        list: values
+    """
+    if values is None:
+        return []
+    return list(values)
+
+
 def merge_csv_files(
-    csv_path, filename1="complexes_mapping.csv", filename2="complexes_name.csv"
+    csv_path,
+    filename1="complexes_mapping.csv",
+    filename2="complexes_name.csv",
+    write_deltas=False,
 ):
     """
     Merge the csv files produced by the proccesses above into a single file
-    and reorder content
+    and reorder content. The Feather sidecar of the reference mapping is
+    written next to it
 
     Args:
         filename1 (str, optional): CSV file produced by the first process. Defaults to
                                    "complexes_mapping.csv".
         filename2 (str, optional): CSV file produced by the second process. Defaults to
                                    "complexes_names.csv".
+        write_deltas (bool, optional): also write the differences with the
+                                       previous complexes_master.csv. Defaults to
+                                       False.
     """
     output_filename = "complexes_master.csv"
-    df1 = pd.read_csv(os.path.join(csv_path, filename1))
-    df2 = pd.read_csv(os.path.join(csv_path, filename2))
+    # read every value as the string it is, without type inference
+    df1 = pd.read_csv(
+        os.path.join(csv_path, filename1), dtype=str, keep_default_na=False
+    )
+    df2 = pd.read_csv(
+        os.path.join(csv_path, filename2), dtype=str, keep_default_na=False
+    )
     merged_df = df1.merge(df2, on="pdb_complex_id")
     # merged_df["complex_name_merged"] = (
     #     merged_df["complex_name"]
@@ -312,5 +342,89 @@ def merge_csv_files(
         ]
     )
     # df["complex_name"] = df["complex_name"].replace({"nan": ""})
-    df.to_csv(os.path.join(csv_path, output_filename), index=False)
+    output_path = os.path.join(csv_path, output_filename)
+    if write_deltas:
+        previous_df = None
+        if os.path.exists(output_path):
+            previous_df = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+        write_delta_files(previous_df, df, csv_path)
+    df.to_csv(output_path, index=False)
     logger.info(f"Filename {output_filename} has been written to {csv_path}")
+    # the next run reads the reference mapping from the sidecar, which has to
+    # be refreshed with every complexes_master.csv
+    write_sidecar(
+        pa.Table.from_pandas(
+            df[REFERENCE_COLUMNS].fillna("").astype(str), preserve_index=False
+        ),
+        output_path,
+    )
+
+
+def write_delta_files(previous_df, df, csv_path, key="pdb_complex_id"):
+    """
+    Writes the differences between the previous and the new complexes master
+    data as three files: the added complexes, the removed complexes and one
+    row per changed field of the other complexes. The two tables are joined
+    on the PDB complex ID with a hash join
+
+    Args:
+        previous_df (DataFrame): previous complexes master data, None if there
+                                 is none
+        df (DataFrame): new complexes master data
+        csv_path (str): output CSV path
+        key (str, optional): column identifying a complex. Defaults to
+                             "pdb_complex_id".
+
+    Returns:
+        dict: number of added, removed and changed complexes
+    """
+    columns = list(df.columns)
+    # compare the values as they are written, missing values as empty strings
+    df = df.fillna("").astype(str)
+    if previous_df is None:
+        previous_df = pd.DataFrame(columns=columns)
+    previous_df = previous_df.reindex(columns=columns).fillna("").astype(str)
+
+    merged = previous_df.merge(
+        df, on=key, how="outer", suffixes=("_old", "_new"), indicator=True
+    )
+    added = df[df[key].isin(merged.loc[merged["_merge"] == "right_only", key])]
+    removed = previous_df[
+        previous_df[key].isin(merged.loc[merged["_merge"] == "left_only", key])
+    ]
+    common = merged[merged["_merge"] == "both"]
+    changes = []
+    for column in columns:
+        if column == key:
+            continue
+        old_values = common[f"{column}_old"]
+        new_values = common[f"{column}_new"]
+        changed = common.loc[old_values != new_values]
+        changes.append(
+            pd.DataFrame(
+                {
+                    key: changed[key],
+                    "field": column,
+                    "old_value": changed[f"{column}_old"],
+                    "new_value": changed[f"{column}_new"],
+                }
+            )
+        )
+    changed = pd.concat(changes).sort_values([key, "field"], kind="stable")
+
+    for name, delta_df in (
+        ("complexes_master_added.csv", added),
+        ("complexes_master_removed.csv", removed),
+        ("complexes_master_changed.csv", changed),
+    ):
+        delta_df.to_csv(os.path.join(csv_path, name), index=False)
+    counts = {
+        "added": len(added),
+        "removed": len(removed),
+        "changed": changed[key].nunique(),
+    }
+    logger.info(
+        f"Delta files have been written to {csv_path}: {counts['added']} added, "
+        f"{counts['removed']} removed and {counts['changed']} changed complexes"
+    )
+    return counts
@@ -0,0 +1,100 @@
+import json
+import os
+from collections import OrderedDict
+
+from pdbe_complexes.log import logger
+
+JOURNAL_FILENAME = "write_journal.json"
+PARAMS_FILENAME = "write_journal_params.json"
+
+
+class WriteJournal:
+    """
+    This class records on disk which batch writes of the relationship writing
+    phase have been committed, together with the computed params they write,
+    so that a failed run can be resumed after the last committed chunk
+    instead of being rerun from the start
+    """
+
+    def __init__(self, journal_path):
+        self.journal_path = os.path.join(journal_path, JOURNAL_FILENAME)
+        self.params_path = os.path.join(journal_path, PARAMS_FILENAME)
+        self.offsets = {}
+        self.done = set()
+
+    def exists(self):
+        return os.path.exists(self.journal_path) and os.path.exists(self.params_path)
+
+    def start(self, params):
+        """
+        Starts a new journal for the given params
+
+        Args:
+            params (dict): computed params lists and reference mapping
+        """
+        self.offsets = {}
+        self.done = set()
+        self._dump(params, self.params_path)
+        self._save()
+        logger.info(f"Started write journal {self.journal_path}")
+
+    def load(self):
+        """
+        Reads the journal and the params of the run being resumed
+
+        Returns:
+            dict: computed params lists and reference mapping
+        """
+        with open(self.journal_path) as journal_file:
+            journal = json.load(journal_file)
+        self.offsets = journal["offsets"]
+        self.done = set(journal["done"])
+        with open(self.params_path) as params_file:
+            params = json.load(params_file, object_pairs_hook=OrderedDict)
+        logger.info(
+            f"Resuming from write journal {self.journal_path}: "
+            f"{len(self.done)} steps done, committed rows {self.offsets}"
+        )
+        return params
+
+    def get_offset(self, param_name):
+        return self.offsets.get(param_name, 0)
+
+    def commit(self, param_name, offset):
+        """
+        Records that the rows of param_name up to offset have been committed
+
+        Args:
+            param_name (str): parameter name of the batch write
+            offset (int): number of committed rows
+        """
+        self.offsets[param_name] = offset
+        self._save()
+
+    def is_done(self, step):
+        return step in self.done
+
+    def mark_done(self, step):
+        self.done.add(step)
+        self._save()
+
+    def clear(self):
+        """
+        Deletes the journal once every write has been committed
+        """
+        for path in (self.journal_path, self.params_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _save(self):
+        self._dump(
+            {"offsets": self.offsets, "done": sorted(self.done)}, self.journal_path
+        )
+
+    @staticmethod
+    def _dump(data, path):
+        # write to a temporary file first so a crash never leaves a truncated
+        # journal behind
+        with open(f"{path}.tmp", "w") as tmp_file:
+            json.dump(data, tmp_file)
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,181 @@
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.log import logger
+
+# change made by each row of a batch write, by parameter name
+WRITE_CHANGES = {
+    "accession_params_list": ("create", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "entity_params_list": ("create", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "unmapped_polymer_params_list": ("create", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "rfam_params_list": ("create", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "assembly_params_list": ("create", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "complex_params_list": ("create", "SAME_AS relationship"),
+    "subcomplex_params_list": ("create", "IS_SUB_COMPLEX_OF relationship"),
+    "complex_name_params_list": ("set", "PDBComplex name"),
+    "pdb_complex_ids": ("delete", "PDBComplex node"),
+    "stale_component_params_list": ("delete", "IS_PART_OF_PDB_COMPLEX relationship"),
+    "stale_complex_params_list": ("delete", "SAME_AS relationship"),
+}
+
+# change made by each item of a batch deletion, by deletion query
+DELETE_CHANGES = {
+    qy.DROP_PDB_COMPLEX_NODES_QUERY.strip(): ("delete", "PDBComplex node"),
+    qy.DROP_SUBCOMPLEX_RELATION_QUERY.strip(): (
+        "delete",
+        "IS_SUB_COMPLEX_OF relationship",
+    ),
+}
+
+
+class WritePlan:
+    """
+    This class records the writes a dry run would have made instead of
+    running them: the number of rows, batches and the size of the largest
+    transaction of every batch write, and the number of nodes,
+    relationships, IDs and names each write would create, delete or change
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.writes = []
+        self.changes = OrderedDict()
+
+    def enable(self):
+        """
+        Starts recording the writes instead of running them
+        """
+        self.enabled = True
+        self.writes = []
+        self.changes = OrderedDict()
+
+    def disable(self):
+        self.enabled = False
+
+    def record_write(self, param_name, rows, batch_size, description=""):
+        """
+        Records a batch write of rows in chunks of batch_size rows
+
+        Args:
+            param_name (str): parameter name of the batch write
+            rows (list of dict): query parameter rows
+            batch_size (int): rows per transaction
+            description (str, optional): label of the write
+
+        Returns:
+            dict: number of rows and chunks that would be written
+        """
+        total = len(rows)
+        num_chunks = math.ceil(total / batch_size)
+        max_chunk_bytes = max(
+            (
+                len(json.dumps(rows[offset : offset + batch_size]))
+                for offset in range(0, total, batch_size)
+            ),
+            default=0,
+        )
+        self._add_write(
+            {
+                "description": description or param_name,
+                "rows": total,
+                "batches": num_chunks,
+                "rows_per_transaction": min(total, batch_size),
+                "max_transaction_bytes": max_chunk_bytes,
+            }
+        )
+        if param_name in WRITE_CHANGES:
+            self.add(*WRITE_CHANGES[param_name], total)
+        return {
+            "rows": total,
+            "chunks": num_chunks,
+            "seconds": 0.0,
+            "rows_per_second": 0,
+        }
+
+    def record_delete(self, query, total, batch_size, description=""):
+        """
+        Records a batch deletion of total items in batches of batch_size
+
+        Args:
+            query (str): Neo4j deletion query
+            total (int): number of items left to delete
+            batch_size (int): items deleted per transaction
+            description (str, optional): label of the deletion
+
+        Returns:
+            dict: number of items and batches that would be deleted
+        """
+        total = total or 0
+        num_batches = math.ceil(total / batch_size)
+        self._add_write(
+            {
+                "description": description,
+                "rows": total,
+                "batches": num_batches,
+                "rows_per_transaction": min(total, batch_size),
+                "max_transaction_bytes": None,
+            }
+        )
+        change = DELETE_CHANGES.get(query.strip())
+        if change is not None:
+            self.add(*change, total)
+        return {"deleted": total, "batches": num_batches, "seconds": 0.0}
+
+    def add(self, action, item, number):
+        """
+        Adds to the number of items an action would be applied to
+
+        Args:
+            action (str): e.g. create, delete
+            item (str): e.g. PDBComplex node
+            number (int): number of items
+        """
+        with self.lock:
+            key = (action, item)
+            self.changes[key] = self.changes.get(key, 0) + number
+
+    def get_report(self):
+        """
+        Returns the recorded writes and changes
+
+        Returns:
+            dict: writes in the order they would run, and changes by action
+            and item
+        """
+        return {
+            "writes": list(self.writes),
+            "changes": [
+                {"action": action, "item": item, "number": number}
+                for (action, item), number in self.changes.items()
+            ],
+        }
+
+    def log_report(self):
+        """
+        Logs the recorded writes and changes
+        """
+        report = self.get_report()
+        logger.info("Dry run, no writes have been made. The planned writes are:")
+        for write in report["writes"]:
+            size = write["max_transaction_bytes"]
+            size = f", up to {size} bytes of parameters" if size is not None else ""
+            logger.info(
+                f"  {write['description']}: {write['rows']} rows in "
+                f"{write['batches']} batches of up to "
+                f"{write['rows_per_transaction']} rows{size}"
+            )
+        logger.info("The planned changes are:")
+        for change in report["changes"]:
+            logger.info(f"  {change['action']} {change['number']} {change['item']}")
+
+    def _add_write(self, write):
+        with self.lock:
+            self.writes.append(write)
+
+
+# process-wide plan shared by all BatchWriter objects
+write_plan = WritePlan()
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.process_complex import Neo4JProcessComplex
+from pdbe_complexes.utils.assembly_shards import (
+    SHARD_KEYS,
+    get_shard_keys,
+    get_sharded_assembly_data,
+)
+from pdbe_complexes.utils.memory_graph import InMemoryGraph
+from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+
+
+class TestAssemblyShards(TestCase):
+    def setUp(self) -> None:
+        self.graph = InMemoryGraph.synthetic(300)
+        self.ndo = Neo4jDatabaseOperations(
+            ("neo4j://", "mock_username", "mock_password"), backend=self.graph
+        )
+
+    def test_shard_keys(self):
+        shards = get_shard_keys(8)
+        self.assertEqual(len(shards), 8)
+        self.assertEqual(
+            sorted(key for shard in shards for key in shard), sorted(SHARD_KEYS)
+        )
+        self.assertEqual(get_shard_keys(1), [list(SHARD_KEYS)])
+        with self.assertRaises(ValueError):
+            get_shard_keys(0)
+        with self.assertRaises(ValueError):
+            get_shard_keys(37)
+
+    def test_sharded_equals_unsharded(self):
+        unsharded = self.graph.run(qy.PDB_ASSEMBLY_DATA_QUERY)
+        for num_shards in (2, 3, 4, 7, 36):
+            # same rows in the same order, assemblies included
+            self.assertEqual(get_sharded_assembly_data(self.ndo, num_shards), unsharded)
+
+    def test_process_assembly_data(self):
+        def process(assembly_shards):
+            complex_obj = Neo4JProcessComplex(
+                "neo4j://",
+                "mock_username",
+                "mock_password",
+                "test_csv_path",
+                "test_uniprot_path",
+                backend=self.graph,
+                assembly_shards=assembly_shards,
+            )
+            complex_obj.process_assembly_data()
+            return (
+                complex_obj.dict_pdb_complex,
+                complex_obj.reference_mapping.items(),
+                list(complex_obj.assembly_params_list),
+            )
+
+        unsharded = process(1)
+        for assembly_shards in (3, 4):
+            # the same IDs are allocated to the same compositions and entries
+            self.assertEqual(process(assembly_shards), unsharded)
@@ -0,0 +1,103 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from py2neo.errors import ConnectionBroken, Neo4jError
+
+from pdbe_complexes.utils.batch_writer import BatchWriter
+
+mock_rows = [{"complex_id": f"PDB-CPX-{100001 + i}"} for i in range(25)]
+
+mock_query = "WITH $rows AS batch UNWIND batch AS row RETURN row"
+
+
+class TestBatchWriter(TestCase):
+    def setUp(self) -> None:
+        self.ndo = MagicMock()
+
+    def _written_chunks(self):
+        return [c.kwargs["param"]["rows"] for c in self.ndo.run_query.call_args_list]
+
+    def test_rows_are_written_in_chunks(self):
+        writer = BatchWriter(self.ndo, batch_size=10, retry_delay=0)
+        stats = writer.write(mock_query, "rows", mock_rows)
+
+        self.assertEqual([len(c) for c in self._written_chunks()], [10, 10, 5])
+        self.assertEqual(stats["rows"], 25)
+        self.assertEqual(stats["chunks"], 3)
+
+    def test_empty_rows_are_not_sent(self):
+        writer = BatchWriter(self.ndo, batch_size=10, retry_delay=0)
+        stats = writer.write(mock_query, "rows", [])
+
+        self.ndo.run_query.assert_not_called()
+        self.assertEqual(stats["chunks"], 0)
+
+    def test_transient_error_is_retried(self):
+        self.ndo.run_query.side_effect = [ConnectionBroken("reset"), None, None, None]
+        writer = BatchWriter(self.ndo, batch_size=10, retry_delay=0)
+        writer.write(mock_query, "rows", mock_rows)
+
+        chunks = self._written_chunks()
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0], chunks[1])
+
+    def test_chunk_size_shrinks_on_memory_error(self):
+        memory_error = Neo4jError.hydrate(
+            {
+                "code": "Neo.TransientError.General.MemoryPoolOutOfMemoryError",
+                "message": "out of memory",
+            }
+        )
+        self.ndo.run_query.side_effect = [memory_error] + [None] * 5
+        writer = BatchWriter(self.ndo, batch_size=20, min_batch_size=5, retry_delay=0)
+        stats = writer.write(mock_query, "rows", mock_rows)
+
+        self.assertEqual([len(c) for c in self._written_chunks()], [20, 10, 10, 5])
+        self.assertEqual(stats["rows"], 25)
+
+    def test_client_error_is_raised(self):
+        client_error = Neo4jError.hydrate(
+            {"code": "Neo.ClientError.Statement.SyntaxError", "message": "bad"}
+        )
+        self.ndo.run_query.side_effect = client_error
+        writer = BatchWriter(self.ndo, batch_size=10, retry_delay=0)
+
+        with self.assertRaises(Neo4jError):
+            writer.write(mock_query, "rows", mock_rows)
+        self.ndo.run_query.assert_called_once()
+
+    def test_delete_runs_until_nothing_is_left(self):
+        results = [MagicMock(), MagicMock(), MagicMock(), MagicMock()]
+        for result, value in zip(results, [25, 10, 10, 5]):
+            result.evaluate.return_value = value
+        results.append(MagicMock())
+        results[-1].evaluate.return_value = 0
+        self.ndo.run_query.side_effect = results
+        writer = BatchWriter(self.ndo, delete_batch_size=10, retry_delay=0)
+        stats = writer.delete(mock_query, "count", "deletion")
+
+        self.assertEqual(stats["deleted"], 25)
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(
+            self.ndo.run_query.call_args_list[1].kwargs["param"], {"batch_size": 10}
+        )
+
+    def test_delete_batch_size_shrinks_on_memory_error(self):
+        memory_error = Neo4jError.hydrate(
+            {
+                "code": "Neo.TransientError.General.MemoryPoolOutOfMemoryError",
+                "message": "out of memory",
+            }
+        )
+        done = MagicMock()
+        done.evaluate.return_value = 0
+        self.ndo.run_query.side_effect = [memory_error, done]
+        writer = BatchWriter(
+            self.ndo, min_batch_size=5, delete_batch_size=20, retry_delay=0
+        )
+        writer.delete(mock_query)
+
+        self.assertEqual(
+            [c.kwargs["param"] for c in self.ndo.run_query.call_args_list],
+            [{"batch_size": 20}, {"batch_size": 10}],
+        )
@@ -0,0 +1,107 @@
+import csv
+import os
+import tempfile
+from unittest import TestCase
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.utils.bulk_import import BulkImportWriter
+
+mock_params_lists = {
+    "accession_params_list": [
+        {"complex_id": "PDB-CPX-100001", "accession": "P1", "stoichiometry": "2"},
+    ],
+    "entity_params_list": [
+        {
+            "complex_id": "PDB-CPX-100002",
+            "entry_id": "1abc",
+            "entity_id": "3",
+            "stoichiometry": "1",
+        },
+    ],
+    "unmapped_polymer_params_list": [
+        {"complex_id": "PDB-CPX-100002", "polymer_type": "RNA"},
+    ],
+    "rfam_params_list": [],
+    "assembly_params_list": [
+        {"complex_id": "PDB-CPX-100001", "assembly_id": "1abc_1", "entry_id": "1abc"},
+    ],
+}
+
+
+class TestBulkImportWriter(TestCase):
+    def _read(self, tmp_dir, filename):
+        with open(os.path.join(tmp_dir, filename)) as import_file:
+            return list(csv.reader(import_file))
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = BulkImportWriter(tmp_dir)
+            writer.write_relationships(
+                mock_params_lists,
+                [{"pdb_complex_id": "PDB-CPX-100001", "complex_portal_id": "CPX-1"}],
+                [("PDB-CPX-100001", "PDB-CPX-100002")],
+            )
+
+            # the files have the columns of the params of the MERGE queries
+            self.assertEqual(
+                self._read(tmp_dir, "uniprot_pdb_complex_rels.csv"),
+                [
+                    ["complex_id", "accession", "stoichiometry"],
+                    ["PDB-CPX-100001", "P1", "2"],
+                ],
+            )
+            self.assertEqual(
+                self._read(tmp_dir, "entity_pdb_complex_rels.csv")[1],
+                ["PDB-CPX-100002", "1abc", "3", "1"],
+            )
+            self.assertEqual(
+                self._read(tmp_dir, "pdb_complex_complex_rels.csv"),
+                [
+                    ["pdb_complex_id", "complex_portal_id"],
+                    ["PDB-CPX-100001", "CPX-1"],
+                ],
+            )
+            self.assertEqual(
+                self._read(tmp_dir, "pdb_complex_subcomplex_rels.csv")[1],
+                ["PDB-CPX-100001", "PDB-CPX-100002"],
+            )
+            self.assertEqual(
+                [query_name for query_name, _ in writer.load_files],
+                [
+                    "LOAD_ACCESSION_QUERY",
+                    "LOAD_ENTITY_QUERY",
+                    "LOAD_UNMAPPED_POLYMER_QUERY",
+                    "LOAD_RFAM_QUERY",
+                    "LOAD_ASSEMBLY_QUERY",
+                    "LOAD_COMMON_COMPLEX_QUERY",
+                    "LOAD_SUBCOMPLEX_QUERY",
+                ],
+            )
+
+    def test_write_load_script(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = BulkImportWriter(tmp_dir)
+            writer.write_relationships(mock_params_lists, [], [])
+            with open(writer.write_load_script()) as script_file:
+                script = script_file.read()
+
+        # the existing PDBComplex nodes are deleted before the files are loaded
+        self.assertTrue(
+            script.startswith(f":auto {qy.DELETE_ALL_PDB_COMPLEXES_QUERY.strip()};")
+        )
+        self.assertIn(
+            ":param file_url => 'file:///uniprot_pdb_complex_rels.csv'\n"
+            f":auto {qy.LOAD_ACCESSION_QUERY.strip()};\n",
+            script,
+        )
+        self.assertEqual(script.count(":auto "), 8)
+
+    def test_write_names(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = BulkImportWriter(tmp_dir).write_names(
+                [{"pdb_complex_id": "PDB-CPX-100001", "complex_name": "Hemoglobin"}]
+            )
+            with open(path) as names_file:
+                rows = list(csv.DictReader(names_file))
+
+        self.assertEqual(rows[0]["complex_name"], "Hemoglobin")
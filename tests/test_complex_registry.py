@@ -0,0 +1,144 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from pdbe_complexes.utils.complex_registry import ComplexRegistry
+
+mock_master_rows = [
+    {
+        "md5_obj": "hash_1",
+        "pdb_complex_id": "PDB-CPX-100001",
+        "complex_portal_id": "CPX-2158",
+        "accession": "P68871_2_9606,P69905_2_9606",
+        "entries": "1a3n_1",
+    },
+    {
+        "md5_obj": "hash_2",
+        "pdb_complex_id": "PDB-CPX-100007",
+        "complex_portal_id": "",
+        "accession": "P69905_2_9606",
+        "entries": "2dn2_1",
+    },
+]
+
+
+class TestComplexRegistry(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry_path = os.path.join(self.tmp_dir.name, "registry.db")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_allocate(self):
+        registry = ComplexRegistry()
+        self.assertEqual(
+            registry.allocate("hash_1", "P1_1_9606", None, "1abc_1"),
+            ("PDB-CPX-100001", True),
+        )
+        self.assertEqual(
+            registry.allocate("hash_2", "P2_1_9606", "CPX-1", "2abc_1"),
+            ("PDB-CPX-100002", True),
+        )
+        # an existing composition keeps its ID and gets the current entries
+        self.assertEqual(
+            registry.allocate("hash_1", "P1_1_9606", None, "1abc_1,3abc_1"),
+            ("PDB-CPX-100001", False),
+        )
+        self.assertEqual(registry["hash_1"]["entries"], "1abc_1,3abc_1")
+        self.assertEqual(list(registry), ["hash_1", "hash_2"])
+
+    def test_load(self):
+        registry = ComplexRegistry(self.registry_path)
+        registry.load(mock_master_rows)
+        registry.close()
+
+        registry = ComplexRegistry(self.registry_path)
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry["hash_1"]["complex_portal_id"], "CPX-2158")
+        self.assertNotIn("hash_3", registry)
+        # IDs are allocated after the highest loaded ID
+        self.assertEqual(
+            registry.allocate("hash_3", "P3_1_9606", None, "3abc_1")[0],
+            "PDB-CPX-100008",
+        )
+
+    def test_retired_ids_are_not_reused(self):
+        registry = ComplexRegistry()
+        registry.load(mock_master_rows)
+        del registry["hash_2"]
+
+        self.assertNotIn("hash_2", registry)
+        self.assertEqual(
+            [row["pdb_complex_id"] for row in registry.get_retired()],
+            ["PDB-CPX-100007"],
+        )
+        self.assertEqual(
+            registry.allocate("hash_2", "P69905_2_9606", None, "2dn2_1")[0],
+            "PDB-CPX-100008",
+        )
+
+    def test_concurrent_allocation(self):
+        compositions = [
+            (f"hash_{i}", f"P{i:05d}_1_9606", None, f"{i}abc_1") for i in range(50)
+        ]
+        ComplexRegistry(self.registry_path).close()
+
+        def allocate(order):
+            registry = ComplexRegistry(self.registry_path)
+            try:
+                return registry.allocate_many(order)
+            finally:
+                registry.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    allocate,
+                    [compositions, compositions[::-1], compositions[10:], compositions],
+                )
+            )
+
+        # every worker sees the same ID for a composition and no ID is shared
+        for result in results[1:]:
+            for hash_str, (pdb_complex_id, _) in result.items():
+                self.assertEqual(results[0][hash_str][0], pdb_complex_id)
+        self.assertEqual(len({value[0] for value in results[0].values()}), 50)
+        # each composition is allocated by exactly one worker
+        self.assertEqual(
+            sum(value[1] for result in results for value in result.values()), 50
+        )
+
+    def test_allocate_many_matches_allocate(self):
+        compositions = [
+            (f"hash_{i}", f"P{i:05d}_1_9606", None, f"{i}abc_1") for i in range(10)
+        ]
+        registry = ComplexRegistry()
+        registry.allocate(*compositions[3])
+        expected = ComplexRegistry()
+        expected.allocate(*compositions[3])
+
+        allocated = registry.allocate_many(compositions[::-1])
+        self.assertEqual(
+            allocated,
+            {
+                composition[0]: expected.allocate(*composition)
+                for composition in compositions[::-1]
+            },
+        )
+        self.assertEqual(allocated["hash_3"], ("PDB-CPX-100001", False))
+        self.assertEqual(allocated["hash_9"], ("PDB-CPX-100002", True))
+
+    def test_allocate_many_is_one_transaction(self):
+        registry = ComplexRegistry()
+        with self.assertRaises(ValueError):
+            registry.allocate_many(
+                [("hash_1", "P69905_2_9606", None, "1a3n_1"), ("hash_2",)]
+            )
+        # the allocation of the first composition has been rolled back
+        self.assertEqual(len(registry), 0)
+        self.assertEqual(
+            registry.allocate("hash_1", "P69905_2_9606", None, "1a3n_1")[0],
+            "PDB-CPX-100001",
+        )
@@ -0,0 +1,72 @@
+import gc
+import hashlib
+from unittest import TestCase
+
+from pdbe_complexes.utils.composition import Component, Composition, clear_interned
+
+
+class TestComposition(TestCase):
+    def tearDown(self) -> None:
+        clear_interned()
+
+    def test_parse(self):
+        entity = Component.parse("NA_1a3n_1_2")
+        self.assertEqual(entity.param_name, "entity_params_list")
+        self.assertEqual(
+            entity.get_params("PDB-CPX-100001"),
+            {
+                "complex_id": "PDB-CPX-100001",
+                "entry_id": "1a3n",
+                "entity_id": "1",
+                "stoichiometry": "2",
+            },
+        )
+        uniprot = Component.parse("P69905_2_9606")
+        self.assertEqual(uniprot.param_name, "accession_params_list")
+        self.assertEqual(
+            uniprot.get_params("PDB-CPX-100001"),
+            {
+                "complex_id": "PDB-CPX-100001",
+                "accession": "P69905",
+                "stoichiometry": "2",
+            },
+        )
+        unmapped = Component.parse("DNA:UNMAPPED")
+        self.assertEqual(
+            unmapped.get_params("PDB-CPX-100001"),
+            {"complex_id": "PDB-CPX-100001", "polymer_type": "DNA"},
+        )
+        rfam = Component.parse("RF00005")
+        self.assertEqual(
+            rfam.get_params("PDB-CPX-100001"),
+            {"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00005"},
+        )
+
+    def test_interned(self):
+        tokens = ["NA_1a3n_1_2", "P69905_2_9606"]
+        composition = Composition.from_tokens(tokens)
+        self.assertIs(Composition.from_tokens(list(tokens)), composition)
+        self.assertIs(
+            Composition.from_tokens(["P69905_2_9606"]).components[0],
+            composition.components[1],
+        )
+
+    def test_string_and_md5(self):
+        composition = Composition.from_tokens(["NA_1a3n_1_2", "P69905_2_9606"])
+        self.assertEqual(composition.string, "1a3n_1_2,P69905_2_9606")
+        self.assertEqual(
+            composition.md5,
+            hashlib.md5("1a3n_1_2,P69905_2_9606".encode("utf-8")).hexdigest(),
+        )
+        self.assertEqual(len(composition), 2)
+
+    def test_released(self):
+        composition = Composition.from_tokens(["NA_1a3n_1_2", "P69905_2_9606"])
+        self.assertEqual(len(Composition._interned), 1)
+        # compositions are only interned while they are in use
+        del composition
+        gc.collect()
+        self.assertEqual(len(Composition._interned), 0)
+        self.assertEqual(len(Component._interned), 2)
+        clear_interned()
+        self.assertEqual(len(Component._interned), 0)
@@ -0,0 +1,45 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pdbe_complexes.utils.connection_manager import Neo4jConnectionManager
+from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+
+
+class TestConnectionManager(TestCase):
+    def setUp(self) -> None:
+        self.connection_params = ("neo4j://", "mock_username", "mock_password")
+
+    @patch("pdbe_complexes.utils.connection_manager.Graph")
+    def test_graph_is_shared(self, graph):
+        manager = Neo4jConnectionManager(pool_size=5, health_check_interval=3600)
+        first = Neo4jDatabaseOperations(self.connection_params, manager)
+        second = Neo4jDatabaseOperations(self.connection_params, manager)
+
+        self.assertIs(first.graph, second.graph)
+        graph.assert_called_once_with(
+            "neo4j://",
+            user="mock_username",
+            password="mock_password",
+            max_size=5,
+            max_age=manager.max_age,
+        )
+
+    @patch("pdbe_complexes.utils.connection_manager.Graph")
+    def test_reconnect_after_failed_health_check(self, graph):
+        manager = Neo4jConnectionManager(health_check_interval=0)
+        stale = manager.get_graph(self.connection_params)
+        stale.evaluate.side_effect = OSError("connection reset")
+
+        manager.get_graph(self.connection_params)
+
+        self.assertEqual(graph.call_count, 2)
+        stale.service.connector.close.assert_called_once()
+
+    @patch("pdbe_complexes.utils.connection_manager.Graph")
+    def test_close(self, graph):
+        manager = Neo4jConnectionManager()
+        pooled = manager.get_graph(self.connection_params)
+        manager.close()
+
+        pooled.service.connector.close.assert_called_once()
+        self.assertFalse(manager.health_check(self.connection_params))
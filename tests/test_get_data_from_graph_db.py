@@ -1,6 +1,7 @@
 from unittest import TestCase
 from unittest.mock import patch
 
+from pdbe_complexes import queries as qy
 from pdbe_complexes.utils.get_data_from_graph_db import GetComplexData
 
 mock_uniprot_data = [
@@ -442,21 +443,25 @@ class TestComplexData(TestCase):
     def test_uniprot_molecule_names(self, rq):
         complex_obj = GetComplexData(self.bolt_uri, self.username, self.password)
         rq.return_value = mock_uniprot_data
-        complex_obj._populate_molecule_names_from_uniprot_or_rfam("uniprot")
+        complex_obj._populate_molecule_names_from_uniprot_or_rfam(
+            "uniprot", mock_uniprot_molecule_names
+        )
         self.assertDictEqual(complex_obj.molecule_names, mock_uniprot_molecule_names)
 
     @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
     def test_rfam_molecule_names(self, rq):
         complex_obj = GetComplexData(self.bolt_uri, self.username, self.password)
         rq.return_value = mock_rfam_data
-        complex_obj._populate_molecule_names_from_uniprot_or_rfam("rfam")
+        complex_obj._populate_molecule_names_from_uniprot_or_rfam(
+            "rfam", mock_rfam_molecule_names
+        )
         self.assertDictEqual(complex_obj.molecule_names, mock_rfam_molecule_names)
 
     @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
     def test_entity_molecule_names(self, rq):
         complex_obj = GetComplexData(self.bolt_uri, self.username, self.password)
         rq.return_value = mock_entity_data
-        complex_obj._populate_molecule_names_from_entity()
+        complex_obj._populate_molecule_names_from_entity(mock_entity_molecule_names)
         self.assertDictEqual(complex_obj.molecule_names, mock_entity_molecule_names)
 
     @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
@@ -466,6 +471,74 @@ class TestComplexData(TestCase):
         complex_obj.get_pdb_complex_data()
         self.assertDictEqual(complex_obj.pdb_complexes, mock_pdb_complexes)
 
+    @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
+    def test_molecule_names_are_set_after_concurrent_queries(self, rq):
+        query_results = {
+            qy.UNIPROT_QUERY: [{"accession": "A0A003", "description": "MoaD"}],
+            qy.RFAM_QUERY: [{"accession": "RF00001", "description": "5S rRNA"}],
+            qy.ENTITY_QUERY: mock_entity_data,
+            qy.PDB_COMPLEX_QUERY: mock_pdb_complex_data,
+        }
+        rq.side_effect = lambda query, *args, **kwargs: query_results[query]
+        complex_obj = GetComplexData(self.bolt_uri, self.username, self.password)
+        pdb_complexes = complex_obj.get_pdb_complex_data()
+
+        self.assertEqual(
+            pdb_complexes["PDB-CPX-1"]["components"][0]["molecule_name"], "MoaD"
+        )
+        self.assertEqual(
+            pdb_complexes["PDB-CPX-2"]["components"][3]["molecule_name"], "5S rRNA"
+        )
+        self.assertEqual(rq.call_count, 4)
+
+    @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
+    def test_only_referenced_molecules_are_looked_up(self, rq):
+        rq.side_effect = lambda query, *args, **kwargs: (
+            mock_pdb_complex_data if query == qy.PDB_COMPLEX_QUERY else []
+        )
+        complex_obj = GetComplexData(
+            self.bolt_uri, self.username, self.password, lookup_batch_size=2
+        )
+        complex_obj.get_pdb_complex_data()
+
+        lookups = {}
+        for c in rq.call_args_list:
+            if c.args[0] != qy.PDB_COMPLEX_QUERY:
+                (ids,) = c.kwargs["param"].values()
+                self.assertLessEqual(len(ids), 2)
+                lookups.setdefault(c.args[0], []).extend(ids)
+        self.assertEqual(
+            lookups[qy.UNIPROT_QUERY],
+            sorted({row["accession"] for row in mock_pdb_complex_data} - {None}),
+        )
+        self.assertEqual(
+            lookups[qy.RFAM_QUERY],
+            sorted({row["rfam_accession"] for row in mock_pdb_complex_data} - {None}),
+        )
+
+    @patch("pdbe_complexes.utils.operations.Neo4jDatabaseOperations.run_query")
+    def test_get_grouped_pdb_complex_data(self, rq):
+        grouped_rows = {}
+        for row in mock_pdb_complex_data:
+            grouped_row = grouped_rows.setdefault(
+                row["complex_id"],
+                {"complex_id": row["complex_id"], "assemblies": [], "components": []},
+            )
+            if row["component_db"] == ["Assembly"]:
+                grouped_row["assemblies"].append(row["entry_assembly"])
+            else:
+                grouped_row["components"].append(
+                    {k: v for k, v in row.items() if k != "complex_id"}
+                )
+        rq.return_value = list(grouped_rows.values())
+        complex_obj = GetComplexData(
+            self.bolt_uri, self.username, self.password, grouped=True
+        )
+        complex_obj.get_pdb_complex_data()
+
+        self.assertEqual(rq.call_args_list[0].args[0], qy.PDB_COMPLEX_GROUPED_QUERY)
+        self.assertDictEqual(complex_obj.pdb_complexes, mock_pdb_complexes)
+
     # @patch("complexes.utils.get_data_from_graph_db.Graph.run")
     # def test_run_query(self, mock):
     #     mock.return_value = True
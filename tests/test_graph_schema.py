@@ -0,0 +1,107 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from py2neo.errors import Neo4jError
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.utils.graph_schema import GraphSchema
+
+mock_requirements = [
+    ("PDBComplex", "COMPLEX_ID", True),
+    ("UniProt", "ACCESSION", False),
+    ("Entity", "ID", False),
+]
+
+mock_indexes = [
+    {
+        "labelsOrTypes": ["UniProt"],
+        "properties": ["ACCESSION"],
+        "state": "ONLINE",
+        "type": "BTREE",
+        "entityType": "NODE",
+    },
+    {
+        "labelsOrTypes": ["Entity"],
+        "properties": ["DESCRIPTION"],
+        "state": "ONLINE",
+        "type": "FULLTEXT",
+        "entityType": "NODE",
+    },
+    {
+        "labelsOrTypes": None,
+        "properties": None,
+        "state": "ONLINE",
+        "type": "LOOKUP",
+        "entityType": "NODE",
+    },
+]
+
+
+class TestGraphSchema(TestCase):
+    def setUp(self) -> None:
+        self.ndo = MagicMock()
+
+        def run_query(query, param=None):
+            if query == qy.SHOW_INDEXES_STATEMENT:
+                return mock_indexes
+            return None
+
+        self.ndo.run_query.side_effect = run_query
+
+    def _statements(self):
+        return [c.args[0] for c in self.ndo.run_query.call_args_list]
+
+    def test_find_missing(self):
+        schema = GraphSchema(self.ndo, requirements=mock_requirements)
+        self.assertEqual(
+            schema.find_missing(),
+            [("PDBComplex", "COMPLEX_ID", True), ("Entity", "ID", False)],
+        )
+
+    def test_prepare(self):
+        schema = GraphSchema(self.ndo, requirements=mock_requirements, timeout=5)
+        report = schema.prepare()
+
+        self.assertEqual(report["present"], ["UniProt.ACCESSION"])
+        self.assertEqual(report["scans"], ["PDBComplex.COMPLEX_ID", "Entity.ID"])
+        statements = self._statements()
+        self.assertIn(
+            "CREATE CONSTRAINT constraint_pdbcomplex_complex_id IF NOT EXISTS "
+            "FOR (n:PDBComplex) REQUIRE n.COMPLEX_ID IS UNIQUE",
+            [s.strip() for s in statements],
+        )
+        self.assertIn(
+            "CREATE INDEX index_entity_id IF NOT EXISTS FOR (n:Entity) ON (n.ID)",
+            [s.strip() for s in statements],
+        )
+        self.assertEqual(statements[-1], qy.AWAIT_INDEXES_STATEMENT)
+
+    def test_index_is_created_when_constraint_fails(self):
+        def run_query(query, param=None):
+            if query == qy.SHOW_INDEXES_STATEMENT:
+                return []
+            if "CONSTRAINT" in query:
+                raise Neo4jError.hydrate(
+                    {
+                        "code": "Neo.ClientError.Schema.ConstraintCreationFailed",
+                        "message": "duplicate values",
+                    }
+                )
+
+        self.ndo.run_query.side_effect = run_query
+        schema = GraphSchema(self.ndo, requirements=mock_requirements[:1])
+        report = schema.prepare()
+
+        self.assertEqual(report["created"], ["PDBComplex.COMPLEX_ID"])
+        self.assertIn(
+            "CREATE INDEX index_pdbcomplex_complex_id IF NOT EXISTS "
+            "FOR (n:PDBComplex) ON (n.COMPLEX_ID)",
+            [s.strip() for s in self._statements()],
+        )
+
+    def test_nothing_is_created_when_indexed(self):
+        schema = GraphSchema(self.ndo, requirements=mock_requirements[1:2])
+        report = schema.prepare()
+
+        self.assertEqual(report["created"], [])
+        self.assertEqual(self._statements(), [qy.SHOW_INDEXES_STATEMENT])
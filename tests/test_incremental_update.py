@@ -0,0 +1,115 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pdbe_complexes.utils.incremental_update import IncrementalUpdate
+
+mock_existing_complexes = [
+    {
+        "complex_id": "PDB-CPX-100001",
+        "components": [
+            ["UniProt", "A0A003", "2"],
+            ["Assembly", "6kvc_1", None],
+            ["Assembly", "6kv9_1", None],
+        ],
+        "complex_portal_ids": [],
+    },
+    {
+        "complex_id": "PDB-CPX-100002",
+        "components": [
+            ["UniProt", "P39476", "2"],
+            ["RfamFamily", "RF00001", None],
+            ["Assembly", "5b03_1", None],
+        ],
+        "complex_portal_ids": ["CPX-2522"],
+    },
+    {
+        "complex_id": "PDB-CPX-100003",
+        "components": [
+            ["Entity", "1abc_1", "1"],
+            ["Assembly", "1abc_1", None],
+        ],
+        "complex_portal_ids": [],
+    },
+]
+
+mock_params_lists = {
+    "accession_params_list": [
+        {"complex_id": "PDB-CPX-100001", "accession": "A0A003", "stoichiometry": "2"},
+        {"complex_id": "PDB-CPX-100002", "accession": "P39476", "stoichiometry": "2"},
+        {"complex_id": "PDB-CPX-100004", "accession": "P12345", "stoichiometry": "1"},
+    ],
+    "entity_params_list": [],
+    "unmapped_polymer_params_list": [],
+    "rfam_params_list": [
+        {"complex_id": "PDB-CPX-100002", "rfam_acc": "RF00001"},
+    ],
+    "assembly_params_list": [
+        {"complex_id": "PDB-CPX-100001", "assembly_id": "6kvc_1", "entry_id": "6kvc"},
+        {"complex_id": "PDB-CPX-100001", "assembly_id": "6kv9_1", "entry_id": "6kv9"},
+        {"complex_id": "PDB-CPX-100002", "assembly_id": "5b03_1", "entry_id": "5b03"},
+        {"complex_id": "PDB-CPX-100002", "assembly_id": "7xyz_1", "entry_id": "7xyz"},
+        {"complex_id": "PDB-CPX-100004", "assembly_id": "8abc_1", "entry_id": "8abc"},
+    ],
+}
+
+
+class TestIncrementalUpdate(TestCase):
+    def setUp(self) -> None:
+        self.ndo = MagicMock()
+        self.ndo.run_query.return_value = mock_existing_complexes
+        self.updater = IncrementalUpdate(self.ndo)
+        self.updater.get_existing_complexes()
+
+    def test_compare(self):
+        (
+            new_params_lists,
+            stale_component_params_list,
+            stale_complex_params_list,
+        ) = self.updater.compare(mock_params_lists, [])
+
+        self.assertEqual(self.updater.added, {"PDB-CPX-100004"})
+        self.assertEqual(self.updater.removed, {"PDB-CPX-100003"})
+        self.assertEqual(self.updater.changed, {"PDB-CPX-100002"})
+
+        # unchanged relationships are not written again
+        self.assertEqual(
+            new_params_lists["accession_params_list"],
+            [mock_params_lists["accession_params_list"][2]],
+        )
+        self.assertEqual(new_params_lists["rfam_params_list"], [])
+        self.assertEqual(
+            [row["assembly_id"] for row in new_params_lists["assembly_params_list"]],
+            ["7xyz_1", "8abc_1"],
+        )
+        self.assertEqual(stale_component_params_list, [])
+        self.assertEqual(
+            stale_complex_params_list,
+            [{"pdb_complex_id": "PDB-CPX-100002", "complex_portal_id": "CPX-2522"}],
+        )
+
+        # only new assemblies were linked to PDB-CPX-100002, so its
+        # sub-complex relationships stay the same
+        self.assertEqual(self.updater.get_recomposed_complex_ids(), ["PDB-CPX-100004"])
+
+    def test_compare_stale_components(self):
+        params_lists = dict(mock_params_lists, rfam_params_list=[])
+        _, stale_component_params_list, _ = self.updater.compare(
+            params_lists,
+            [{"pdb_complex_id": "PDB-CPX-100002", "complex_portal_id": "CPX-2522"}],
+        )
+
+        self.assertEqual(
+            stale_component_params_list,
+            [
+                {
+                    "complex_id": "PDB-CPX-100002",
+                    "label": "RfamFamily",
+                    "key": "RF00001",
+                    "stoichiometry": "",
+                }
+            ],
+        )
+        self.assertEqual(
+            self.updater.get_recomposed_complex_ids(),
+            ["PDB-CPX-100002", "PDB-CPX-100004"],
+        )
@@ -0,0 +1,36 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pdbe_complexes.utils.mapping_pool import prepare_mapping, prepare_mappings
+
+mock_rows = [
+    {"accessions": [f"P{number:05d}_1_9606"], "assemblies": [f"{number}abc_1"]}
+    for number in range(100)
+]
+
+
+class TestMappingPool(TestCase):
+    @patch("pdbe_complexes.utils.mapping_pool.CHUNK_SIZE", 30)
+    def test_prepare_mappings(self):
+        expected = [prepare_mapping(row) for row in mock_rows]
+        for workers in (1, 2):
+            chunks = list(prepare_mappings(mock_rows, workers))
+            self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+            self.assertEqual(
+                [mapping for chunk in chunks for mapping in chunk], expected
+            )
+
+    @patch("pdbe_complexes.utils.mapping_pool.CHUNK_SIZE", 5)
+    def test_bounded_read_ahead(self):
+        num_read = []
+
+        def rows():
+            for row in mock_rows:
+                num_read.append(1)
+                yield row
+
+        chunks = prepare_mappings(rows(), 2)
+        next(chunks)
+        # at most two pending chunks per worker and the chunk being read
+        self.assertLessEqual(len(num_read), 5 * (2 * 2 + 1))
+        self.assertEqual(len(list(chunks)), len(mock_rows) // 5 - 1)
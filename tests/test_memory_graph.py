@@ -0,0 +1,219 @@
+import os
+import re
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.get_complex_name import ProcessComplexName
+from pdbe_complexes.process_complex import Neo4JProcessComplex
+from pdbe_complexes.utils.bulk_import import LOAD_SCRIPT
+from pdbe_complexes.utils.get_data_from_graph_db import GetComplexData
+from pdbe_complexes.utils.graph_schema import GraphSchema
+from pdbe_complexes.utils.memory_graph import InMemoryGraph
+from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+from pdbe_complexes.utils.query_cache import query_cache
+from pdbe_complexes.utils.subcomplex import verify_subcomplexes
+
+
+class TestInMemoryGraph(TestCase):
+    def setUp(self) -> None:
+        self.graph = InMemoryGraph()
+        self.graph.add_uniprot("P69905", "Hemoglobin subunit alpha", "9606")
+        self.graph.add_uniprot("P68871", "Hemoglobin subunit beta", "9606")
+        entity_1 = self.graph.add_entity(
+            "1a3n", 1, "HEMOGLOBIN (ALPHA CHAIN)", tax_id="9606", uniprot="P69905"
+        )
+        entity_2 = self.graph.add_entity(
+            "1a3n", 2, "HEMOGLOBIN (BETA CHAIN)", tax_id="9606", uniprot="P68871"
+        )
+        self.graph.add_assembly("1a3n", 1, {entity_1: 2, entity_2: 2})
+        entity_3 = self.graph.add_entity(
+            "2dn2", 1, "Hemoglobin subunit alpha", tax_id="9606", uniprot="P69905"
+        )
+        self.graph.add_assembly("2dn2", 1, {entity_3: 2})
+        self.graph.add_complex("CPX-2158", [("P69905", 2), ("P68871", 2)], ["1a3n"])
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _run_process(self, **kwargs):
+        process = Neo4JProcessComplex(
+            "neo4j://",
+            "mock_username",
+            "mock_password",
+            self.tmp_dir.name,
+            self.tmp_dir.name,
+            backend=self.graph,
+            **kwargs,
+        )
+        process.run_process()
+        return process
+
+    def test_assembly_data(self):
+        rows = self.graph.run(qy.PDB_ASSEMBLY_DATA_QUERY)
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "accessions": ["P68871_2_9606", "P69905_2_9606"],
+                    "assemblies": ["1a3n_1"],
+                },
+                {"accessions": ["P69905_2_9606"], "assemblies": ["2dn2_1"]},
+            ],
+        )
+
+    def test_process(self):
+        process = self._run_process()
+
+        self.assertEqual(
+            sorted(self.graph.pdb_complexes), ["PDB-CPX-100001", "PDB-CPX-100002"]
+        )
+        self.assertEqual(self.graph.same_as, {("PDB-CPX-100001", "CPX-2158")})
+        self.assertEqual(
+            self.graph.subcomplexes, {("PDB-CPX-100002", "PDB-CPX-100001")}
+        )
+        self.assertTrue(
+            verify_subcomplexes(process.ndo, sorted(self.graph.subcomplexes))
+        )
+
+        pdb_complexes = GetComplexData(
+            "neo4j://", "mock_username", "mock_password", backend=self.graph
+        ).get_pdb_complex_data()
+        self.assertEqual(
+            pdb_complexes["PDB-CPX-100002"]["components"][0]["molecule_name"],
+            "Hemoglobin subunit alpha",
+        )
+
+        # running the process again replaces the PDBComplex nodes
+        self._run_process()
+        self.assertEqual(len(self.graph.pdb_complexes), 2)
+
+    def test_stream(self):
+        self._run_process()
+        components = GetComplexData(
+            "neo4j://", "mock_username", "mock_password", backend=self.graph
+        ).get_pdb_complex_data()
+
+        process = self._run_process(stream=True, batch_size=1)
+        self.assertIsNone(process.relationship_stream)
+        self.assertEqual(process.ndo.write_stats["assembly_params_list"]["rows"], 2)
+        self.assertEqual(
+            GetComplexData(
+                "neo4j://", "mock_username", "mock_password", backend=self.graph
+            ).get_pdb_complex_data(),
+            components,
+        )
+        self.assertEqual(self.graph.same_as, {("PDB-CPX-100001", "CPX-2158")})
+        self.assertEqual(
+            self.graph.subcomplexes, {("PDB-CPX-100002", "PDB-CPX-100001")}
+        )
+
+    def test_bulk_import(self):
+        self._run_process()
+        components = GetComplexData(
+            "neo4j://", "mock_username", "mock_password", backend=self.graph
+        ).get_pdb_complex_data()
+        self.graph.pdb_complexes["PDB-CPX-999999"] = {
+            "COMPLEX_ID": "PDB-CPX-999999",
+            "COMPONENTS": set(),
+        }
+
+        bulk_import_path = os.path.join(self.tmp_dir.name, "bulk_import")
+        os.makedirs(bulk_import_path)
+        self._run_process(bulk_import_path=bulk_import_path)
+        with open(os.path.join(bulk_import_path, LOAD_SCRIPT)) as script_file:
+            script = script_file.read()
+
+        # run the script as cypher-shell would, from the dir of the files
+        param = {}
+        for file_url, statement in re.findall(
+            r":param file_url => '([^']*)'|:auto (.*?);\n", script, re.S
+        ):
+            if file_url:
+                param["file_url"] = file_url.replace(
+                    "file:///", f"file://{bulk_import_path}/"
+                )
+            else:
+                self.graph.run(statement, param if "$file_url" in statement else None)
+
+        # the stale PDBComplex node is replaced by the loaded ones
+        self.assertEqual(
+            GetComplexData(
+                "neo4j://", "mock_username", "mock_password", backend=self.graph
+            ).get_pdb_complex_data(),
+            components,
+        )
+        self.assertEqual(self.graph.same_as, {("PDB-CPX-100001", "CPX-2158")})
+        self.assertEqual(
+            self.graph.subcomplexes, {("PDB-CPX-100002", "PDB-CPX-100001")}
+        )
+
+    def test_grouped_pdb_complexes(self):
+        self._run_process()
+        pdb_complexes = GetComplexData(
+            "neo4j://", "mock_username", "mock_password", backend=self.graph
+        ).get_pdb_complex_data()
+        grouped_pdb_complexes = GetComplexData(
+            "neo4j://",
+            "mock_username",
+            "mock_password",
+            backend=self.graph,
+            grouped=True,
+        ).get_pdb_complex_data()
+        self.assertEqual(grouped_pdb_complexes, pdb_complexes)
+
+    def test_synthetic(self):
+        graph = InMemoryGraph.synthetic(50)
+        rows = graph.run(qy.PDB_ASSEMBLY_DATA_QUERY)
+        self.assertEqual(sum(len(row["assemblies"]) for row in rows), 50)
+
+    def test_schema(self):
+        ndo = Neo4jDatabaseOperations(
+            ("neo4j://", "mock_username", "mock_password"), backend=self.graph
+        )
+        GraphSchema(ndo).prepare()
+        self.assertEqual(GraphSchema(ndo).find_missing(), [])
+
+    def test_unknown_statement(self):
+        with self.assertRaises(ValueError):
+            self.graph.run("MATCH (n) RETURN n")
+
+    def test_last_committed_tx(self):
+        before = self.graph.run(qy.LAST_COMMITTED_TX_STATEMENT).evaluate()
+        self.graph.run(qy.PDB_ASSEMBLY_DATA_QUERY)
+        self.assertEqual(
+            self.graph.run(qy.LAST_COMMITTED_TX_STATEMENT).evaluate(), before
+        )
+        # a write that only sets properties still commits a transaction
+        self.graph.run(
+            qy.SET_COMPLEX_NAMES_QUERY,
+            {"complex_name_params_list": []},
+        )
+        self.assertNotEqual(
+            self.graph.run(qy.LAST_COMMITTED_TX_STATEMENT).evaluate(), before
+        )
+
+    @patch.object(ProcessComplexName, "check_annotated_name", return_value=None)
+    @patch.object(ProcessComplexName, "_get_complex_portal_entries")
+    def test_cached_name_rerun(self, mock_complex_portal, mock_annotated_name):
+        self._run_process()
+        query_cache.configure(os.path.join(self.tmp_dir.name, "cache"))
+        self.addCleanup(query_cache.disable)
+
+        with patch.object(self.graph, "run", wraps=self.graph.run) as mock_run:
+            for _ in range(2):
+                ProcessComplexName(
+                    "neo4j://",
+                    "mock_username",
+                    "mock_password",
+                    self.tmp_dir.name,
+                    self.tmp_dir.name,
+                    backend=self.graph,
+                ).run_process()
+        # the names set by the first run do not invalidate the PDB complexes
+        self.assertEqual(
+            [c.args[0] for c in mock_run.call_args_list].count(qy.PDB_COMPLEX_QUERY),
+            1,
+        )
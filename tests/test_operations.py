@@ -0,0 +1,67 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from pdbe_complexes.utils.operations import Neo4jDatabaseOperations
+
+mock_records = [{"accessions": f"P{i:05d}_1_9606"} for i in range(7)]
+
+
+class MockResult:
+    def __init__(self, records):
+        self.remaining = list(records)
+        self.buffer = []
+
+    def pull(self, n):
+        n = len(self.remaining) if n == -1 else n
+        self.buffer.extend(self.remaining[:n])
+        self.remaining = self.remaining[n:]
+
+    def has_more_records(self):
+        return bool(self.remaining)
+
+
+class MockCursor:
+    def __init__(self, result, hydrant):
+        self.result = result
+        self.current = None
+
+    def forward(self):
+        if not self.result.buffer:
+            return 0
+        self.current = self.result.buffer.pop(0)
+        return 1
+
+
+class TestNeo4jDatabaseOperations(TestCase):
+    def setUp(self) -> None:
+        self.manager = MagicMock()
+        self.graph = self.manager.get_graph.return_value
+        self.connector = self.graph.service.connector
+        self.result = MockResult(mock_records)
+        self.connector.run.return_value = self.result
+        self.connector.pull.side_effect = lambda result, n=-1: result.pull(n)
+
+    @patch("pdbe_complexes.utils.operations.Connection")
+    @patch("pdbe_complexes.utils.operations.Cursor", MockCursor)
+    def test_stream_query_pulls_in_fetch_size_batches(self, connection):
+        ndo = Neo4jDatabaseOperations(
+            ("neo4j://", "mock_username", "mock_password"),
+            manager=self.manager,
+            fetch_size=3,
+        )
+        stream = ndo.run_query("MATCH (n) RETURN n", stream=True)
+
+        # nothing is sent to the server until the records are consumed
+        self.connector.run.assert_not_called()
+
+        first = next(stream)
+        self.assertEqual(first, mock_records[0])
+        self.assertEqual(self.connector.pull.call_count, 1)
+        self.assertEqual(len(self.result.remaining), 4)
+
+        self.assertEqual([first] + list(stream), mock_records)
+        self.assertEqual(
+            [c.kwargs["n"] for c in self.connector.pull.call_args_list], [3, 3, 3]
+        )
+        self.graph.begin.assert_called_once_with(readonly=True)
+        self.graph.commit.assert_called_once()
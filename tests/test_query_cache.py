@@ -0,0 +1,126 @@
+import glob
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from py2neo.errors import Neo4jError
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.utils.query_cache import QueryCache
+
+mock_rows = [
+    {"accession": "P69905", "description": "Hemoglobin subunit alpha"},
+    {"accession": "P68871", "description": None},
+]
+
+
+class TestQueryCache(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = QueryCache()
+        self.cache.configure(self.tmp_dir.name)
+        self.ndo = MagicMock()
+        self.counts = MagicMock()
+        self.counts.evaluate.return_value = 10
+        self.tx_ids = MagicMock()
+        self.tx_ids.evaluate.return_value = ["Transactions=10"]
+
+        def run_query(query, param=None, stream=False):
+            if query == qy.LAST_COMMITTED_TX_STATEMENT:
+                return self.tx_ids
+            if query in (qy.NODE_COUNT_STATEMENT, qy.RELATIONSHIP_COUNT_STATEMENT):
+                return self.counts
+            return mock_rows
+
+        self.ndo.run_query.side_effect = run_query
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _query_calls(self):
+        return [
+            c
+            for c in self.ndo.run_query.call_args_list
+            if c.args[0] == qy.UNIPROT_QUERY
+        ]
+
+    def test_result_set_is_reused(self):
+        self.assertEqual(self.cache.run(self.ndo, qy.UNIPROT_QUERY), mock_rows)
+        self.assertEqual(self.cache.run(self.ndo, qy.UNIPROT_QUERY), mock_rows)
+        self.assertEqual(len(self._query_calls()), 1)
+
+    def test_graph_change_misses(self):
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        # a property change commits a transaction without changing the counts
+        self.tx_ids.evaluate.return_value = ["Transactions=11"]
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.assertEqual(len(self._query_calls()), 2)
+
+    def test_count_fallback(self):
+        self.tx_ids.evaluate.side_effect = Neo4jError.hydrate(
+            {
+                "code": "Neo.ClientError.Procedure.ProcedureNotFound",
+                "message": "There is no procedure with the name `dbms.queryJmx`",
+            }
+        )
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.assertEqual(len(self._query_calls()), 1)
+        self.counts.evaluate.return_value = 11
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.assertEqual(len(self._query_calls()), 2)
+
+    def test_refresh(self):
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.cache.configure(self.tmp_dir.name, refresh=True)
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        # refreshed once per run
+        self.assertEqual(len(self._query_calls()), 2)
+
+    def test_expired_result_set_is_evicted(self):
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        (path,) = glob.glob(os.path.join(self.tmp_dir.name, "*.feather"))
+        expired = time.time() - 3600
+        os.utime(path, (expired, expired))
+
+        self.cache.configure(self.tmp_dir.name, ttl=60)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_write_keeps_unchanged_result_sets(self):
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.cache.run(self.ndo, qy.PDB_COMPLEX_QUERY)
+        fingerprint = self.cache.get_write_fingerprint(
+            self.ndo, qy.MERGE_ACCESSION_QUERY
+        )
+        self.tx_ids.evaluate.return_value = ["Transactions=12"]
+        self.cache.record_write(self.ndo, qy.MERGE_ACCESSION_QUERY, fingerprint, 2)
+
+        # the UniProt names are kept, the PDB complexes are read again
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.assertEqual(len(self._query_calls()), 1)
+        self.cache.run(self.ndo, qy.PDB_COMPLEX_QUERY)
+        self.assertEqual(
+            len(
+                [
+                    c
+                    for c in self.ndo.run_query.call_args_list
+                    if c.args[0] == qy.PDB_COMPLEX_QUERY
+                ]
+            ),
+            2,
+        )
+
+    def test_write_by_another_process_drops_result_sets(self):
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        fingerprint = self.cache.get_write_fingerprint(
+            self.ndo, qy.SET_COMPLEX_NAMES_QUERY
+        )
+        # one transaction more than the write has run
+        self.tx_ids.evaluate.return_value = ["Transactions=12"]
+        self.cache.record_write(self.ndo, qy.SET_COMPLEX_NAMES_QUERY, fingerprint, 1)
+
+        self.cache.run(self.ndo, qy.UNIPROT_QUERY)
+        self.assertEqual(len(self._query_calls()), 2)
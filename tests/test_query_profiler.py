@@ -0,0 +1,86 @@
+import json
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.utils.query_profiler import EXPLAIN_MODE, QueryProfiler
+
+mock_summary = {
+    "t_first": 3,
+    "t_last": 12,
+    "profile": {
+        "operatorType": "ProduceResults@neo4j",
+        "args": {"Details": "accessions, assemblies"},
+        "identifiers": ["accessions", "assemblies"],
+        "rows": 5,
+        "dbHits": 0,
+        "pageCacheHits": 1,
+        "pageCacheMisses": 0,
+        "children": [
+            {
+                "operatorType": "NodeByLabelScan@neo4j",
+                "args": {"Details": "assembly:Assembly"},
+                "identifiers": ["assembly"],
+                "rows": 20,
+                "dbHits": 21,
+                "pageCacheHits": 40,
+                "pageCacheMisses": 2,
+                "children": [],
+            }
+        ],
+    },
+}
+
+
+class TestQueryProfiler(TestCase):
+    def test_statements_are_prefixed(self):
+        profiler = QueryProfiler()
+        # statements are left unchanged until profiling is enabled
+        self.assertEqual(profiler.prefix(qy.ENTITY_QUERY), qy.ENTITY_QUERY)
+
+        profiler.enable()
+        self.assertEqual(profiler.prefix(qy.ENTITY_QUERY), f"PROFILE {qy.ENTITY_QUERY}")
+        self.assertEqual(profiler.prefix("RETURN 1"), "RETURN 1")
+
+    def test_record(self):
+        profiler = QueryProfiler()
+        profiler.enable()
+        profiler.record(qy.PDB_ASSEMBLY_DATA_QUERY, mock_summary, 0.5)
+        profiler.record(qy.PDB_ASSEMBLY_DATA_QUERY, mock_summary, 0.5)
+
+        entry = profiler.report["PDB_ASSEMBLY_DATA_QUERY"]
+        self.assertEqual(entry["executions"], 2)
+        self.assertEqual(entry["db_hits"], 42)
+        self.assertEqual(entry["rows"], 10)
+        self.assertEqual(entry["page_cache_hits"], 82)
+        self.assertEqual(entry["page_cache_misses"], 4)
+        self.assertEqual(entry["server_time_ms"], 30)
+        self.assertEqual(
+            entry["operator_tree"]["children"][0]["operator"],
+            "NodeByLabelScan@neo4j",
+        )
+
+    def test_explain_queries(self):
+        profiler = QueryProfiler()
+        ndo = MagicMock()
+        profiler.explain_queries(ndo)
+
+        self.assertEqual(profiler.mode, EXPLAIN_MODE)
+        self.assertEqual(ndo.run_query.call_count, len(profiler.query_names))
+        for call in ndo.run_query.call_args_list:
+            if "$entity_params_list" in call.args[0]:
+                self.assertEqual(call.kwargs["param"], {"entity_params_list": []})
+
+    def test_write_report(self):
+        profiler = QueryProfiler()
+        profiler.enable()
+        profiler.record(qy.MERGE_ASSEMBLY_QUERY, mock_summary, 1.0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = profiler.write_report(tmp_dir)
+            with open(path) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report["mode"], "PROFILE")
+        self.assertEqual(report["queries"]["MERGE_ASSEMBLY_QUERY"]["db_hits"], 21)
+        self.assertNotIn("_max_db_hits", report["queries"]["MERGE_ASSEMBLY_QUERY"])
@@ -0,0 +1,97 @@
+import csv
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyarrow import csv as pa_csv
+
+from pdbe_complexes.process_complex import Neo4JProcessComplex
+from pdbe_complexes.utils.reference_loader import (
+    get_sidecar_path,
+    read_reference_columns,
+)
+
+mock_master_rows = [
+    {
+        "md5_obj": "hash_1",
+        "pdb_complex_id": "PDB-CPX-100001",
+        "complex_portal_id": "CPX-2158",
+        "accession": "P68871_2_9606,P69905_2_9606",
+        "entries": "1a3n_1",
+    },
+    {
+        "md5_obj": "hash_2",
+        "pdb_complex_id": "PDB-CPX-100007",
+        "complex_portal_id": "",
+        "accession": "P69905_2_9606",
+        "entries": "2dn2_1",
+    },
+]
+
+
+class TestReferenceLoader(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_filepath = os.path.join(self.tmp_dir.name, "complexes_master.csv")
+        with open(self.csv_filepath, "w", newline="") as csv_file:
+            writer = csv.DictWriter(
+                csv_file, fieldnames=[*mock_master_rows[0], "complex_name"]
+            )
+            writer.writeheader()
+            for row in mock_master_rows:
+                writer.writerow(dict(row, complex_name="Hemoglobin"))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_read_reference_columns(self):
+        columns = read_reference_columns(self.csv_filepath)
+        self.assertEqual(
+            columns["pdb_complex_id"], ["PDB-CPX-100001", "PDB-CPX-100007"]
+        )
+        self.assertEqual(columns["complex_portal_id"], ["CPX-2158", ""])
+        self.assertNotIn("complex_name", columns)
+        self.assertTrue(os.path.exists(get_sidecar_path(self.csv_filepath)))
+
+        # the sidecar is read instead of the unchanged CSV file
+        with patch.object(pa_csv, "read_csv") as mock_read_csv:
+            self.assertEqual(read_reference_columns(self.csv_filepath), columns)
+        mock_read_csv.assert_not_called()
+
+    def test_replaced_csv_older_than_sidecar(self):
+        read_reference_columns(self.csv_filepath)
+
+        # a different CSV file copied in with its older mtime preserved
+        with open(self.csv_filepath, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=[*mock_master_rows[0]])
+            writer.writeheader()
+            writer.writerow(mock_master_rows[1])
+        os.utime(self.csv_filepath, (0, 0))
+
+        columns = read_reference_columns(self.csv_filepath)
+        self.assertEqual(columns["pdb_complex_id"], ["PDB-CPX-100007"])
+
+    def test_get_reference_mapping(self):
+        process = Neo4JProcessComplex(
+            "neo4j://",
+            "mock_username",
+            "mock_password",
+            self.tmp_dir.name,
+            self.tmp_dir.name,
+        )
+        process.get_reference_mapping()
+
+        self.assertTrue(process.has_REFERENCE_MAPPING)
+        self.assertEqual(
+            process.reference_mapping["hash_2"],
+            {
+                key: value
+                for key, value in mock_master_rows[1].items()
+                if key != "md5_obj"
+            },
+        )
+        self.assertEqual(
+            process.reference_mapping.allocate("hash_3", "P1_1_9606", None, "")[0],
+            "PDB-CPX-100008",
+        )
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from pdbe_complexes.utils.relationship_buffer import RelationshipBuffer
+
+mock_rows = [
+    {"complex_id": "PDB-CPX-100001", "assembly_id": "1a3n_1", "entry_id": "1a3n"},
+    {"complex_id": "PDB-CPX-100001", "assembly_id": "1a3n_2", "entry_id": "1a3n"},
+    {"complex_id": "PDB-CPX-100002", "assembly_id": "2dn2_1", "entry_id": "2dn2"},
+]
+
+
+class TestRelationshipBuffer(TestCase):
+    def setUp(self) -> None:
+        self.buffer = RelationshipBuffer(("complex_id", "assembly_id", "entry_id"))
+        for row in mock_rows:
+            self.buffer.append(row["complex_id"], row["assembly_id"], row["entry_id"])
+
+    def test_rows(self):
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer, mock_rows)
+        self.assertEqual(self.buffer[1], mock_rows[1])
+        self.assertEqual(self.buffer[1:5], mock_rows[1:])
+        self.assertIs(self.buffer[0]["complex_id"], self.buffer[1]["complex_id"])
+
+    def test_columns(self):
+        buffer = RelationshipBuffer.from_columns(self.buffer.to_columns())
+        self.assertEqual(buffer, mock_rows)
+
+    def test_wrong_number_of_values(self):
+        with self.assertRaises(ValueError):
+            self.buffer.append("PDB-CPX-100003", "3abc_1")
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pdbe_complexes.utils.relationship_stream import RelationshipStream
+
+mock_queries = {"rfam_params_list": ("MOCK_RFAM_QUERY", "Rfam", "PDBComplex")}
+
+
+class TestRelationshipStream(TestCase):
+    def setUp(self) -> None:
+        self.ndo = MagicMock()
+        self.ndo.batch_writer.batch_size = 2
+        self.ndo.write_stats = {}
+        self.written = []
+
+        def write(query, param_name, rows, description):
+            self.written.append(list(rows))
+            return {"rows": len(rows), "chunks": 1, "seconds": 0.1}
+
+        self.ndo.batch_writer.write.side_effect = write
+
+    def test_stream(self):
+        stream = RelationshipStream(self.ndo, mock_queries, 1)
+        for rfam_acc in ("RF00001", "RF00005", "RF00177"):
+            stream.append("rfam_params_list", "PDB-CPX-100001", rfam_acc)
+        stats = stream.close()
+
+        self.assertEqual(
+            self.written,
+            [
+                [
+                    {"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00001"},
+                    {"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00005"},
+                ],
+                [{"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00177"}],
+            ],
+        )
+        self.assertEqual(stats["rfam_params_list"]["rows"], 3)
+        self.assertEqual(self.ndo.write_stats["rfam_params_list"]["chunks"], 2)
+
+    def test_write_error(self):
+        self.ndo.batch_writer.write.side_effect = ConnectionError("mock error")
+        stream = RelationshipStream(self.ndo, mock_queries, 1)
+        stream.append("rfam_params_list", "PDB-CPX-100001", "RF00001")
+        with self.assertRaises(ConnectionError):
+            stream.close()
@@ -0,0 +1,67 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pdbe_complexes.utils.subcomplex import (
+    find_subcomplexes,
+    get_compositions,
+    verify_subcomplexes,
+)
+
+mock_params_lists = {
+    "accession_params_list": [
+        {"complex_id": "PDB-CPX-100001", "accession": "P1", "stoichiometry": "2"},
+        {"complex_id": "PDB-CPX-100002", "accession": "P1", "stoichiometry": "2"},
+        {"complex_id": "PDB-CPX-100002", "accession": "P2", "stoichiometry": "1"},
+        {"complex_id": "PDB-CPX-100003", "accession": "P1", "stoichiometry": "4"},
+        {"complex_id": "PDB-CPX-100003", "accession": "P2", "stoichiometry": "1"},
+    ],
+    "entity_params_list": [],
+    "unmapped_polymer_params_list": [],
+    "rfam_params_list": [
+        {"complex_id": "PDB-CPX-100002", "rfam_acc": "RF00001"},
+        {"complex_id": "PDB-CPX-100004", "rfam_acc": "RF00001"},
+    ],
+    "assembly_params_list": [
+        {"complex_id": "PDB-CPX-100001", "assembly_id": "1abc_1", "entry_id": "1abc"},
+        {"complex_id": "PDB-CPX-100002", "assembly_id": "2abc_1", "entry_id": "2abc"},
+    ],
+}
+
+
+class TestSubcomplex(TestCase):
+    def test_get_compositions(self):
+        compositions = get_compositions(mock_params_lists)
+
+        self.assertEqual(
+            compositions["PDB-CPX-100002"],
+            {
+                ("UniProt", "P1", "2"),
+                ("UniProt", "P2", "1"),
+                ("RfamFamily", "RF00001", ""),
+            },
+        )
+        self.assertEqual(compositions["PDB-CPX-100001"], {("UniProt", "P1", "2")})
+
+    def test_find_subcomplexes(self):
+        pairs = find_subcomplexes(get_compositions(mock_params_lists))
+
+        # the stoichiometry of P1 differs in PDB-CPX-100003
+        self.assertEqual(
+            pairs,
+            [
+                ("PDB-CPX-100001", "PDB-CPX-100002"),
+                ("PDB-CPX-100004", "PDB-CPX-100002"),
+            ],
+        )
+
+    def test_verify_subcomplexes(self):
+        ndo = MagicMock()
+        ndo.run_query.return_value = [
+            {"src_complex_id": "PDB-CPX-100001", "dest_complex_id": "PDB-CPX-100002"},
+            {"src_complex_id": "PDB-CPX-100004", "dest_complex_id": "PDB-CPX-100002"},
+        ]
+        pairs = find_subcomplexes(get_compositions(mock_params_lists))
+
+        self.assertTrue(verify_subcomplexes(ndo, pairs))
+        self.assertFalse(verify_subcomplexes(ndo, pairs[:1]))
+        self.assertTrue(verify_subcomplexes(ndo, pairs[:1], ["PDB-CPX-100001"]))
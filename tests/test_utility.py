@@ -1,8 +1,11 @@
 import os
+import tempfile
 from pathlib import Path
 from unittest import TestCase
 from unittest.mock import patch
 
+import pandas as pd
+
 from pdbe_complexes.constants import complex_mapping_headers as csv_headers
 from pdbe_complexes.utils import utility as ut
 
@@ -148,8 +151,96 @@ class TestUtility(TestCaseBase):
 
         if path:
             self.assertIsFile(path)
-            # delete file at the end of the test
+            # the reference mapping sidecar is refreshed with the file
+            sidecar_path = Path(mock_files_path.joinpath("complexes_master.feather"))
+            self.assertIsFile(sidecar_path)
+            self.assertGreaterEqual(
+                os.path.getmtime(sidecar_path), os.path.getmtime(path)
+            )
+            # delete files at the end of the test
             os.remove(mock_files_path.joinpath("complexes_master.csv"))
+            os.remove(sidecar_path)
+
+    def test_merge_csv_files_empty_cells(self):
+        "Test that reading the inputs as strings keeps the merged file the same"
+        mapping_rows = (
+            "md5_obj,pdb_complex_id,accession,complex_portal_id,entries\n"
+            'hash_1,PDB-CPX-100015,A0A010_2_67581,,"5b01_1,5b00_1"\n'
+            "hash_2,PDB-CPX-100016,P69905_2_9606,CPX-2158,\n"
+            "hash_3,PDB-CPX-100017,,,6br7_1\n"
+        )
+        name_rows = (
+            "pdb_complex_id,complex_name,derived_complex_name,complex_name_type\n"
+            "PDB-CPX-100015,MoeN5,,protein name from UniProt\n"
+            "PDB-CPX-100016,,,\n"
+            "PDB-CPX-100017,Hemoglobin,Hemoglobin,\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for filename, rows in (
+                ("complexes_mapping.csv", mapping_rows),
+                ("complexes_name.csv", name_rows),
+            ):
+                with open(os.path.join(tmp_dir, filename), "w") as csv_file:
+                    csv_file.write(rows)
+
+            # merge_csv_files as it was before, with the inferred dtypes
+            df1 = pd.read_csv(os.path.join(tmp_dir, "complexes_mapping.csv"))
+            df2 = pd.read_csv(os.path.join(tmp_dir, "complexes_name.csv"))
+            expected = (
+                df1.merge(df2, on="pdb_complex_id")
+                .reindex(
+                    columns=[
+                        "md5_obj",
+                        "pdb_complex_id",
+                        "complex_portal_id",
+                        "accession",
+                        "complex_name",
+                        "complex_name_type",
+                        "entries",
+                    ]
+                )
+                .to_csv(index=False)
+            )
+
+            ut.merge_csv_files(tmp_dir)
+            with open(os.path.join(tmp_dir, "complexes_master.csv")) as csv_file:
+                self.assertEqual(csv_file.read(), expected)
+
+    def test_write_delta_files(self):
+        previous_df = pd.DataFrame(
+            {
+                "pdb_complex_id": ["PDB-CPX-100015", "PDB-CPX-100016"],
+                "complex_name": ["MoeN5", "MoeO5"],
+                "entries": ["5b01_1", "3vkc_1"],
+            }
+        )
+        df = pd.DataFrame(
+            {
+                "pdb_complex_id": ["PDB-CPX-100016", "PDB-CPX-100017"],
+                "complex_name": ["MoeO5", None],
+                "entries": ["3vkc_1,3vkd_1", "6br7_1"],
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            counts = ut.write_delta_files(previous_df, df, tmp_dir)
+            added = pd.read_csv(os.path.join(tmp_dir, "complexes_master_added.csv"))
+            removed = pd.read_csv(os.path.join(tmp_dir, "complexes_master_removed.csv"))
+            changed = pd.read_csv(os.path.join(tmp_dir, "complexes_master_changed.csv"))
+
+        self.assertEqual(counts, {"added": 1, "removed": 1, "changed": 1})
+        self.assertEqual(list(added["pdb_complex_id"]), ["PDB-CPX-100017"])
+        self.assertEqual(list(removed["pdb_complex_id"]), ["PDB-CPX-100015"])
+        self.assertEqual(
+            changed.to_dict("records"),
+            [
+                {
+                    "pdb_complex_id": "PDB-CPX-100016",
+                    "field": "entries",
+                    "old_value": "3vkc_1",
+                    "new_value": "3vkc_1,3vkd_1",
+                }
+            ],
+        )
 
     def test_export_csv(self):
         "Test if the export_csv method creates a file"
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from py2neo.errors import Neo4jError
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.process_complex import Neo4JProcessComplex
+from pdbe_complexes.utils.batch_writer import BatchWriter
+from pdbe_complexes.utils.memory_graph import InMemoryGraph
+from pdbe_complexes.utils.write_journal import JOURNAL_FILENAME, WriteJournal
+
+mock_rows = [{"complex_id": f"PDB-CPX-{100001 + i}"} for i in range(25)]
+
+mock_query = "WITH $rows AS batch UNWIND batch AS row RETURN row"
+
+client_error = Neo4jError.hydrate(
+    {"code": "Neo.ClientError.Cluster.NotALeader", "message": "failover"}
+)
+
+
+class TestWriteJournal(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_resumes_after_committed_chunks(self):
+        journal = WriteJournal(self.tmp_dir.name)
+        journal.start({"rows": mock_rows})
+        ndo = MagicMock()
+        ndo.run_query.side_effect = [None, None, client_error]
+        writer = BatchWriter(ndo, batch_size=10, max_retries=1, retry_delay=0)
+        writer.journal = journal
+        with self.assertRaises(Neo4jError):
+            writer.write(mock_query, "rows", mock_rows)
+
+        resumed_journal = WriteJournal(self.tmp_dir.name)
+        self.assertEqual(resumed_journal.load(), {"rows": mock_rows})
+        self.assertEqual(resumed_journal.get_offset("rows"), 20)
+
+        ndo = MagicMock()
+        writer = BatchWriter(ndo, batch_size=10, max_retries=1, retry_delay=0)
+        writer.journal = resumed_journal
+        stats = writer.write(mock_query, "rows", mock_rows)
+        self.assertEqual(
+            [c.kwargs["param"]["rows"] for c in ndo.run_query.call_args_list],
+            [mock_rows[20:]],
+        )
+        self.assertEqual(stats["rows"], 5)
+
+    def test_process_is_resumed(self):
+        graph = InMemoryGraph.synthetic(100)
+        run = graph.run
+
+        def failing_run(query, param=None):
+            if query == qy.MERGE_SUBCOMPLEX_QUERY:
+                raise ConnectionError("network down")
+            return run(query, param)
+
+        graph.run = failing_run
+
+        def get_process(resume):
+            return Neo4JProcessComplex(
+                "neo4j://",
+                "mock_username",
+                "mock_password",
+                self.tmp_dir.name,
+                self.tmp_dir.name,
+                backend=graph,
+                resume=resume,
+            )
+
+        with self.assertRaises(ConnectionError):
+            get_process(False).run_process()
+        self.assertTrue(WriteJournal(self.tmp_dir.name).exists())
+        self.assertFalse(graph.subcomplexes)
+
+        graph.run = MagicMock(side_effect=run)
+        process = get_process(True)
+        process.run_process()
+
+        queries = [c.args[0] for c in graph.run.call_args_list]
+        # the data is not read and the committed relationships are not written
+        # again
+        self.assertNotIn(qy.PDB_ASSEMBLY_DATA_QUERY, queries)
+        self.assertNotIn(qy.MERGE_ACCESSION_QUERY, queries)
+        self.assertNotIn(qy.DROP_SUBCOMPLEX_RELATION_QUERY, queries)
+        self.assertIn(qy.MERGE_SUBCOMPLEX_QUERY, queries)
+        self.assertTrue(graph.subcomplexes)
+        self.assertEqual(len(process.reference_mapping), len(graph.pdb_complexes))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.tmp_dir.name, JOURNAL_FILENAME))
+        )
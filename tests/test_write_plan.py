@@ -0,0 +1,68 @@
+import tempfile
+from unittest import TestCase
+
+from pdbe_complexes import queries as qy
+from pdbe_complexes.process_complex import Neo4JProcessComplex
+from pdbe_complexes.utils.memory_graph import InMemoryGraph
+from pdbe_complexes.utils.write_plan import WritePlan, write_plan
+
+mock_rows = [
+    {"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00001"},
+    {"complex_id": "PDB-CPX-100001", "rfam_acc": "RF00005"},
+    {"complex_id": "PDB-CPX-100002", "rfam_acc": "RF00177"},
+]
+
+
+class TestWritePlan(TestCase):
+    def test_record(self):
+        plan = WritePlan()
+        stats = plan.record_write("rfam_params_list", mock_rows, 2, "Rfam-PDBComplex")
+        self.assertEqual(stats["chunks"], 2)
+        plan.record_delete(qy.DROP_PDB_COMPLEX_NODES_QUERY, 25, 10, "deletion")
+
+        report = plan.get_report()
+        self.assertEqual(report["writes"][0]["batches"], 2)
+        self.assertEqual(report["writes"][0]["rows_per_transaction"], 2)
+        self.assertGreater(report["writes"][0]["max_transaction_bytes"], 0)
+        self.assertEqual(report["writes"][1]["batches"], 3)
+        self.assertEqual(
+            report["changes"],
+            [
+                {
+                    "action": "create",
+                    "item": "IS_PART_OF_PDB_COMPLEX relationship",
+                    "number": 3,
+                },
+                {"action": "delete", "item": "PDBComplex node", "number": 25},
+            ],
+        )
+
+    def test_dry_run(self):
+        graph = InMemoryGraph()
+        graph.add_uniprot("P69905", "Hemoglobin subunit alpha", "9606")
+        entity = graph.add_entity(
+            "2dn2", 1, "Hemoglobin subunit alpha", tax_id="9606", uniprot="P69905"
+        )
+        graph.add_assembly("2dn2", 1, {entity: 2})
+        write_plan.enable()
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                Neo4JProcessComplex(
+                    "neo4j://",
+                    "mock_username",
+                    "mock_password",
+                    tmp_dir,
+                    tmp_dir,
+                    backend=graph,
+                ).run_process()
+            changes = {
+                (change["action"], change["item"]): change["number"]
+                for change in write_plan.get_report()["changes"]
+            }
+        finally:
+            write_plan.disable()
+
+        self.assertEqual(graph.pdb_complexes, {})
+        self.assertEqual(changes[("allocate", "PDB complex ID")], 1)
+        self.assertEqual(changes[("create", "PDBComplex node")], 1)
+        self.assertEqual(changes[("create", "IS_PART_OF_PDB_COMPLEX relationship")], 2)